@@ -0,0 +1,376 @@
+"""
+Extraction throughput benchmark.
+
+Generates synthetic 10-K-style PDFs of configurable size (see synthetic_filings.py),
+runs the extraction pipeline against a local stand-in model and reports:
+
+- ingestion pages/sec
+- agent calls and prompt tokens per agent
+- prompt tokens served from a simulated provider prefix cache
+- end-to-end latency
+- field-level accuracy against the known ground truth
+
+The stand-in model answers deterministically by reading figures out of the prompt it
+receives, so accuracy measures whether the pipeline delivered the right pages to each
+agent. Its latency is simulated from the uncached prompt size (--base-latency,
+--latency-per-1k-tokens); like Azure OpenAI, the simulated cache only serves exact prompt
+prefixes of at least 1024 tokens, in 128-token steps, from calls that already completed.
+
+Usage:
+    python benchmark_extraction.py --pages 20 100 500 --modes chunked single
+    python benchmark_extraction.py --pages 500 --min-accuracy 1.0 --max-latency 30 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from chunked_extraction import ChunkedExtractor
+from prompt_layout import PromptCacheStats
+from financial_models import (BalanceSheet, CompanyData, CompanyInfo, Debt, FinancialMetrics, IndustryBenchmarks,
+                              KPIs, RiskFactors, Valuation, ValuationRange, YearlyBalanceSheet, YearlyFinancialData,
+                              YearlyKPIs)
+from industry_benchmarks import BenchmarkStore
+from page_store import ingest_pdf
+from synthetic_filings import SyntheticFiling, generate_filing, write_pdf
+from table_parser import parse_pages
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import count_tokens
+
+BENCHMARKS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "industry_benchmarks.csv")
+
+
+# ============================================================================
+# Local stand-in model
+# ============================================================================
+
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT_TOKENS = 128
+
+
+@dataclass
+class AgentUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix, by binary search over slice comparisons"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class PrefixCache:
+    """Simulated provider prompt cache shared by all stand-in agents (one deployment)"""
+
+    def __init__(self):
+        self.prompts: List[str] = []
+
+    def cached_tokens(self, prompt: str) -> int:
+        prefix = max((_common_prefix_length(prompt, seen) for seen in self.prompts), default=0)
+        tokens = count_tokens(prompt[:prefix]) if prefix else 0
+        if tokens < CACHE_MIN_TOKENS:
+            return 0
+        return tokens - (tokens - CACHE_MIN_TOKENS) % CACHE_INCREMENT_TOKENS
+
+    def add(self, prompt: str):
+        self.prompts.append(prompt)
+
+
+class StandInAgent:
+    """Deterministic local replacement for an agno Agent (same `arun`/`response_model` surface)"""
+
+    def __init__(self, name: str, response_model, answer: Callable[[str], object],
+                 usage: Dict[str, AgentUsage], base_latency: float, latency_per_1k_tokens: float,
+                 cache: PrefixCache):
+        self.name = name
+        self.response_model = response_model
+        self.answer = answer
+        self.usage = usage
+        self.base_latency = base_latency
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.cache = cache
+
+    async def arun(self, prompt: str):
+        tokens = count_tokens(prompt)
+        cached = self.cache.cached_tokens(prompt)
+        usage = self.usage.setdefault(self.name, AgentUsage())
+        usage.calls += 1
+        usage.prompt_tokens += tokens
+        usage.cached_tokens += cached
+        await asyncio.sleep(self.base_latency + self.latency_per_1k_tokens * (tokens - cached) / 1000)
+        self.cache.add(prompt)
+        # Answer from the document part only; the task suffix holds the schema text
+        document = prompt.split("=== TASK:")[0]
+        return SimpleNamespace(content=self.answer(document),
+                               metrics={"input_tokens": [tokens], "cached_tokens": [cached]})
+
+
+def _search(pattern: str, text: str, default=""):
+    match = re.search(pattern, text, re.MULTILINE)
+    return match.group(1) if match else default
+
+
+def answer_company_info(prompt: str) -> CompanyInfo:
+    return CompanyInfo(
+        name=_search(r"^(.+ Company)$", prompt, "unknown"),
+        industry=_search(r"Industry: (\w+)", prompt, "unknown"),
+        sectors=["automotive"],
+        year_founded=int(_search(r"Founded in (\d{4})", prompt, "0")),
+        employees=int(_search(r"approximately ([\d,]+) employees", prompt, "0").replace(",", "")),
+        website=_search(r"(www\.\S+)", prompt, "unknown"),
+        ein=_search(r"(\d{2}-\d{7})", prompt, "unknown"),
+    )
+
+
+def answer_financial_metrics(prompt: str) -> FinancialMetrics:
+    table = parse_pages([prompt])
+    return FinancialMetrics(yearly_data=[
+        YearlyFinancialData(
+            year=year,
+            revenue=table.value("revenue", year) or 0,
+            cogs=table.value("cogs", year) or 0,
+            operating_expenses=table.value("operating_expenses", year) or 0,
+            ebitda=table.value("ebitda", year) or 0,
+        )
+        for year in table.years(["revenue"])
+    ])
+
+
+def answer_balance_sheet(prompt: str) -> BalanceSheet:
+    table = parse_pages([prompt])
+    return BalanceSheet(yearly_data=[
+        YearlyBalanceSheet(
+            year=year,
+            total_assets=table.value("total_assets", year) or 0,
+            total_liabilities=table.value("total_liabilities", year) or 0,
+            equity=table.value("equity", year) or 0,
+            debt=Debt(long_term=table.value("long_term_debt", year) or 0,
+                      short_term=table.value("short_term_debt", year) or 0),
+            cash=table.value("cash", year) or 0,
+        )
+        for year in table.years(["total_assets"])
+    ])
+
+
+def answer_risk_factors(prompt: str) -> RiskFactors:
+    text = prompt.lower()
+    return RiskFactors(
+        high_customer_concentration="customer concentration" in text,
+        geographic_concentration="geographic concentration" in text,
+        supply_chain_dependency="supply chain" in text,
+        debt_level="high" if "indebtedness" in text else "medium",
+        market_cyclicality="high" if "cyclical" in text else "medium",
+    )
+
+
+def _merged(prompt: str, section: str, model):
+    """Read a merged sub-model the chunked pipeline passed as `SECTION:\\n{json}`"""
+    raw = _search(rf"^{section}:\n(.+)$", prompt)
+    return model.model_validate_json(raw) if raw else None
+
+
+def answer_kpis(prompt: str) -> KPIs:
+    financials = _merged(prompt, "FINANCIAL_METRICS", FinancialMetrics) or answer_financial_metrics(prompt)
+    balances = {b.year: b for b in (_merged(prompt, "BALANCE_SHEET", BalanceSheet) or answer_balance_sheet(prompt)).yearly_data}
+    kpis, previous = [], None
+    for data in financials.yearly_data:
+        balance = balances.get(data.year)
+        debt = (balance.debt.long_term + balance.debt.short_term) if balance else 0
+        kpis.append(YearlyKPIs(
+            year=data.year,
+            gross_margin=round((data.revenue - data.cogs) / data.revenue * 100, 2) if data.revenue else 0.0,
+            operating_margin=round(data.ebitda / data.revenue * 100, 2) if data.revenue else 0.0,
+            debt_to_equity=round(debt / balance.equity, 2) if balance and balance.equity else 0.0,
+            current_ratio=1.0,
+            revenue_growth=round((data.revenue - previous) / previous * 100, 2) if previous else 0.0,
+            market_share=0.0,
+        ))
+        previous = data.revenue
+    return KPIs(yearly_data=kpis)
+
+
+def answer_valuation(prompt: str) -> Valuation:
+    financials = _merged(prompt, "FINANCIAL_METRICS", FinancialMetrics) or answer_financial_metrics(prompt)
+    ebitda = financials.yearly_data[-1].ebitda if financials.yearly_data else 0
+    enterprise_value = ebitda * 8
+    return Valuation(enterprise_value=enterprise_value, ev_ebitda_multiple=8.0,
+                     valuation_range=ValuationRange(low=ebitda * 6, high=ebitda * 10))
+
+
+def answer_industry_benchmarks(prompt: str) -> IndustryBenchmarks:
+    return IndustryBenchmarks(avg_gross_margin=20.0, avg_operating_margin=6.0,
+                              avg_debt_to_equity=1.5, avg_revenue_growth=5.0)
+
+
+ANSWERS = {
+    "company_info": (CompanyInfo, answer_company_info),
+    "financial_metrics": (FinancialMetrics, answer_financial_metrics),
+    "balance_sheet": (BalanceSheet, answer_balance_sheet),
+    "kpis": (KPIs, answer_kpis),
+    "valuation": (Valuation, answer_valuation),
+    "industry_benchmarks": (IndustryBenchmarks, answer_industry_benchmarks),
+    "risk_factors": (RiskFactors, answer_risk_factors),
+}
+
+
+def build_stand_in_agents(usage: Dict[str, AgentUsage], base_latency: float,
+                          latency_per_1k_tokens: float) -> Dict[str, StandInAgent]:
+    cache = PrefixCache()
+    return {name: StandInAgent(name, model, answer, usage, base_latency, latency_per_1k_tokens, cache)
+            for name, (model, answer) in ANSWERS.items()}
+
+
+# ============================================================================
+# Pipelines under test
+# ============================================================================
+
+async def run_chunked(pages, agents: Dict[str, StandInAgent], store: BenchmarkStore) -> CompanyData:
+    extractor = ChunkedExtractor(agents, benchmark_lookup=lambda industry: IndustryBenchmarks(**store.get(industry)))
+    return CompanyData(**await extractor.extract(pages))
+
+
+async def run_single(pages, agents: Dict[str, StandInAgent], store: BenchmarkStore) -> CompanyData:
+    """Every agent reads the full document, as in the single-prompt mode"""
+    extractor = ChunkedExtractor(agents, benchmark_lookup=lambda industry: IndustryBenchmarks(**store.get(industry)))
+    return CompanyData(**await extractor.extract_full(pages))
+
+
+PIPELINES = {"chunked": run_chunked, "single": run_single}
+
+
+# ============================================================================
+# Scoring and reporting
+# ============================================================================
+
+def field_accuracy(result: CompanyData, filing: SyntheticFiling) -> float:
+    """Fraction of ground-truth statement figures the extraction got exactly right"""
+    expected = correct = 0
+    financials = {r.year: r for r in result.financial_metrics.yearly_data}
+    for year, truth in filing.financials.items():
+        for name in ("revenue", "cogs", "operating_expenses", "ebitda"):
+            expected += 1
+            correct += year in financials and getattr(financials[year], name) == truth[name]
+
+    balances = {r.year: r for r in result.balance_sheet.yearly_data}
+    for year, truth in filing.balance_sheets.items():
+        record = balances.get(year)
+        actual = {} if record is None else {
+            "total_assets": record.total_assets, "total_liabilities": record.total_liabilities,
+            "equity": record.equity, "cash": record.cash,
+            "long_term": record.debt.long_term, "short_term": record.debt.short_term,
+        }
+        for name in ("total_assets", "total_liabilities", "equity", "cash", "long_term", "short_term"):
+            expected += 1
+            correct += actual.get(name) == truth[name]
+    return correct / expected if expected else 1.0
+
+
+@dataclass
+class BenchmarkResult:
+    mode: str
+    pages: int
+    ingest_pages_per_second: float
+    end_to_end_seconds: float
+    accuracy: float
+    agent_usage: Dict[str, AgentUsage] = field(default_factory=dict)
+
+    @property
+    def total_prompt_tokens(self) -> int:
+        return sum(u.prompt_tokens for u in self.agent_usage.values())
+
+    @property
+    def total_calls(self) -> int:
+        return sum(u.calls for u in self.agent_usage.values())
+
+    @property
+    def total_cached_tokens(self) -> int:
+        return sum(u.cached_tokens for u in self.agent_usage.values())
+
+
+def run_benchmark(num_pages: int, mode: str, base_latency: float, latency_per_1k_tokens: float,
+                  seed: int = 0) -> BenchmarkResult:
+    filing = generate_filing(num_pages, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"synthetic_{num_pages}.pdf")
+        write_pdf(filing.pages, path)
+
+        start = time.perf_counter()
+        with ingest_pdf(path) as pages:
+            usage: Dict[str, AgentUsage] = {}
+            agents = build_stand_in_agents(usage, base_latency, latency_per_1k_tokens)
+            store = BenchmarkStore(BENCHMARKS_PATH)
+            result = asyncio.run(PIPELINES[mode](pages, agents, store))
+            elapsed = time.perf_counter() - start
+            ingest_rate = pages.stats.pages / pages.stats.seconds if pages.stats.seconds else float("inf")
+
+    return BenchmarkResult(mode=mode, pages=num_pages, ingest_pages_per_second=ingest_rate,
+                           end_to_end_seconds=elapsed, accuracy=field_accuracy(result, filing),
+                           agent_usage=usage)
+
+
+def print_report(results: List[BenchmarkResult]):
+    print(f"{'mode':<8} {'pages':>6} {'ingest p/s':>11} {'latency s':>10} {'calls':>6} {'prompt tok':>11} "
+          f"{'cached':>8} {'accuracy':>9}")
+    print("-" * 76)
+    for r in results:
+        cache = PromptCacheStats(r.total_calls, r.total_prompt_tokens, r.total_cached_tokens)
+        print(f"{r.mode:<8} {r.pages:>6} {r.ingest_pages_per_second:>11.0f} {r.end_to_end_seconds:>10.2f} "
+              f"{r.total_calls:>6} {r.total_prompt_tokens:>11,} {cache.hit_rate:>8.0%} {r.accuracy:>9.1%}")
+    print("\nPrompt tokens per agent (calls, cached tokens):")
+    for r in results:
+        per_agent = ", ".join(f"{name} {u.prompt_tokens:,} ({u.calls}, {u.cached_tokens:,})"
+                              for name, u in sorted(r.agent_usage.items()))
+        print(f"  {r.mode} / {r.pages} pages: {per_agent}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 500], help="Synthetic document sizes")
+    parser.add_argument("--modes", nargs="+", choices=sorted(PIPELINES), default=["chunked", "single"])
+    parser.add_argument("--base-latency", type=float, default=0.2, help="Simulated seconds per model call")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.02,
+                        help="Simulated extra seconds per 1k prompt tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--min-accuracy", type=float, help="Fail if any run scores below this accuracy")
+    parser.add_argument("--max-latency", type=float, help="Fail if any run takes longer than this (seconds)")
+    args = parser.parse_args(argv)
+
+    results = [run_benchmark(n, mode, args.base_latency, args.latency_per_1k_tokens, args.seed)
+               for n in args.pages for mode in args.modes]
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([{**asdict(r), "total_prompt_tokens": r.total_prompt_tokens, "total_calls": r.total_calls,
+                        "total_cached_tokens": r.total_cached_tokens} for r in results], f, indent=2)
+
+    failures = []
+    for r in results:
+        if args.min_accuracy is not None and r.accuracy < args.min_accuracy:
+            failures.append(f"{r.mode}/{r.pages} pages: accuracy {r.accuracy:.1%} < {args.min_accuracy:.1%}")
+        if args.max_latency is not None and r.end_to_end_seconds > args.max_latency:
+            failures.append(f"{r.mode}/{r.pages} pages: latency {r.end_to_end_seconds:.2f}s > {args.max_latency}s")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""
+Chunked map-reduce extraction for filings larger than the context window.
+
+Instead of pasting the whole filing into one prompt, the document is split into
+overlapping page windows:
+
+    Map:    document-scanning agents run over the most relevant windows concurrently
+    Reduce: partial records are merged locally (year-based dedup + conflict resolution)
+    Derive: KPI / valuation / benchmark agents run on the compact merged data only
+
+The number of windows sent to each agent is capped, so the number of model calls
+(and therefore latency) stays bounded as the document grows. When the local table
+parser finds the statement rows, the financial agents only verify its candidate
+table against the source pages instead of scanning windows.
+
+Every prompt is laid out with the document text first and the agent-specific task
+last (see prompt_layout.py), so agents reading the same pages share a cached prefix.
+"""
+import asyncio
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from prompt_layout import PromptCacheStats, layout_prompt
+from table_parser import BALANCE_FIELDS, FINANCIAL_FIELDS, CandidateTable, parse_pages, snippet
+from validation_retry import MAX_RETRIES, run_with_retry
+
+
+# ============================================================================
+# Page windows
+# ============================================================================
+
+@dataclass
+class PageWindow:
+    """
+    A contiguous, 1-indexed range of pages. The text is joined on access, so a
+    window over a PageStore only holds its pages in memory while it is being used.
+    """
+    start_page: int
+    end_page: int
+    pages: Sequence[str] = field(repr=False)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.pages[self.start_page - 1:self.end_page])
+
+
+def page_windows(pages: Sequence[str], window_size: int = 8, overlap: int = 2) -> List[PageWindow]:
+    """
+    Split page texts into overlapping windows.
+
+    Args:
+        pages: Text of each page, in order (a list or a PageStore)
+        window_size: Number of pages per window
+        overlap: Number of pages shared by consecutive windows, so tables that
+                 straddle a window boundary are seen whole at least once
+    """
+    if window_size < 1:
+        raise ValueError("window_size must be at least 1")
+    if not 0 <= overlap < window_size:
+        raise ValueError("overlap must be between 0 and window_size - 1")
+
+    windows = []
+    step = window_size - overlap
+    for start in range(0, max(len(pages) - overlap, 1), step):
+        end = min(start + window_size, len(pages))
+        if end <= start:
+            break
+        windows.append(PageWindow(start + 1, end, pages))
+    return windows
+
+
+# Keywords used to rank windows per agent, so each agent only reads the parts of
+# the filing that can contain its data.
+AGENT_KEYWORDS = {
+    "company_info": ["employees", "incorporated", "employer identification", "www.", "headquarters", "founded"],
+    "financial_metrics": ["net sales and revenue", "total revenue", "cost of sales", "selling, general and administrative",
+                          "operating income", "depreciation", "statements of income", "statements of operations"],
+    "balance_sheet": ["total assets", "total liabilities", "balance sheet", "cash and cash equivalents",
+                      "total equity", "short-term debt", "long-term debt"],
+    "risk_factors": ["risk factors", "concentration", "supplier", "supply chain", "cyclical", "indebtedness"],
+}
+
+
+def rank_windows(windows: Sequence[PageWindow], keywords: Iterable[str], limit: int) -> List[PageWindow]:
+    """
+    Return up to `limit` windows with the most keyword hits, in document order.
+    Falls back to the first window when nothing matches.
+    """
+    keywords = [k.lower() for k in keywords]
+    scored = []
+    for index, window in enumerate(windows):
+        text = window.text.lower()
+        score = sum(text.count(k) for k in keywords)
+        if score:
+            scored.append((score, index))
+
+    if not scored:
+        return list(windows[:1])
+
+    best = sorted(scored, key=lambda item: (-item[0], item[1]))[:limit]
+    return [windows[index] for _, index in sorted(best, key=lambda item: item[1])]
+
+
+# ============================================================================
+# Reduce: merging partial records
+# ============================================================================
+
+_UNINFORMATIVE = {"", "unknown", "n/a", "none", "not available"}
+
+
+def _is_informative(value) -> bool:
+    if value is None or isinstance(value, bool):
+        return value is not None
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        return value.strip().lower() not in _UNINFORMATIVE
+    if isinstance(value, (list, dict)):
+        return bool(value)
+    return True
+
+
+def _resolve(values: List):
+    """
+    Pick one value for a field reported by several windows.
+
+    Conflict resolution: ignore uninformative values (0, 'unknown', ...), then take
+    the most frequently reported value; ties go to the value seen first.
+    """
+    if not values:
+        return None
+    if isinstance(values[0], dict):
+        keys = OrderedDict((k, None) for v in values for k in v)
+        return {k: _resolve([v[k] for v in values if k in v]) for k in keys}
+    if isinstance(values[0], list):
+        merged = []
+        for value in values:
+            for item in value:
+                if item not in merged:
+                    merged.append(item)
+        return merged
+
+    informative = [v for v in values if _is_informative(v)] or values
+    counts = Counter(informative)
+    best = max(counts.values())
+    return next(v for v in informative if counts[v] == best)
+
+
+def merge_records(records: Sequence[BaseModel]) -> Optional[BaseModel]:
+    """Merge partial records of the same model into one, field by field"""
+    records = [r for r in records if r is not None]
+    if not records:
+        return None
+    dumps = [r.model_dump() for r in records]
+    merged = {field: _resolve([d[field] for d in dumps]) for field in dumps[0]}
+    return type(records[0])(**merged)
+
+
+def normalize_year(year) -> str:
+    """'FY 2023', '2023.0' and 2023 all normalize to '2023'"""
+    match = re.search(r"(19|20)\d{2}", str(year))
+    return match.group(0) if match else str(year).strip()
+
+
+def merge_yearly_records(records: Iterable[BaseModel], max_years: int = 3) -> List[BaseModel]:
+    """
+    Deduplicate yearly records (YearlyFinancialData, YearlyBalanceSheet, ...) by year
+    and resolve conflicting figures. Returns the latest `max_years` years, oldest first.
+    """
+    by_year: Dict[str, List[BaseModel]] = {}
+    for record in records:
+        year = normalize_year(record.year)
+        by_year.setdefault(year, []).append(record.model_copy(update={"year": year}))
+
+    years = sorted(by_year)[-max_years:]
+    return [merge_records(by_year[year]) for year in years]
+
+
+_LEVELS = {"low": 0, "medium": 1, "high": 2}
+
+
+def merge_risk_factors(records: Sequence[BaseModel]) -> Optional[BaseModel]:
+    """
+    Merge risk assessments conservatively: a flag raised in any window stays raised,
+    and levels take the most severe value reported.
+    """
+    records = [r for r in records if r is not None]
+    if not records:
+        return None
+    merged = {}
+    for field, value in records[0].model_dump().items():
+        values = [getattr(r, field) for r in records]
+        if isinstance(value, bool):
+            merged[field] = any(values)
+        elif isinstance(value, str) and value.lower() in _LEVELS:
+            merged[field] = max(values, key=lambda v: _LEVELS.get(str(v).lower(), -1))
+        else:
+            merged[field] = _resolve(values)
+    return type(records[0])(**merged)
+
+
+# ============================================================================
+# Orchestration
+# ============================================================================
+
+class ChunkedExtractor:
+    """
+    Map-reduce driver for the extraction agents.
+
+    `agents` maps CompanyData field names (company_info, financial_metrics, balance_sheet,
+    kpis, valuation, industry_benchmarks, risk_factors) to agents exposing
+    `await agent.arun(prompt)` with a `response_model`. When `benchmark_lookup` is
+    given, industry benchmarks come from it instead of the industry_benchmarks agent.
+    """
+
+    # Candidate fields that must all be found before an agent is given only the
+    # candidate table and its source pages instead of scanning windows
+    CORE_FIELDS = {
+        "financial_metrics": (FINANCIAL_FIELDS, ["revenue", "cogs", "operating_expenses"]),
+        "balance_sheet": (BALANCE_FIELDS, ["total_assets", "total_liabilities", "equity"]),
+    }
+
+    def __init__(self, agents: Dict[str, object], window_size: int = 8, overlap: int = 2,
+                 max_windows_per_agent: int = 6, max_concurrency: int = 8,
+                 company_hint: str = "General Motors", use_table_parser: bool = True,
+                 on_progress: Optional[Callable[[str], None]] = None,
+                 benchmark_lookup: Optional[Callable[[str], BaseModel]] = None,
+                 max_retries: int = MAX_RETRIES, cache_stats: Optional[PromptCacheStats] = None):
+        self.agents = agents
+        self.window_size = window_size
+        self.overlap = overlap
+        self.max_windows_per_agent = max_windows_per_agent
+        self.max_concurrency = max_concurrency
+        self.company_hint = company_hint
+        self.use_table_parser = use_table_parser
+        self.on_progress = on_progress
+        self.benchmark_lookup = benchmark_lookup
+        self.max_retries = max_retries
+        self.cache_stats = cache_stats if cache_stats is not None else PromptCacheStats()
+        self.calls_completed = 0
+
+    def _report(self, message: str):
+        if self.on_progress is not None:
+            self.on_progress(message)
+
+    async def _run_agent(self, semaphore: asyncio.Semaphore, name: str, document: str, context: str = ""):
+        """
+        Run one agent call on `document` (the shared prompt prefix) with optional
+        agent-specific `context`, retrying it alone with the validation error fed back
+        when its response does not validate. Returns the structured content, or None if
+        every attempt failed.
+        """
+        agent = self.agents[name]
+        async with semaphore:
+            content, _ = await run_with_retry(agent, layout_prompt(document, agent, context), self.max_retries,
+                                              on_response=self.cache_stats.record)
+        self.calls_completed += 1
+        self._report(f"{name} finished ({self.calls_completed} agent calls completed)")
+        return content
+
+    def _excerpt(self, start_page: int, end_page: int, text: str) -> str:
+        return (f"Here is an excerpt (pages {start_page}-{end_page}) of the financial "
+                f"statement of {self.company_hint}:\n\n{text}")
+
+    def _benchmarks(self, semaphore, industry: str):
+        """Awaitable industry benchmarks, from `benchmark_lookup` when given"""
+        if self.benchmark_lookup is not None:
+            return asyncio.to_thread(self.benchmark_lookup, industry)
+        return self._run_agent(semaphore, "industry_benchmarks", f"Industry: {industry}")
+
+    @staticmethod
+    def _check(results: Dict[str, Optional[BaseModel]], message: str):
+        missing = [name for name, value in results.items() if value is None]
+        if missing:
+            raise ValueError(f"{message}: {', '.join(missing)}")
+
+    async def _map(self, semaphore, name: str, windows: Sequence[PageWindow],
+                   pages: Sequence[str] = (), table: Optional[CandidateTable] = None) -> List[BaseModel]:
+        candidates = ""
+        if table is not None and name in self.CORE_FIELDS:
+            fields, core = self.CORE_FIELDS[name]
+            candidates = table.to_prompt(fields)
+            if table.covers(core):
+                # Verify the candidates against their source pages in a single call
+                text, included = snippet(pages, table.source_pages(fields))
+                excerpt = self._excerpt(included[0], included[-1], text)
+                result = await self._run_agent(semaphore, name, excerpt, candidates)
+                if result is not None:
+                    return [result]
+
+        selected = rank_windows(windows, AGENT_KEYWORDS[name], self.max_windows_per_agent)
+        results = await asyncio.gather(
+            *(self._run_agent(semaphore, name, self._excerpt(w.start_page, w.end_page, w.text), candidates)
+              for w in selected)
+        )
+        return [r for r in results if r is not None]
+
+    async def extract(self, pages: Sequence[str]) -> Dict[str, BaseModel]:
+        """
+        Run the full map-reduce extraction.
+
+        Returns:
+            Dict of CompanyData field name -> sub-model instance
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        windows = page_windows(pages, self.window_size, self.overlap)
+        table = parse_pages(pages) if self.use_table_parser else None
+        self._report(f"Scanning {len(windows)} page windows")
+
+        # Map: scan windows with the document-reading agents concurrently
+        company_parts, financial_parts, balance_parts, risk_parts = await asyncio.gather(
+            self._map(semaphore, "company_info", windows),
+            self._map(semaphore, "financial_metrics", windows, pages, table),
+            self._map(semaphore, "balance_sheet", windows, pages, table),
+            self._map(semaphore, "risk_factors", windows),
+        )
+
+        # Reduce: merge partial records locally
+        financial_model = self.agents["financial_metrics"].response_model
+        balance_model = self.agents["balance_sheet"].response_model
+        results = {
+            "company_info": merge_records(company_parts),
+            "financial_metrics": financial_model(
+                yearly_data=merge_yearly_records(r for part in financial_parts for r in part.yearly_data)),
+            "balance_sheet": balance_model(
+                yearly_data=merge_yearly_records(r for part in balance_parts for r in part.yearly_data)),
+            "risk_factors": merge_risk_factors(risk_parts),
+        }
+        self._check(results, "No window produced a valid result for")
+
+        self._report("Deriving KPIs, valuation and benchmarks")
+
+        # Derive: agents that only need the merged figures, not the raw document
+        merged_json = "\n".join(
+            f"{name.upper()}:\n{results[name].model_dump_json()}"
+            for name in ("company_info", "financial_metrics", "balance_sheet")
+        )
+        derived_prompt = (f"Here is the data already extracted from the financial statement of "
+                          f"{self.company_hint}:\n\n{merged_json}")
+        kpis, valuation, benchmarks = await asyncio.gather(
+            self._run_agent(semaphore, "kpis", derived_prompt),
+            self._run_agent(semaphore, "valuation", derived_prompt),
+            self._benchmarks(semaphore, results["company_info"].industry),
+        )
+        results.update(kpis=kpis, valuation=valuation, industry_benchmarks=benchmarks)
+
+        self._check(results, "Extraction failed for")
+        return results
+
+    async def extract_full(self, pages: Sequence[str]) -> Dict[str, BaseModel]:
+        """
+        Run every agent over the full document, for filings that fit the context window.
+
+        All prompts share the document as their prefix. The company_info call runs alone
+        first so the provider has cached that prefix before the other agents start.
+
+        Returns:
+            Dict of CompanyData field name -> sub-model instance
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        document = f"Here is the financial statement of {self.company_hint}:\n\n" + "\n".join(pages) + "\n"
+        table = parse_pages(pages) if self.use_table_parser else None
+        contexts = {}
+        if table is not None:
+            contexts = {name: table.to_prompt(fields) for name, (fields, _) in self.CORE_FIELDS.items()}
+            contexts["kpis"] = contexts["valuation"] = table.to_prompt(FINANCIAL_FIELDS + BALANCE_FIELDS)
+
+        self._report("Reading company profile")
+        company_info = await self._run_agent(semaphore, "company_info", document)
+        self._check({"company_info": company_info}, "Extraction failed for")
+
+        self._report("Extracting statements, KPIs, valuation and risks")
+        names = ["financial_metrics", "balance_sheet", "kpis", "valuation", "risk_factors"]
+        *parts, benchmarks = await asyncio.gather(
+            *(self._run_agent(semaphore, name, document, contexts.get(name, "")) for name in names),
+            self._benchmarks(semaphore, company_info.industry),
+        )
+        results = {"company_info": company_info, **dict(zip(names, parts)), "industry_benchmarks": benchmarks}
+
+        self._check(results, "Extraction failed for")
+        return results
@@ -1,15 +1,43 @@
 
 import streamlit as st
-from pypdf import PdfReader
-from pydantic import BaseModel, Field
-from typing import List
+from typing import Callable, Optional, Sequence
 from agno.agent import Agent
 from agno.models.azure import AzureOpenAI
-from agno.team.team import Team
 from dotenv import load_dotenv
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
 import os
+import time
+from chunked_extraction import ChunkedExtractor
+from financial_models import (BalanceSheet, CompanyData, CompanyInfo, FinancialMetrics, IndustryBenchmarks, KPIs,
+                              RiskFactors, Valuation)
+from industry_benchmarks import BenchmarkStore
+from page_store import PageStore, ingest_pdf
+from prompt_layout import PromptCacheStats, layout_prompt
+from validation_retry import run_with_retry
 load_dotenv()
 
+# Filings with more pages than this default to chunked (map-reduce) extraction
+CHUNKED_PAGE_THRESHOLD = 40
+
+# Extraction jobs run on a shared background pool so a slow extraction never
+# blocks the Streamlit script thread of this or any other session
+MAX_BACKGROUND_JOBS = 4
+POLL_INTERVAL_SECONDS = 1.0
+
+# Ingested documents kept per server; each is a memory-mapped temp file, so this
+# bounds disk use rather than RSS. MAX_PAGES caps the cost of a single upload.
+MAX_CACHED_DOCUMENTS = 8
+MAX_PAGES = 1000
+
+# Industry averages are read from this table; the IndustryBenchmarksAgent is only
+# asked about industries it does not contain
+BENCHMARKS_PATH = os.getenv("INDUSTRY_BENCHMARKS_PATH",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "industry_benchmarks.csv"))
+BENCHMARKS_REFRESH_SECONDS = 3600
+
 model = AzureOpenAI(
                     azure_endpoint= os.getenv("ENDPOINT_URL"),
                     azure_deployment=os.getenv("DEPLOYMENT_NAME"),
@@ -19,92 +47,16 @@ model = AzureOpenAI(
                     temperature=0.1,
                 )
 
-class CompanyInfo(BaseModel):
-    name: str = Field(..., description="Company's legal name")
-    industry: str = Field(..., description="Primary industry")
-    sectors: List[str] = Field(..., description="List of business sectors")
-    year_founded: int = Field(..., description="Year the company was founded")
-    employees: int = Field(..., description="Number of employees as of the latest year")
-    website: str = Field(..., description="Company website")
-    ein: str = Field(..., description="Employer Identification Number (EIN) for tax purposes")
-
-class YearlyFinancialData(BaseModel):
-    year: str = Field(..., description="Year as string e.g. '2023'")
-    revenue: int = Field(..., description="Total net sales and revenue in millions")
-    cogs: int = Field(..., description="Cost of sales in millions")
-    operating_expenses: int = Field(..., description="Selling, general and administrative expenses in millions")
-    ebitda: int = Field(..., description="EBITDA in millions (operating income + depreciation and amortization)")
-
-class FinancialMetrics(BaseModel):
-    yearly_data: List[YearlyFinancialData] = Field(..., description="List of financial data for the last 3 years")
-
-class Debt(BaseModel):
-    long_term: int = Field(..., description="Long-term debt and finance lease obligations in millions")
-    short_term: int = Field(..., description="Short-term debt and current portion of long-term debt in millions")
-
-class YearlyBalanceSheet(BaseModel):
-    year: str = Field(..., description="Year as string e.g. '2023'")
-    total_assets: int = Field(..., description="Total assets in millions")
-    total_liabilities: int = Field(..., description="Total liabilities in millions")
-    equity: int = Field(..., description="Total equity attributable to stockholders in millions")
-    debt: Debt
-    cash: int = Field(..., description="Cash and cash equivalents in millions")
-
-class BalanceSheet(BaseModel):
-    yearly_data: List[YearlyBalanceSheet] = Field(..., description="List of balance sheet data for the last 3 years where available")
-
-class YearlyKPIs(BaseModel):
-    year: str = Field(..., description="Year as string e.g. '2023'")
-    gross_margin: float = Field(..., description="Gross margin percentage")
-    operating_margin: float = Field(..., description="Operating margin percentage")
-    debt_to_equity: float = Field(..., description="Debt to equity ratio")
-    current_ratio: float = Field(..., description="Current ratio")
-    revenue_growth: float = Field(..., description="Revenue growth percentage from previous year; 0 for the earliest year")
-    market_share: float = Field(..., description="Market share percentage if available; otherwise 0.0")
-
-class KPIs(BaseModel):
-    yearly_data: List[YearlyKPIs] = Field(..., description="List of KPIs for the last 3 years")
-
-class ValuationRange(BaseModel):
-    low: int = Field(..., description="Low estimate of company valuation in millions")
-    high: int = Field(..., description="High estimate of company valuation in millions")
-
-class Valuation(BaseModel):
-    enterprise_value: int = Field(..., description="Enterprise value in millions")
-    ev_ebitda_multiple: float = Field(..., description="EV/EBITDA multiple")
-    valuation_range: ValuationRange
-
-class IndustryBenchmarks(BaseModel):
-    avg_gross_margin: float = Field(..., description="Average gross margin percentage for automotive industry")
-    avg_operating_margin: float = Field(..., description="Average operating margin percentage for automotive industry")
-    avg_debt_to_equity: float = Field(..., description="Average debt to equity ratio for automotive industry")
-    avg_revenue_growth: float = Field(..., description="Average revenue growth percentage for automotive industry")
-
-class RiskFactors(BaseModel):
-    high_customer_concentration: bool = Field(..., description="True if high customer concentration risk")
-    geographic_concentration: bool = Field(..., description="True if geographic concentration risk")
-    supply_chain_dependency: bool = Field(..., description="True if supply chain dependency risk")
-    debt_level: str = Field(..., description="Debt level: 'low', 'medium', or 'high'")
-    market_cyclicality: str = Field(..., description="Market cyclicality: 'low', 'medium', or 'high'")
-
-class CompanyData(BaseModel):
-    company_info: CompanyInfo
-    financial_metrics: FinancialMetrics
-    balance_sheet: BalanceSheet
-    kpis: KPIs
-    valuation: Valuation
-    industry_benchmarks: IndustryBenchmarks
-    risk_factors: RiskFactors
-
-
-
 
+# Agents get no system message: their description, instructions and JSON schema are
+# appended after the document (prompt_layout.py), so all of them share a cached prefix.
 
 CompanyInfoAgent = Agent(
     model=model,
     description="Extract and analyze company profile information",
     response_model=CompanyInfo,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Analyze the financial statements and extract key company information:
     1. Identify the complete legal company name (e.g., General Motors Company)
@@ -124,6 +76,7 @@ FinancialMetricsAgent = Agent(
     description="Extract yearly financial metrics from documents",
     response_model=FinancialMetrics,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Analyze the financial statements and extract yearly financial data for the last 3 years (2021, 2022, 2023 where available):
     - For each year, include the year and:
@@ -133,6 +86,9 @@ FinancialMetricsAgent = Agent(
       - EBITDA: operating income + depreciation and amortization; extract or calculate
     Provide as a list of YearlyFinancialData objects.
     
+    If a CANDIDATE FIGURES table is provided, verify each candidate against the document text and use it;
+    where a cell lists alternatives ("a/b?"), pick the one the statement supports. Only search the raw text
+    for figures missing from the table.
     Clean the noisy OCR text to find accurate numbers. If data for a year is missing, omit that entry. Ensure all information is sourced from the document.
     """
 )
@@ -142,6 +98,7 @@ BalanceSheetAgent = Agent(
     description="Extract balance sheet data from documents",
     response_model=BalanceSheet,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Analyze the balance sheet sections and extract figures for the last 3 years (2021, 2022, 2023 where available):
     - For each year, include the year and:
@@ -152,6 +109,8 @@ BalanceSheetAgent = Agent(
       - Cash: cash and cash equivalents in millions
     Provide as a list of YearlyBalanceSheet objects.
     
+    If a CANDIDATE FIGURES table is provided, verify each candidate against the document text and use it;
+    only search the raw text for figures missing from the table.
     Clean the noisy text to extract numbers. If missing, omit entry. Ensure sourced from document.
     """
 )
@@ -161,6 +120,7 @@ KPIsAgent = Agent(
     description="Calculate and extract KPIs from documents",
     response_model=KPIs,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Using data from the financial statements, calculate KPIs for each of the last 3 years (2021, 2022, 2023 where available):
     - For each year, include the year and:
@@ -181,6 +141,7 @@ ValuationAgent = Agent(
     description="Estimate valuation metrics based on financials",
     response_model=Valuation,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Based on the financial statements and company knowledge:
     - Enterprise value: market cap + total debt - cash (estimate market cap if needed)
@@ -196,14 +157,15 @@ IndustryBenchmarksAgent = Agent(
     description="Provide industry benchmark averages",
     response_model=IndustryBenchmarks,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
-    For the automotive industry, provide averages:
+    For the industry named in the prompt (e.g. automotive), provide averages:
     - Avg gross margin (%)
     - Avg operating margin (%)
     - Avg debt to equity
     - Avg revenue growth (%)
     
-    Use standard data from knowledge (e.g., gross margin ~20%, etc.).
+    Use standard data from knowledge (e.g., automotive gross margin ~20%, etc.).
     """
 )
 
@@ -212,6 +174,7 @@ RiskFactorsAgent = Agent(
     description="Analyze risk factors from documents",
     response_model=RiskFactors,
     use_json_mode=True,
+    create_default_system_message=False,
     instructions="""
     Analyze the document for risks:
     - High customer concentration: true if indicated
@@ -224,15 +187,110 @@ RiskFactorsAgent = Agent(
     """
 )
 
-CompanyData_team = Team(
-    name="Company Data Extraction Team",
-    mode="coordinate",
-    model=model,
-    members=[CompanyInfoAgent, FinancialMetricsAgent, BalanceSheetAgent, KPIsAgent, ValuationAgent, IndustryBenchmarksAgent, RiskFactorsAgent],
-    response_model=CompanyData,
-    markdown=True,
-    show_members_responses=True,
-)
+# Agent per CompanyData field
+EXTRACTION_AGENTS = {
+    "company_info": CompanyInfoAgent,
+    "financial_metrics": FinancialMetricsAgent,
+    "balance_sheet": BalanceSheetAgent,
+    "kpis": KPIsAgent,
+    "valuation": ValuationAgent,
+    "industry_benchmarks": IndustryBenchmarksAgent,
+    "risk_factors": RiskFactorsAgent,
+}
+
+
+def ask_benchmarks_agent(industry: str) -> Optional[dict]:
+    """Fallback for industries missing from the benchmark table; None if no answer passes validation"""
+    prompt = layout_prompt(f"Industry: {industry}", IndustryBenchmarksAgent)
+    benchmarks, _ = asyncio.run(run_with_retry(IndustryBenchmarksAgent, prompt))
+    return benchmarks.model_dump() if benchmarks is not None else None
+
+
+BENCHMARK_STORE = BenchmarkStore(BENCHMARKS_PATH, refresh_interval=BENCHMARKS_REFRESH_SECONDS,
+                                 fallback=ask_benchmarks_agent)
+
+
+def get_industry_benchmarks(industry: str) -> Optional[IndustryBenchmarks]:
+    """Industry averages from the local table, memoized; the agent is only asked on a miss"""
+    values = BENCHMARK_STORE.get(industry)
+    return IndustryBenchmarks(**values) if values is not None else None
+
+
+def extract_chunked(pages: Sequence[str], on_progress: Optional[Callable[[str], None]] = None,
+                    cache_stats: Optional[PromptCacheStats] = None) -> CompanyData:
+    """Extract CompanyData by running the agents over overlapping page windows"""
+    extractor = ChunkedExtractor(EXTRACTION_AGENTS, on_progress=on_progress,
+                                 benchmark_lookup=get_industry_benchmarks, cache_stats=cache_stats)
+    return CompanyData(**asyncio.run(extractor.extract(pages)))
+
+
+def extract_single_prompt(pages: Sequence[str], on_progress: Optional[Callable[[str], None]] = None,
+                          cache_stats: Optional[PromptCacheStats] = None) -> CompanyData:
+    """Extract CompanyData with every agent reading the full document text behind a shared prompt prefix"""
+    extractor = ChunkedExtractor(EXTRACTION_AGENTS, on_progress=on_progress,
+                                 benchmark_lookup=get_industry_benchmarks, cache_stats=cache_stats)
+    return CompanyData(**asyncio.run(extractor.extract_full(pages)))
+
+
+# ============================================================================
+# Caching and background execution
+# ============================================================================
+
+@dataclass
+class ExtractionJob:
+    """A background extraction and the progress it has reported so far"""
+    future: Optional[Future] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    stage: str = "Queued"
+    cache_stats: PromptCacheStats = field(default_factory=PromptCacheStats)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+
+@st.cache_resource
+def get_job_pool() -> ThreadPoolExecutor:
+    """Worker pool shared by all sessions on this server"""
+    return ThreadPoolExecutor(max_workers=MAX_BACKGROUND_JOBS, thread_name_prefix="extraction")
+
+
+@st.cache_resource(max_entries=MAX_CACHED_DOCUMENTS, show_spinner=False)
+def load_pdf_pages(file_hash: str, _uploaded_file) -> PageStore:
+    """
+    Stream the PDF page by page into a memory-mapped PageStore, cached by file hash
+    so reruns never re-read the PDF.
+    """
+    _uploaded_file.seek(0)
+    return ingest_pdf(_uploaded_file, max_pages=MAX_PAGES)
+
+
+def file_sha256(uploaded_file, chunk_size: int = 1 << 20) -> str:
+    """Hash an uploaded file in chunks, without copying its contents"""
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(chunk_size), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def start_extraction_job(pages: Sequence[str], chunked: bool) -> ExtractionJob:
+    """Submit an extraction to the background pool and return its job handle"""
+    job = ExtractionJob()
+
+    def run() -> CompanyData:
+        job.stage = "Extracting financial information"
+        try:
+            extract = extract_chunked if chunked else extract_single_prompt
+            return extract(pages, on_progress=lambda message: setattr(job, "stage", message),
+                           cache_stats=job.cache_stats)
+        finally:
+            job.finished_at = time.time()
+
+    job.future = get_job_pool().submit(run)
+    return job
 
 
 def main():
@@ -242,21 +300,42 @@ def main():
     uploaded_file = st.file_uploader("Upload PDF File", type="pdf")
 
     if uploaded_file is not None:
-        reader = PdfReader(uploaded_file)
-        txt = ""
-        for page in reader.pages:
-            txt += page.extract_text() + "\n"
+        file_hash = file_sha256(uploaded_file)
+        pages = load_pdf_pages(file_hash, uploaded_file)
+        
+        st.write(f"Text extracted from PDF ({len(pages)} pages).")
+        st.caption(f"Ingestion: {pages.stats.summary()}")
+        
+        chunked = st.checkbox(
+            "Chunked extraction (recommended for large filings)",
+            value=len(pages) > CHUNKED_PAGE_THRESHOLD,
+        )
+        
+        # Jobs (and therefore results) are cached per session, file and mode
+        jobs = st.session_state.setdefault("extraction_jobs", {})
+        job_key = (file_hash, chunked)
+        job = jobs.get(job_key)
         
-        st.write("Text extracted from PDF.")
+        if job is None:
+            if st.button("Extract financial information", type="primary"):
+                jobs[job_key] = start_extraction_job(pages, chunked)
+                st.rerun()
+            return
         
-        prompt = f"Here is the financial statement of General Motors:\n\n{txt}"
+        if not job.future.done():
+            st.info(f"⏳ {job.stage} ({job.elapsed:.0f}s elapsed)")
+            time.sleep(POLL_INTERVAL_SECONDS)
+            st.rerun()
         
-        with st.spinner("Extracting financial information..."):
-            try:
-                CompanyData_ = CompanyData_team.run(prompt)
-                st.json(CompanyData_.content.model_dump_json(indent=2))
-            except Exception as e:
-                st.error(f"Error extracting data: {str(e)}")
+        try:
+            company_data = job.future.result()
+            st.caption(f"Extracted in {job.elapsed:.1f}s. Prompt cache: {job.cache_stats.summary()}")
+            st.json(company_data.model_dump_json(indent=2))
+        except Exception as e:
+            st.error(f"Error extracting data: {str(e)}")
+            if st.button("Retry extraction"):
+                del jobs[job_key]
+                st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Pydantic schemas for the company data extracted from financial statements.
+
+Kept separate from the agents so that local tooling (the table parser, the
+benchmark suite) can use them without a model client.
+"""
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class CompanyInfo(BaseModel):
+    name: str = Field(..., description="Company's legal name")
+    industry: str = Field(..., description="Primary industry")
+    sectors: List[str] = Field(..., description="List of business sectors")
+    year_founded: int = Field(..., description="Year the company was founded")
+    employees: int = Field(..., description="Number of employees as of the latest year")
+    website: str = Field(..., description="Company website")
+    ein: str = Field(..., description="Employer Identification Number (EIN) for tax purposes")
+
+class YearlyFinancialData(BaseModel):
+    year: str = Field(..., description="Year as string e.g. '2023'")
+    revenue: int = Field(..., description="Total net sales and revenue in millions")
+    cogs: int = Field(..., description="Cost of sales in millions")
+    operating_expenses: int = Field(..., description="Selling, general and administrative expenses in millions")
+    ebitda: int = Field(..., description="EBITDA in millions (operating income + depreciation and amortization)")
+
+class FinancialMetrics(BaseModel):
+    yearly_data: List[YearlyFinancialData] = Field(..., description="List of financial data for the last 3 years")
+
+class Debt(BaseModel):
+    long_term: int = Field(..., description="Long-term debt and finance lease obligations in millions")
+    short_term: int = Field(..., description="Short-term debt and current portion of long-term debt in millions")
+
+class YearlyBalanceSheet(BaseModel):
+    year: str = Field(..., description="Year as string e.g. '2023'")
+    total_assets: int = Field(..., description="Total assets in millions")
+    total_liabilities: int = Field(..., description="Total liabilities in millions")
+    equity: int = Field(..., description="Total equity attributable to stockholders in millions")
+    debt: Debt
+    cash: int = Field(..., description="Cash and cash equivalents in millions")
+
+class BalanceSheet(BaseModel):
+    yearly_data: List[YearlyBalanceSheet] = Field(..., description="List of balance sheet data for the last 3 years where available")
+
+class YearlyKPIs(BaseModel):
+    year: str = Field(..., description="Year as string e.g. '2023'")
+    gross_margin: float = Field(..., description="Gross margin percentage")
+    operating_margin: float = Field(..., description="Operating margin percentage")
+    debt_to_equity: float = Field(..., description="Debt to equity ratio")
+    current_ratio: float = Field(..., description="Current ratio")
+    revenue_growth: float = Field(..., description="Revenue growth percentage from previous year; 0 for the earliest year")
+    market_share: float = Field(..., description="Market share percentage if available; otherwise 0.0")
+
+class KPIs(BaseModel):
+    yearly_data: List[YearlyKPIs] = Field(..., description="List of KPIs for the last 3 years")
+
+class ValuationRange(BaseModel):
+    low: int = Field(..., description="Low estimate of company valuation in millions")
+    high: int = Field(..., description="High estimate of company valuation in millions")
+
+class Valuation(BaseModel):
+    enterprise_value: int = Field(..., description="Enterprise value in millions")
+    ev_ebitda_multiple: float = Field(..., description="EV/EBITDA multiple")
+    valuation_range: ValuationRange
+
+class IndustryBenchmarks(BaseModel):
+    avg_gross_margin: float = Field(..., description="Average gross margin percentage for the industry")
+    avg_operating_margin: float = Field(..., description="Average operating margin percentage for the industry")
+    avg_debt_to_equity: float = Field(..., description="Average debt to equity ratio for the industry")
+    avg_revenue_growth: float = Field(..., description="Average revenue growth percentage for the industry")
+
+class RiskFactors(BaseModel):
+    high_customer_concentration: bool = Field(..., description="True if high customer concentration risk")
+    geographic_concentration: bool = Field(..., description="True if geographic concentration risk")
+    supply_chain_dependency: bool = Field(..., description="True if supply chain dependency risk")
+    debt_level: str = Field(..., description="Debt level: 'low', 'medium', or 'high'")
+    market_cyclicality: str = Field(..., description="Market cyclicality: 'low', 'medium', or 'high'")
+
+class CompanyData(BaseModel):
+    company_info: CompanyInfo
+    financial_metrics: FinancialMetrics
+    balance_sheet: BalanceSheet
+    kpis: KPIs
+    valuation: Valuation
+    industry_benchmarks: IndustryBenchmarks
+    risk_factors: RiskFactors
@@ -0,0 +1,149 @@
+"""
+Local industry benchmark store.
+
+Industry averages depend only on the industry, not on the uploaded document, so they
+are read from a CSV/JSON table we supply instead of asking a model on every extraction.
+Lookups are memoized, the table is reloaded on a schedule when the file changes, and
+an optional fallback (e.g. the IndustryBenchmarksAgent) is only called for industries
+the table does not know. Fallback answers are memoized too, and concurrent misses for
+the same industry share a single fallback call.
+"""
+import csv
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+BENCHMARK_FIELDS = ["avg_gross_margin", "avg_operating_margin", "avg_debt_to_equity", "avg_revenue_growth"]
+
+
+def normalize_industry(name: str) -> str:
+    """'Automotive ', 'AUTOMOTIVE' and 'automotive.' all normalize to 'automotive'"""
+    return re.sub(r"[^a-z0-9]+", " ", str(name).lower()).strip()
+
+
+def load_benchmarks(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Load a benchmark table keyed by normalized industry name.
+
+    CSV: one row per industry with columns `industry`, optional `aliases`
+         (';'-separated) and the BENCHMARK_FIELDS.
+    JSON: a list of objects with the same keys (aliases as a list or ';'-separated).
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    table = {}
+    for row in rows:
+        values = {name: float(row[name]) for name in BENCHMARK_FIELDS}
+        aliases = row.get("aliases") or []
+        if isinstance(aliases, str):
+            aliases = aliases.split(";")
+        for name in [row["industry"], *aliases]:
+            if normalize_industry(name):
+                table[normalize_industry(name)] = values
+    return table
+
+
+class BenchmarkStore:
+    """
+    Memoized industry -> benchmark values lookup.
+
+    Args:
+        path: CSV or JSON benchmark table
+        refresh_interval: Seconds between checks of the file for changes; fallback
+                          answers also expire after this long
+        fallback: Called with the industry name for industries not in the table;
+                  returns a dict of BENCHMARK_FIELDS, or None if it has no answer
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 24 * 3600,
+                 fallback: Optional[Callable[[str], Dict[str, float]]] = None):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.fallback = fallback
+        self.hits = 0
+        self.fallback_calls = 0
+        self._table: Dict[str, Dict[str, float]] = {}
+        self._fallback_cache: Dict[str, tuple] = {}
+        self._pending: Dict[str, Future] = {}  # fallback calls in progress, by normalized industry
+        self._loaded_at = 0.0
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _refresh_if_due(self):
+        now = time.time()
+        if self._mtime is not None and now - self._loaded_at < self.refresh_interval:
+            return
+        self._loaded_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._table = load_benchmarks(self.path)
+            self._mtime = mtime
+
+    def lookup(self, industry: str) -> Optional[Dict[str, float]]:
+        """Benchmark values from the table or the fallback cache, without calling the fallback"""
+        key = normalize_industry(industry)
+        with self._lock:
+            self._refresh_if_due()
+            if key in self._table:
+                return self._table[key]
+            # "Automotive manufacturing" -> "automotive": longest table key contained as whole words
+            padded = f" {key} "
+            for name in sorted(self._table, key=len, reverse=True):
+                if f" {name} " in padded:
+                    return self._table[name]
+            return self._cached_fallback(key)
+
+    def _cached_fallback(self, key: str) -> Optional[Dict[str, float]]:
+        cached = self._fallback_cache.get(key)
+        if cached and time.time() - cached[0] < self.refresh_interval:
+            return cached[1]
+        return None
+
+    def get(self, industry: str) -> Optional[Dict[str, float]]:
+        """Benchmark values for an industry, calling the fallback only on a miss"""
+        values = self.lookup(industry)
+        if values is not None:
+            self.hits += 1
+            return values
+        if self.fallback is None:
+            return None
+
+        # Single flight: the first miss calls the fallback, concurrent misses wait for its answer
+        key = normalize_industry(industry)
+        with self._lock:
+            values = self._cached_fallback(key)
+            if values is not None:
+                return values
+            pending = self._pending.get(key)
+            calling = pending is None
+            if calling:
+                pending = self._pending[key] = Future()
+                self.fallback_calls += 1
+        if not calling:
+            return pending.result()
+
+        try:
+            values = self.fallback(industry)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            if values is not None:  # no answer is not memoized, so the next miss asks again
+                self._fallback_cache[key] = (time.time(), values)
+            del self._pending[key]
+        pending.set_result(values)
+        return values
@@ -0,0 +1,158 @@
+"""
+Memory-bounded streaming ingestion for very large PDFs.
+
+Pages are extracted one at a time and their text is spilled to a temporary file
+that is memory-mapped for reading. Only one page of text is held in Python memory
+during ingestion; afterwards page text is read back from the (OS-managed,
+reclaimable) mapping on demand, so agents can be fed from an iterator instead of
+one giant string.
+"""
+import mmap
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from pypdf import PdfReader
+
+
+# pypdf caches every object it resolves; dropping the cache every N pages keeps
+# the reader's own footprint bounded on very large documents
+RESOLVED_OBJECT_FLUSH_INTERVAL = 25
+
+
+@dataclass
+class IngestionStats:
+    """What an ingestion cost"""
+    pages: int = 0
+    text_bytes: int = 0
+    largest_page_bytes: int = 0
+    seconds: float = 0.0
+    peak_traced_bytes: Optional[int] = None  # only when measured with tracemalloc
+
+    def summary(self) -> str:
+        text = (f"{self.pages} pages, {self.text_bytes / 1e6:.1f} MB text spilled to disk, "
+                f"largest page {self.largest_page_bytes / 1e3:.0f} KB, {self.seconds:.1f}s")
+        if self.peak_traced_bytes is not None:
+            text += f", peak Python memory {self.peak_traced_bytes / 1e6:.1f} MB"
+        return text
+
+
+class PageStore:
+    """
+    Append-only store of page texts backed by a memory-mapped temporary file.
+
+    Behaves like a read-only sequence of strings: `len(store)`, `store[i]`,
+    `store[a:b]` and iteration all decode pages lazily from the mapping.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets: List[Tuple[int, int]] = []
+        self._size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self.stats = IngestionStats()
+
+    def append(self, text: str):
+        if self._mmap is not None:
+            raise RuntimeError("PageStore is sealed; no more pages can be appended")
+        data = (text or "").encode("utf-8")
+        self._file.write(data)
+        self._offsets.append((self._size, len(data)))
+        self._size += len(data)
+        self.stats.pages += 1
+        self.stats.text_bytes += len(data)
+        self.stats.largest_page_bytes = max(self.stats.largest_page_bytes, len(data))
+
+    def seal(self):
+        """Finish writing and map the file for reading"""
+        self._file.flush()
+        if self._size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, index: int) -> str:
+        offset, length = self._offsets[index]
+        if self._mmap is None:
+            return ""
+        return self._mmap[offset:offset + length].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._read(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+        return self._read(index)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self._read(index)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def iter_pdf_pages(source: Union[str, BinaryIO], max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yield page texts one at a time without keeping earlier pages around"""
+    reader = PdfReader(source)
+    for index, page in enumerate(reader.pages):
+        if max_pages is not None and index >= max_pages:
+            break
+        yield page.extract_text() or ""
+        if (index + 1) % RESOLVED_OBJECT_FLUSH_INTERVAL == 0 and hasattr(reader, "resolved_objects"):
+            reader.resolved_objects.clear()
+
+
+def ingest_pdf(source: Union[str, BinaryIO], max_pages: Optional[int] = None,
+               measure_memory: bool = False) -> PageStore:
+    """
+    Stream a PDF into a PageStore.
+
+    Args:
+        source: Path or binary file object of the PDF
+        max_pages: Stop after this many pages (caps disk use and extraction cost)
+        measure_memory: Record peak Python allocations with tracemalloc. tracemalloc is
+                        process-wide and slows allocation, so use it for diagnostics only.
+    """
+    started_tracing = measure_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif measure_memory:
+        tracemalloc.reset_peak()
+
+    store = PageStore()
+    start = time.perf_counter()
+    try:
+        for text in iter_pdf_pages(source, max_pages):
+            store.append(text)
+        store.seal()
+    except Exception:
+        store.close()
+        raise
+    finally:
+        store.stats.seconds = time.perf_counter() - start
+        if measure_memory:
+            store.stats.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+    return store
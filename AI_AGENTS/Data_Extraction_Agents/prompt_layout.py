@@ -0,0 +1,67 @@
+"""
+Prompt layout for provider-side prompt caching.
+
+Azure OpenAI caches prompt prefixes (1024 tokens and up, exact match). All extraction
+agents read the same long filing text, so every prompt is laid out as:
+
+    [shared preamble][document]                  identical for every agent -> cacheable
+    [agent-specific context][task + JSON schema]  different per agent
+
+The agents are created without a system message (create_default_system_message=False):
+agno would otherwise put each agent's own instructions and JSON schema in front of the
+document, so no two agents would ever share a prefix.
+"""
+import json
+import textwrap
+from dataclasses import dataclass
+
+PREAMBLE = ("You are a financial analyst extracting structured data from company financial statements. "
+            "Read the document below, then complete the task that follows it.\n\n")
+
+
+def task_suffix(agent) -> str:
+    """Agent-specific instructions and output schema, placed after the document"""
+    schema = json.dumps(agent.response_model.model_json_schema(), separators=(",", ":"))
+    description = getattr(agent, "description", None) or ""
+    instructions = textwrap.dedent(getattr(agent, "instructions", None) or "").strip()
+    return (f"=== TASK: {description} ===\n{instructions}\n\n"
+            f"Respond with a single JSON object matching this JSON schema:\n{schema}")
+
+
+def layout_prompt(document: str, agent, context: str = "") -> str:
+    """Shared document prefix first, then agent-specific context and task"""
+    parts = [PREAMBLE + document]
+    if context:
+        parts.append(context)
+    parts.append(task_suffix(agent))
+    return "\n\n".join(parts)
+
+
+def _total(metrics, name: str) -> int:
+    value = metrics.get(name) if isinstance(metrics, dict) else getattr(metrics, name, None)
+    if isinstance(value, list):
+        return sum(v or 0 for v in value)
+    return value or 0
+
+
+@dataclass
+class PromptCacheStats:
+    """Prompt and cached-token counts reported by the API over one extraction run"""
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+
+    def record(self, response):
+        """Add the usage of one agent response (agno RunResponse.metrics)"""
+        metrics = getattr(response, "metrics", None) or {}
+        self.calls += 1
+        self.input_tokens += _total(metrics, "input_tokens")
+        self.cached_tokens += _total(metrics, "cached_tokens")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.calls} calls, {self.input_tokens:,} prompt tokens, "
+                f"{self.cached_tokens:,} cached ({self.hit_rate:.0%})")
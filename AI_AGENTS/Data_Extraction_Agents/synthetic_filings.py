@@ -0,0 +1,182 @@
+"""
+Synthetic 10-K-style filings with known ground truth, for benchmarking extraction.
+
+Generates a PDF of configurable size: a cover page with the company profile, filler
+narrative pages, a risk factor section, and consolidated income statement and balance
+sheet tables whose figures are recorded as ground truth. The PDF is written with a
+minimal built-in writer (Helvetica text only), so no PDF library is needed.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+LINES_PER_PAGE = 55
+
+_FILLER = [
+    "The Company designs, builds and sells vehicles and vehicle parts and provides software-enabled services.",
+    "Management's discussion and analysis should be read together with the consolidated financial statements.",
+    "Results of operations may vary from period to period due to seasonality, pricing and mix.",
+    "We continue to invest in manufacturing capacity, engineering and product development programs.",
+    "Dealer inventory levels, incentives and fleet sales affect the timing of revenue recognition.",
+    "Foreign currency exchange rates and commodity prices affect our cost structure and margins.",
+    "Our automotive financing operations provide retail loans and leases to customers and dealers.",
+    "Forward-looking statements involve risks and uncertainties that could cause actual results to differ.",
+]
+
+_RISKS = [
+    "Item 1A. Risk Factors",
+    "Our business is highly cyclical and depends on general economic conditions.",
+    "We rely on a limited number of suppliers for certain semiconductors; supply chain disruption could harm us.",
+    "A significant portion of our sales are concentrated in North America (geographic concentration).",
+    "Our indebtedness and the indebtedness of our financing subsidiary could limit our flexibility.",
+]
+
+
+@dataclass
+class SyntheticFiling:
+    """A generated filing: page texts plus the figures a perfect extraction would return"""
+    company_name: str
+    pages: List[List[str]]
+    financials: Dict[str, Dict[str, int]] = field(default_factory=dict)  # year -> YearlyFinancialData fields
+    balance_sheets: Dict[str, Dict[str, int]] = field(default_factory=dict)  # year -> YearlyBalanceSheet fields
+
+    def page_texts(self) -> List[str]:
+        return ["\n".join(lines) for lines in self.pages]
+
+
+def _fmt(value: int) -> str:
+    return f"({abs(value):,})" if value < 0 else f"{value:,}"
+
+
+def generate_filing(num_pages: int = 100, years=("2021", "2022", "2023"), seed: int = 0,
+                    company_name: str = "Synthetic Motors Company") -> SyntheticFiling:
+    """
+    Build a synthetic filing of `num_pages` pages (minimum 4).
+
+    The statements are placed about 60% of the way into the document, as in a real 10-K.
+    """
+    rng = random.Random(seed)
+    num_pages = max(num_pages, 4)
+    years = list(years)
+    columns = list(reversed(years))  # statements list the latest year first
+
+    filing = SyntheticFiling(company_name=company_name, pages=[])
+    revenue = rng.randint(90_000, 130_000)
+    for year in years:
+        revenue = int(revenue * rng.uniform(1.03, 1.15))
+        cogs = int(revenue * rng.uniform(0.78, 0.86))
+        sga = int(revenue * rng.uniform(0.05, 0.08))
+        depreciation = int(revenue * rng.uniform(0.06, 0.08))
+        operating_income = revenue - cogs - sga
+        filing.financials[year] = {
+            "revenue": revenue, "cogs": cogs, "operating_expenses": sga,
+            "operating_income": operating_income, "depreciation": depreciation,
+            "ebitda": operating_income + depreciation,
+        }
+        total_assets = int(revenue * rng.uniform(1.5, 1.8))
+        total_liabilities = int(total_assets * rng.uniform(0.7, 0.78))
+        filing.balance_sheets[year] = {
+            "total_assets": total_assets, "total_liabilities": total_liabilities,
+            "equity": total_assets - total_liabilities,
+            "cash": int(total_assets * rng.uniform(0.06, 0.09)),
+            "short_term": int(total_liabilities * rng.uniform(0.15, 0.2)),
+            "long_term": int(total_liabilities * rng.uniform(0.3, 0.4)),
+            "current_assets": int(total_assets * rng.uniform(0.35, 0.4)),
+            "current_liabilities": int(total_liabilities * rng.uniform(0.45, 0.5)),
+        }
+
+    cover = [
+        "UNITED STATES SECURITIES AND EXCHANGE COMMISSION",
+        "FORM 10-K",
+        f"{company_name}",
+        "(Exact name of registrant as specified in its charter)",
+        "Delaware 27-0756180 (I.R.S. Employer Identification No.)",
+        "Industry: Automotive",
+        "Website: www.synthetic-motors.example",
+        "Founded in 1908. As of December 31, 2023 we employed approximately 163,000 employees.",
+    ]
+    income = [
+        "CONSOLIDATED INCOME STATEMENTS",
+        "(In millions) Years Ended December 31, " + " ".join(columns),
+        "Total net sales and revenue " + " ".join(f"$ {_fmt(filing.financials[y]['revenue'])}" for y in columns),
+        "Total cost of sales " + " ".join(_fmt(filing.financials[y]["cogs"]) for y in columns),
+        "Selling, general and administrative expense " + " ".join(
+            _fmt(filing.financials[y]["operating_expenses"]) for y in columns),
+        "Operating income (loss) " + " ".join(_fmt(filing.financials[y]["operating_income"]) for y in columns),
+        "Depreciation and amortization " + " ".join(_fmt(filing.financials[y]["depreciation"]) for y in columns),
+    ]
+    sheet_columns = columns[:2]  # balance sheets show two year-ends
+    balance = [
+        "CONSOLIDATED BALANCE SHEETS",
+        "(In millions) " + " ".join(f"December 31, {y}" for y in sheet_columns),
+    ]
+    for label, key in [("Cash and cash equivalents", "cash"), ("Total current assets", "current_assets"),
+                       ("Total assets", "total_assets"), ("Total current liabilities", "current_liabilities"),
+                       ("Short-term debt and current portion of long-term debt", "short_term"),
+                       ("Long-term debt", "long_term"), ("Total liabilities", "total_liabilities"),
+                       ("Total stockholders' equity", "equity")]:
+        balance.append(f"{label} " + " ".join(_fmt(filing.balance_sheets[y][key]) for y in sheet_columns))
+    # Only the years actually shown in the document are ground truth
+    filing.balance_sheets = {y: filing.balance_sheets[y] for y in sheet_columns}
+
+    statements_page = max(2, int(num_pages * 0.6))
+    for index in range(num_pages):
+        if index == 0:
+            lines = cover
+        elif index == 1:
+            lines = _RISKS
+        elif index == statements_page:
+            lines = income
+        elif index == statements_page + 1:
+            lines = balance
+        else:
+            lines = [rng.choice(_FILLER) for _ in range(LINES_PER_PAGE)]
+        filing.pages.append(lines)
+    return filing
+
+
+# ============================================================================
+# Minimal PDF writer
+# ============================================================================
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(pages: List[List[str]], path: str):
+    """Write pages of text lines to a PDF using the standard Helvetica font"""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for lines in pages:
+        text = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        stream = text.encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, catalog, xref))
@@ -0,0 +1,177 @@
+"""
+Local parser for financial statement tables.
+
+Finds well-known statement rows (e.g. "Total net sales and revenue", "Total assets")
+and their per-year values with regex/layout heuristics, and emits a compact candidate
+table. The extraction agents verify these candidates instead of searching the whole
+noisy OCR text for numbers.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Canonical field -> row label patterns, most specific first. A label only matches
+# when it is directly followed by numbers, so "Total liabilities and equity" does
+# not match "total liabilities".
+ROW_PATTERNS: Dict[str, List[str]] = {
+    # Income statement
+    "revenue": [r"total net sales and revenues?", r"total revenues?", r"total net revenues?", r"net sales"],
+    "cogs": [r"total cost of sales", r"cost of sales", r"cost of goods sold", r"cost of revenues?"],
+    "operating_expenses": [r"selling,? general and administrative expenses?"],
+    "operating_income": [r"operating income(?: \(loss\))?", r"income from operations"],
+    "depreciation_amortization": [r"depreciation,? amortization and impairment[\w ,]*", r"depreciation and amortization"],
+    # Balance sheet
+    "cash": [r"cash and cash equivalents"],
+    "current_assets": [r"total current assets"],
+    "total_assets": [r"total assets"],
+    "current_liabilities": [r"total current liabilities"],
+    "total_liabilities": [r"total liabilities"],
+    "short_term_debt": [r"short-term debt and current portion of long-term debt", r"short-term (?:debt|borrowings)"],
+    "long_term_debt": [r"long-term debt(?: and finance lease obligations)?"],
+    "equity": [r"total (?:[\w ]+ )?stockholders['’]? equity", r"total equity attributable to stockholders",
+               r"total (?:shareholders['’]?|stockholders['’]?) equity"],
+}
+
+FINANCIAL_FIELDS = ["revenue", "cogs", "operating_expenses", "operating_income", "depreciation_amortization", "ebitda"]
+BALANCE_FIELDS = ["total_assets", "total_liabilities", "equity", "cash", "short_term_debt", "long_term_debt",
+                  "current_assets", "current_liabilities"]
+
+_COMPILED = {
+    name: [re.compile(r"^\W*(" + p + r")[\s.:$\-–—]*(?=[($\-\d])", re.IGNORECASE) for p in patterns]
+    for name, patterns in ROW_PATTERNS.items()
+}
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_NUMBER = re.compile(r"\(?-?\$?\s?\d{1,3}(?:,\d{3})+(?:\.\d+)?\)?|\(?-?\$?\s?\d+(?:\.\d+)?\)?")
+
+
+def _parse_number(token: str) -> Optional[int]:
+    negative = token.startswith("(") or "-" in token
+    digits = re.sub(r"[^\d.]", "", token)
+    if not digits or digits == ".":
+        return None
+    value = int(round(float(digits)))
+    return -value if negative else value
+
+
+def _year_header(line: str) -> Optional[List[str]]:
+    """Return the years of a column header line like 'Years Ended December 31, 2023 2022 2021'"""
+    years = _YEAR.findall(line)
+    if len(years) >= 2 and len(set(years)) == len(years):
+        residue = _YEAR.sub("", line)
+        if len(re.findall(r"\d", residue)) <= 4:
+            return years
+    return None
+
+
+@dataclass
+class CandidateFigure:
+    """All values seen for one (field, year), with where the first one came from"""
+    values: Counter = field(default_factory=Counter)
+    label: str = ""
+    page: int = 0
+
+    @property
+    def best(self) -> int:
+        return self.values.most_common(1)[0][0]
+
+
+@dataclass
+class CandidateTable:
+    """Candidate figures keyed by canonical field name, then year"""
+    figures: Dict[str, Dict[str, CandidateFigure]] = field(default_factory=dict)
+
+    def add(self, name: str, year: str, value: int, label: str, page: int):
+        figure = self.figures.setdefault(name, {}).setdefault(year, CandidateFigure(label=label, page=page))
+        figure.values[value] += 1
+
+    def value(self, name: str, year: str) -> Optional[int]:
+        figure = self.figures.get(name, {}).get(year)
+        return figure.best if figure else None
+
+    def years(self, fields: Iterable[str]) -> List[str]:
+        return sorted({year for name in fields for year in self.figures.get(name, {})})
+
+    def covers(self, fields: Iterable[str]) -> bool:
+        """True when every field has a candidate for at least one year"""
+        return all(self.figures.get(name) for name in fields)
+
+    def derive_ebitda(self):
+        """EBITDA = operating income + depreciation and amortization, where both were found"""
+        for year in self.years(["operating_income"]):
+            operating_income = self.value("operating_income", year)
+            depreciation = self.value("depreciation_amortization", year)
+            if operating_income is not None and depreciation is not None:
+                self.add("ebitda", year, operating_income + abs(depreciation), "derived", 0)
+
+    def to_prompt(self, fields: Iterable[str]) -> str:
+        """Compact pipe-separated table of the requested fields, for agent prompts"""
+        fields = [name for name in fields if self.figures.get(name)]
+        if not fields:
+            return ""
+        years = self.years(fields)
+        lines = [
+            "CANDIDATE FIGURES (pre-extracted from statement tables, in the document's units; verify before use)",
+            "field | " + " | ".join(years) + " | source",
+        ]
+        for name in fields:
+            cells = []
+            for year in years:
+                figure = self.figures[name].get(year)
+                if figure is None:
+                    cells.append("-")
+                elif len(figure.values) > 1:
+                    cells.append("/".join(str(v) for v, _ in figure.values.most_common(3)) + "?")
+                else:
+                    cells.append(str(figure.best))
+            first = next(iter(self.figures[name].values()))
+            source = "derived" if first.page == 0 else f'p.{first.page} "{first.label}"'
+            lines.append(f"{name} | " + " | ".join(cells) + f" | {source}")
+        return "\n".join(lines)
+
+    def source_pages(self, fields: Iterable[str]) -> List[int]:
+        """1-indexed pages the candidates for `fields` were read from"""
+        return sorted({figure.page for name in fields for figure in self.figures.get(name, {}).values()
+                       if figure.page})
+
+
+def parse_page(table: CandidateTable, text: str, page_number: int):
+    """Add the candidate rows found on one page to `table`"""
+    years: Optional[List[str]] = None
+    for line in text.splitlines():
+        header = _year_header(line)
+        if header:
+            years = header
+            continue
+        if not years:
+            continue
+        for name, patterns in _COMPILED.items():
+            match = next((m for m in (p.match(line) for p in patterns) if m), None)
+            if not match:
+                continue
+            numbers = [_parse_number(t) for t in _NUMBER.findall(line[match.end():])]
+            numbers = [n for n in numbers if n is not None]
+            if len(numbers) >= len(years):
+                for year, value in zip(years, numbers[:len(years)]):
+                    table.add(name, year, value, match.group(1).strip(), page_number)
+            break
+
+
+def parse_pages(pages: Iterable[str]) -> CandidateTable:
+    """Build a candidate table from page texts"""
+    table = CandidateTable()
+    for page_number, text in enumerate(pages, 1):
+        parse_page(table, text or "", page_number)
+    table.derive_ebitda()
+    return table
+
+
+def snippet(pages: Sequence[str], page_numbers: Iterable[int], context: int = 0) -> Tuple[str, List[int]]:
+    """
+    Text of the given pages (plus `context` neighbouring pages), for agents to
+    verify candidates against. Returns the text and the pages included.
+    """
+    included = sorted({p + offset for p in page_numbers for offset in range(-context, context + 1)
+                       if 1 <= p + offset <= len(pages)})
+    return "\n".join(f"[page {p}]\n{pages[p - 1]}" for p in included), included
@@ -0,0 +1,77 @@
+"""
+Targeted retry of the sub-model that failed validation.
+
+A CompanyData result is made of independent sections (CompanyInfo, BalanceSheet, ...),
+each produced by its own agent. When one section fails Pydantic validation (e.g.
+`year_founded` returned as "about 1908"), only that agent is re-run, with the
+validation error fed back to it, and all other sections are kept.
+"""
+import json
+import re
+from typing import Callable, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+MAX_RETRIES = 2
+
+
+def _as_data(content):
+    """Best-effort conversion of a model response (model, dict or JSON-ish text) to plain data"""
+    if isinstance(content, BaseModel):
+        return content.model_dump()
+    if isinstance(content, str):
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if not match:
+            return None
+        try:
+            return json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return content
+
+
+def coerce(model: Type[BaseModel], content) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """Validate `content` as `model`; returns (instance, None) or (None, error text)"""
+    if isinstance(content, model):
+        return content, None
+    data = _as_data(content)
+    if data is None:
+        return None, f"Response was not valid JSON for {model.__name__}: {str(content)[:200]!r}"
+    try:
+        return model.model_validate(data), None
+    except ValidationError as e:
+        return None, str(e)
+
+
+def feedback_prompt(prompt: str, model: Type[BaseModel], error: str) -> str:
+    """The original prompt plus the validation error of the previous attempt"""
+    return (f"{prompt}\n\nYour previous {model.__name__} response failed validation:\n{error}\n\n"
+            f"Return a corrected {model.__name__} that matches the schema exactly "
+            f"(numbers as numbers, no units or text in numeric fields).")
+
+
+async def run_with_retry(agent, prompt: str, max_retries: int = MAX_RETRIES, error: Optional[str] = None,
+                         on_response: Optional[Callable[[object], None]] = None
+                         ) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """
+    Run an agent and validate its response against `agent.response_model`, retrying
+    with the validation error fed back. Pass `error` to start with feedback from a
+    failure that happened elsewhere. The feedback is appended after the original
+    prompt, so retries still share its cached prefix. `on_response` is called with
+    every raw response (e.g. to record token usage).
+
+    Returns:
+        (instance, None) on success, (None, last error) when all attempts failed
+    """
+    model = agent.response_model
+    attempts = max_retries + 1 if error is None else max_retries
+    for _ in range(attempts):
+        attempt_prompt = feedback_prompt(prompt, model, error) if error else prompt
+        response = await agent.arun(attempt_prompt)
+        if on_response is not None:
+            on_response(response)
+        instance, error = coerce(model, getattr(response, "content", None))
+        if instance is not None:
+            return instance, None
+    return None, error
+
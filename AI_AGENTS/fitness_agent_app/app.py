@@ -1,17 +1,46 @@
 import streamlit as st
 import os
+import sys
 import asyncio
 from dotenv import load_dotenv
-from typing import List, Union
-from pydantic import BaseModel
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, List, Optional, Union
 from openai import AsyncOpenAI
 from agents import Agent, Runner, function_tool, OpenAIChatCompletionsModel
+from phase_graph import PhaseEvent, PhaseGraph
+from fitness_models import (ComprehensiveReport, DietPlan, DietPlanOutline, ExerciseDay, ExercisePlan,
+                            ExercisePlanOutline, MealDay)
+from day_planner import DayByDayPlanner
+from meal_optimizer import MealOptimizer, macro_target_vector
+from plan_cache import PERSONALIZERS, PlanTemplateCache, personalize
+from plan_store import PlanStore
+from phase_context import (DIET_PROFILE, EXERCISE_PROFILE, FITNESS_CALCULATOR_PROFILE, NUTRITION_CALCULATOR_PROFILE,
+                           SYNTHESIS_PROFILE, PromptTokens, compact_metrics, metrics_from_run, profile_context)
+import fitness_calculators as calculators
+from fitness_calculators import FitnessMetrics, NutritionMetrics, compute_fitness_metrics, compute_nutrition_metrics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import get_background_loop
 load_dotenv(override=True)
 groq_api_key = os.getenv('GROQ_API_KEY')
 print(f"Using GROQ API Key: {groq_api_key}")
 GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-groq_client = AsyncOpenAI(base_url=GROQ_BASE_URL, api_key=groq_api_key)
-llm = OpenAIChatCompletionsModel(model="meta-llama/llama-4-scout-17b-16e-instruct", openai_client=groq_client)
+
+@st.cache_resource
+def get_llm() -> OpenAIChatCompletionsModel:
+    """
+    One client per server process: its HTTP connection pool stays warm across reruns
+    because every run executes on the same background event loop.
+    """
+    groq_client = AsyncOpenAI(base_url=GROQ_BASE_URL, api_key=groq_api_key)
+    return OpenAIChatCompletionsModel(model="meta-llama/llama-4-scout-17b-16e-instruct", openai_client=groq_client)
+
+llm = get_llm()
+PLAN_TEMPLATE_CACHE_PATH = os.getenv(
+    'PLAN_TEMPLATE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_templates.sqlite3")
+)
+PLAN_STORE_PATH = os.getenv(
+    'PLAN_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans.sqlite3")
+)
 # google_api_key = os.getenv('GOOGLE_API_KEY')
 # # GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 # GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
@@ -28,234 +57,19 @@ load_dotenv(override=True)
 # STEP 1: Define structured outputs using Pydantic models
 # ============================================================================
 
-class ExerciseDay(BaseModel):
-    """Single day exercise routine"""
-    day: str
-    focus: str
-    exercises: List[str]
-    sets_reps: List[str]
-    duration: str
-    notes: str
-
-class ExercisePlan(BaseModel):
-    """Complete weekly exercise plan"""
-    user_name: str
-    fitness_goal: str
-    weekly_schedule: List[ExerciseDay]
-    warm_up_routine: str
-    cool_down_routine: str
-    progressive_overload_strategy: str
-    safety_precautions: List[str]
-
-class MealDay(BaseModel):
-    """Single day meal plan"""
-    day: str
-    breakfast: str
-    mid_morning_snack: str
-    lunch: str
-    evening_snack: str
-    dinner: str
-    total_calories: str
-    protein_grams: str
-    carbs_grams: str
-    fats_grams: str
-
-class DietPlan(BaseModel):
-    """Complete weekly diet plan"""
-    user_name: str
-    diet_preference: str
-    daily_calorie_target: str
-    macronutrient_split: str
-    weekly_meals: List[MealDay]
-    meal_timing_guidelines: str
-    hydration_recommendations: str
-    supplement_suggestions: List[str]
-
-class ComprehensiveReport(BaseModel):
-    """Final integrated fitness report"""
-    executive_summary: str
-    user_profile_analysis: str
-    exercise_plan_overview: str
-    diet_plan_overview: str
-    integration_strategy: str
-    progress_tracking_methods: List[str]
-    weekly_milestones: List[str]
-    success_tips: List[str]
-    safety_reminders: List[str]
-    confidence_score: float
+# ExercisePlan, DietPlan and ComprehensiveReport (with ExerciseDay / MealDay) are defined
+# in fitness_models.py, so the plan template cache can use them without importing the app.
 
 # ============================================================================
 # STEP 2: Define fitness tools (knowledge-based functions)
 # ============================================================================
 
-@function_tool
-def calculate_bmi(weight_kg: Union[str, float], height_cm: Union[str, float]) -> dict:
-    """
-    Calculate Body Mass Index (BMI)
-    
-    Args:
-        weight_kg: Weight in kilograms
-        height_cm: Height in centimeters
-    """
-    # Convert to float in case strings are passed
-    weight_kg = float(weight_kg)
-    height_cm = float(height_cm)
-    
-    height_m = height_cm / 100
-    bmi = weight_kg / (height_m ** 2)
-    
-    if bmi < 18.5:
-        category = "Underweight"
-    elif 18.5 <= bmi < 25:
-        category = "Normal weight"
-    elif 25 <= bmi < 30:
-        category = "Overweight"
-    else:
-        category = "Obese"
-    
-    return {
-        "bmi": round(bmi, 2),
-        "category": category,
-        "recommendation": f"Your BMI is {round(bmi, 2)} ({category})"
-    }
-
-@function_tool
-def calculate_tdee(weight_kg: Union[str, float], height_cm: Union[str, float], age: Union[str, int], gender: str, activity_level: str = "moderate") -> dict:
-    """
-    Calculate Total Daily Energy Expenditure (TDEE)
-    
-    Args:
-        weight_kg: Weight in kilograms
-        height_cm: Height in centimeters
-        age: Age in years
-        gender: Male or Female
-        activity_level: sedentary, light, moderate, active, very_active
-    """
-    # Convert to correct types in case strings are passed
-    weight_kg = float(weight_kg)
-    height_cm = float(height_cm)
-    age = int(age)
-    
-    # Calculate BMR using Mifflin-St Jeor Equation
-    if gender.lower() == "male":
-        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
-    else:
-        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
-    
-    # Activity multipliers
-    activity_multipliers = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very_active": 1.9
-    }
-    
-    multiplier = activity_multipliers.get(activity_level.lower(), 1.55)
-    tdee = bmr * multiplier
-    
-    return {
-        "bmr": round(bmr, 0),
-        "tdee": round(tdee, 0),
-        "maintenance_calories": round(tdee, 0),
-        "weight_loss_calories": round(tdee * 0.85, 0),
-        "muscle_gain_calories": round(tdee * 1.15, 0)
-    }
-
-@function_tool
-def get_exercise_recommendations(goal: str, fitness_level: str, body_fat: Union[str, float]) -> dict:
-    """
-    Get exercise type recommendations based on goals
-    
-    Args:
-        goal: Fitness goal (muscle gain, fat loss, general fitness)
-        fitness_level: beginner, intermediate, advanced
-        body_fat: Body fat percentage
-    """
-    # Convert to float in case string is passed
-    body_fat = float(body_fat)
-    
-    recommendations = {
-        "muscle_gain": {
-            "workout_split": "Push/Pull/Legs or Upper/Lower",
-            "frequency": "4-6 days per week",
-            "rep_range": "8-12 reps for hypertrophy",
-            "cardio": "2-3 sessions per week (low intensity)",
-            "rest": "48 hours between same muscle groups"
-        },
-        "fat_loss": {
-            "workout_split": "Full body or Upper/Lower",
-            "frequency": "4-5 days per week",
-            "rep_range": "12-15 reps with shorter rest",
-            "cardio": "4-5 sessions per week (mix HIIT and steady state)",
-            "rest": "Active recovery recommended"
-        },
-        "general_fitness": {
-            "workout_split": "Full body workouts",
-            "frequency": "3-4 days per week",
-            "rep_range": "10-15 reps",
-            "cardio": "3 sessions per week",
-            "rest": "At least 1 full rest day per week"
-        }
-    }
-    
-    goal_key = "muscle_gain" if "muscle" in goal.lower() else \
-               "fat_loss" if "fat" in goal.lower() or "loss" in goal.lower() else \
-               "general_fitness"
-    
-    return recommendations.get(goal_key, recommendations["general_fitness"])
-
-@function_tool
-def get_nutrition_recommendations(goal: str, tdee: Union[str, float], weight_kg: Union[str, float], diet_preference: str) -> dict:
-    """
-    Get nutrition recommendations based on goals
-    
-    Args:
-        goal: Fitness goal
-        tdee: Total Daily Energy Expenditure
-        weight_kg: Body weight in kg
-        diet_preference: Vegetarian or Non-Vegetarian
-    """
-    # Convert to float in case strings are passed
-    tdee = float(tdee)
-    weight_kg = float(weight_kg)
-    
-    if "muscle" in goal.lower():
-        calorie_target = tdee * 1.15
-        protein_per_kg = 2.0
-        carbs_percent = 0.40
-        fats_percent = 0.25
-    elif "fat" in goal.lower() or "loss" in goal.lower():
-        calorie_target = tdee * 0.85
-        protein_per_kg = 2.2
-        carbs_percent = 0.35
-        fats_percent = 0.30
-    else:
-        calorie_target = tdee
-        protein_per_kg = 1.6
-        carbs_percent = 0.40
-        fats_percent = 0.30
-    
-    protein_grams = weight_kg * protein_per_kg
-    protein_calories = protein_grams * 4
-    
-    remaining_calories = calorie_target - protein_calories
-    carbs_calories = remaining_calories * carbs_percent / (carbs_percent + fats_percent)
-    fats_calories = remaining_calories * fats_percent / (carbs_percent + fats_percent)
-    
-    carbs_grams = carbs_calories / 4
-    fats_grams = fats_calories / 9
-    
-    return {
-        "daily_calories": round(calorie_target, 0),
-        "protein_grams": round(protein_grams, 0),
-        "carbs_grams": round(carbs_grams, 0),
-        "fats_grams": round(fats_grams, 0),
-        "protein_percent": round((protein_calories / calorie_target) * 100, 0),
-        "carbs_percent": round((carbs_calories / calorie_target) * 100, 0),
-        "fats_percent": round((fats_calories / calorie_target) * 100, 0),
-        "diet_preference": diet_preference
-    }
+# The calculators are plain functions (fitness_calculators.py); the calculator
+# agents get them as tools, and local mode calls them directly.
+calculate_bmi = function_tool(calculators.calculate_bmi)
+calculate_tdee = function_tool(calculators.calculate_tdee)
+get_exercise_recommendations = function_tool(calculators.get_exercise_recommendations)
+get_nutrition_recommendations = function_tool(calculators.get_nutrition_recommendations)
 
 # ============================================================================
 # STEP 3: Create Specialized Agents (Two-Phase Approach)
@@ -353,6 +167,81 @@ IMPORTANT: Return your response as a properly structured JSON matching the DietP
         model=llm
     )
 
+# Phase 2 (day-by-day mode): outline agents and per-day agents, assembled locally
+def create_exercise_outline_agent(llm) -> Agent:
+    """Create an agent that outlines the weekly exercise plan without the daily routines"""
+    return Agent(
+        name="Exercise Outline Agent",
+        instructions="""You are an expert fitness trainer and exercise scientist.
+
+Your role is to outline a personalized weekly exercise plan:
+1. Use the provided calculated metrics
+2. Choose a weekly training split: one entry per day of the week with its focus (include rest days)
+3. Provide warm-up and cool-down routines
+4. Describe the progressive overload strategy
+5. Add safety precautions based on medical conditions
+
+The exercises for each day are planned separately from your split.
+
+IMPORTANT: Return your response as a properly structured JSON matching the ExercisePlanOutline schema.""",
+        output_type=ExercisePlanOutline,
+        model=llm
+    )
+
+def create_exercise_day_agent(llm) -> Agent:
+    """Create an agent that plans the routine of a single training day"""
+    return Agent(
+        name="Exercise Day Agent",
+        instructions="""You are an expert fitness trainer and exercise scientist.
+
+Your role is to plan ONE day of a weekly exercise plan, following the given split and focus:
+1. Choose specific exercises for the day's focus
+2. Give sets and reps for every exercise (one sets_reps entry per exercise)
+3. State the session duration and notes (rest periods, technique, intensity)
+4. Respect the user's medical conditions
+
+IMPORTANT: Return your response as a properly structured JSON matching the ExerciseDay schema.""",
+        output_type=ExerciseDay,
+        model=llm
+    )
+
+def create_diet_outline_agent(llm) -> Agent:
+    """Create an agent that outlines the weekly diet plan without the daily meals"""
+    return Agent(
+        name="Diet Outline Agent",
+        instructions="""You are an expert nutritionist and registered dietitian.
+
+Your role is to outline a personalized weekly nutrition plan:
+1. Use the provided calculated metrics for the daily calorie target and macronutrient split
+2. Give each day of the week a short menu theme, so the week is varied
+3. Provide meal timing guidelines to support training
+4. Include hydration and supplement recommendations
+5. Account for dietary restrictions, preferences and medical conditions
+
+The meals for each day are planned separately from your outline.
+
+IMPORTANT: Return your response as a properly structured JSON matching the DietPlanOutline schema.""",
+        output_type=DietPlanOutline,
+        model=llm
+    )
+
+def create_meal_day_agent(llm) -> Agent:
+    """Create an agent that plans the meals of a single day"""
+    return Agent(
+        name="Meal Day Agent",
+        instructions="""You are an expert nutritionist and registered dietitian.
+
+Your role is to plan the meals of ONE day of a weekly diet plan:
+1. Follow the day's menu theme and the user's diet preference
+2. Give specific foods and portions for breakfast, mid-morning snack, lunch, evening snack and dinner
+3. Meet the daily calorie and macronutrient target
+4. Report the day's total calories and protein, carbs and fats in grams
+
+IMPORTANT: Return your response as a properly structured JSON matching the MealDay schema.""",
+        output_type=MealDay,
+        model=llm
+    )
+
 def create_synthesis_agent(llm) -> Agent:
     """Create a master planning and synthesis agent"""
     return Agent(
@@ -391,6 +280,24 @@ IMPORTANT: Return your response as a properly structured JSON matching the Compr
 # STEP 4: Fitness Planning System
 # ============================================================================
 
+# Phases whose results make up the plan: (exercise_plan, diet_plan, comprehensive_report)
+PLAN_PHASES = ("exercise_plan", "diet_plan", "comprehensive_report")
+
+def format_macro_target(metrics: Union[NutritionMetrics, str]) -> Optional[str]:
+    """Exact daily target shared by all days of a day-by-day diet plan (typed metrics only)"""
+    if not isinstance(metrics, NutritionMetrics):
+        return None
+    macros = metrics.macro_targets
+    return (f"{macros.daily_calories:.0f} kcal: protein {macros.protein_grams:.0f} g, "
+            f"carbs {macros.carbs_grams:.0f} g, fats {macros.fats_grams:.0f} g")
+
+@dataclass
+class PlanRun:
+    """How one user's plan was produced; filled in by stream_fitness_plan"""
+    served_from_template: bool = False
+    graph: Optional[PhaseGraph] = None  # phase timings, when the phases ran for this plan
+    prompt_tokens: PromptTokens = field(default_factory=PromptTokens)
+
 class FitnessPlanningSystem:
     """
     Multi-agent fitness planning system using Two-Phase Planning Pattern:
@@ -399,10 +306,37 @@ class FitnessPlanningSystem:
     Phase 2a: Exercise Planner (uses calculations, structured output)
     Phase 2b: Diet Planner (uses calculations, structured output)
     Phase 3: Synthesis Agent (integrates plans, structured output)
+    
+    The phases run as a dependency graph: the exercise branch (1a -> 2a) and the
+    diet branch (1b -> 2b) run concurrently and join before synthesis.
+    
+    With use_local_calculators=True, phases 1a/1b call the calculators directly
+    in-process instead of through the calculator agents (two fewer LLM calls, exact
+    numbers). Either way the planners get typed FitnessMetrics / NutritionMetrics (in
+    agent mode rebuilt from the tool outputs) as compact records, plus only the profile
+    fields they use; a PlanRun's prompt_tokens counts the prompt tokens of each phase.
+    
+    With a template_cache, the phases run once per profile bucket and generation mode,
+    and every other user in the bucket gets the cached template with cheap
+    personalization only.
+    
+    With per_day_generation=True, phases 2a/2b make one outline call for the
+    plan-level fields and then generate each day concurrently (see day_planner.py);
+    a day that fails validation is retried on its own.
+    
+    With a meal_optimizer (and local calculators), the week's meals are selected from
+    the local food database to hit the macro targets, and the diet planner only
+    writes the plan-level fields around them.
     """
     
-    def __init__(self, llm=llm):
+    def __init__(self, llm=llm, use_local_calculators: bool = True,
+                 template_cache: Optional[PlanTemplateCache] = None, per_day_generation: bool = False,
+                 meal_optimizer: Optional[MealOptimizer] = None):
         self.llm_ = llm
+        self.use_local_calculators = use_local_calculators
+        self.per_day_generation = per_day_generation
+        self.meal_optimizer = meal_optimizer
+        self.template_cache = template_cache
         
         # Phase 1: Calculator agents (with tools, NO output_type)
         self.fitness_calculator = create_fitness_calculator_agent(self.llm_)
@@ -412,123 +346,194 @@ class FitnessPlanningSystem:
         self.exercise_planner = create_exercise_planner_agent(self.llm_)
         self.diet_planner = create_diet_planner_agent(self.llm_)
         
+        # Phase 2 (day-by-day mode): outline + per-day agents
+        self.day_planner = DayByDayPlanner(
+            exercise_outliner=create_exercise_outline_agent(self.llm_),
+            exercise_day_planner=create_exercise_day_agent(self.llm_),
+            diet_outliner=create_diet_outline_agent(self.llm_),
+            meal_day_planner=create_meal_day_agent(self.llm_)
+        )
+        
         # Phase 3: Synthesis agent (NO tools, with output_type)
         self.synthesis_agent = create_synthesis_agent(self.llm_)
     
-    async def create_fitness_plan(self, user_data: dict) -> tuple:
+    @property
+    def generation_mode(self) -> str:
+        """The options that change the generated plans, as part of the template key"""
+        food_database = self.meal_optimizer is not None and self.use_local_calculators
+        return (f"local_calculators={self.use_local_calculators:d},per_day={self.per_day_generation:d},"
+                f"food_database={food_database:d}")
+    
+    async def stream_fitness_plan(self, user_data: dict, run: Optional[PlanRun] = None) -> AsyncIterator[PhaseEvent]:
         """
-        Execute complete fitness planning workflow with two-phase approach
+        Create a plan for one user, yielding a PhaseEvent when each phase starts and
+        finishes. Finished events of the PLAN_PHASES carry that part of the plan, so it
+        can be shown right away. Uses the template cache when one is configured.
+        
+        Pass a PlanRun to get this plan's phase graph, prompt tokens and whether it was
+        served from a template; concurrent streams each fill their own.
+        """
+        run = run if run is not None else PlanRun()
+        if self.template_cache is None:
+            run.graph = self.build_phase_graph(user_data, run.prompt_tokens)
+            async for event in run.graph.stream():
+                yield event
+            return
+        
+        cache, mode = self.template_cache, self.generation_mode
+        # One generation per bucket and mode, even when users of the same bucket arrive
+        # concurrently through different systems (the lock lives on the shared cache)
+        async with cache.generation_lock(user_data, mode):
+            template = cache.get(user_data, mode)
+            run.served_from_template = template is not None
+            if template is None:
+                run.graph = self.build_phase_graph(cache.bucket.template_profile(user_data), run.prompt_tokens)
+                results = {}
+                async for event in run.graph.stream():
+                    if event.status == "finished" and event.phase in PERSONALIZERS:
+                        results[event.phase] = event.result
+                        event = replace(event, result=PERSONALIZERS[event.phase](event.result, user_data, cache.bucket))
+                    yield event
+                cache.put(user_data, tuple(results[name] for name in PLAN_PHASES), mode)
+                return
+        
+        for name, plan in zip(PLAN_PHASES, personalize(template, user_data, cache.bucket)):
+            yield PhaseEvent(name, "finished", 0.0, 0.0, plan)
+    
+    async def create_fitness_plan(self, user_data: dict, run: Optional[PlanRun] = None) -> tuple:
+        """
+        Create a plan for one user, from the template cache when one is configured
         
         Returns:
-            Tuple of (exercise_plan, diet_plan, comprehensive_report)
+            Tuple of (exercise_plan, diet_plan, comprehensive_report); `run`, if given,
+            is filled in as by stream_fitness_plan
         """
+        results = {}
+        async for event in self.stream_fitness_plan(user_data, run):
+            if event.status == "finished":
+                results[event.phase] = event.result
+        return tuple(results[name] for name in PLAN_PHASES)
+    
+    async def create_fitness_plans(self, users: List[dict], max_concurrency: int = 4) -> List[tuple]:
+        """Create plans for many users (bulk onboarding), at most max_concurrency at a time"""
+        semaphore = asyncio.Semaphore(max_concurrency)
         
-        # Create user profile prompt
-        user_prompt = f"""
-Create a personalized fitness plan for:
-
-Personal Information:
-- Name: {user_data['name']}
-- Gender: {user_data['gender']}
-- Age: {user_data['age']} years
-- Weight: {user_data['weight']} kg
-- Height: {user_data['height']} cm
-- Body Fat: {user_data['body_fat']}%
-- Muscle Strength: {user_data['muscle_strength']} N
-
-Goals & Preferences:
-- Diet Preference: {user_data['diet_preference']}
-- Fitness Goal: {user_data['goal']}
-- Medical Conditions: {user_data['medical_condition']}
-"""
+        async def create(user_data: dict) -> tuple:
+            async with semaphore:
+                return await self.create_fitness_plan(user_data)
+        
+        return await asyncio.gather(*(create(user_data) for user_data in users))
+    
+    def build_phase_graph(self, user_data: dict, prompt_tokens: Optional[PromptTokens] = None) -> PhaseGraph:
+        """
+        Build the complete fitness planning workflow with two-phase approach
+        
+        Args:
+            prompt_tokens: Counts the prompt tokens of each phase (a new counter if omitted)
+        
+        Returns:
+            PhaseGraph whose PLAN_PHASES produce the exercise plan, diet plan and report
+        """
+        
+        # Each phase gets only the profile fields it uses plus compact typed metrics
+        # (see phase_context.py); prompt tokens are counted per phase
+        prompt_tokens = prompt_tokens if prompt_tokens is not None else PromptTokens()
         
         # ===================================================================
         # PHASE 1A: Run Fitness Calculator (calculates BMI and exercise recs)
         # ===================================================================
         fitness_calc_prompt = f"""
-{user_prompt}
-
-Calculate fitness metrics for this user:
-1. Calculate BMI using their weight ({user_data['weight']} kg) and height ({user_data['height']} cm)
-2. Get exercise recommendations based on their goal: {user_data['goal']} and body fat: {user_data['body_fat']}%
+Calculate fitness metrics for: {profile_context(user_data, FITNESS_CALCULATOR_PROFILE)}
+1. Calculate BMI from the weight and height
+2. Get exercise recommendations for the goal and body fat
 """
         
-        fitness_calc_result = await Runner.run(
-            self.fitness_calculator,
-            fitness_calc_prompt
-        )
-        fitness_metrics = fitness_calc_result.final_output  # String with tool results
+        async def run_fitness_calculator(deps: dict) -> Union[FitnessMetrics, str]:
+            if self.use_local_calculators:
+                return compute_fitness_metrics(user_data)
+            fitness_calc_result = await Runner.run(
+                self.fitness_calculator,
+                prompt_tokens.record("fitness_metrics", fitness_calc_prompt)
+            )
+            return metrics_from_run(fitness_calc_result, FitnessMetrics)  # Typed from the tool outputs
         
         # ===================================================================
         # PHASE 1B: Run Nutrition Calculator (calculates TDEE and macro recs)
         # ===================================================================
         nutrition_calc_prompt = f"""
-{user_prompt}
-
-Calculate nutrition metrics for this user:
-1. Calculate TDEE using weight ({user_data['weight']} kg), height ({user_data['height']} cm), age ({user_data['age']}), gender ({user_data['gender']})
-2. Get nutrition recommendations based on goal: {user_data['goal']}, calculated TDEE, weight ({user_data['weight']} kg), and diet preference: {user_data['diet_preference']}
+Calculate nutrition metrics for: {profile_context(user_data, NUTRITION_CALCULATOR_PROFILE)}
+1. Calculate TDEE from the weight, height, age and gender
+2. Get nutrition recommendations for the goal, calculated TDEE, weight and diet preference
 """
         
-        nutrition_calc_result = await Runner.run(
-            self.nutrition_calculator,
-            nutrition_calc_prompt
-        )
-        nutrition_metrics = nutrition_calc_result.final_output  # String with tool results
+        async def run_nutrition_calculator(deps: dict) -> Union[NutritionMetrics, str]:
+            if self.use_local_calculators:
+                return compute_nutrition_metrics(user_data)
+            nutrition_calc_result = await Runner.run(
+                self.nutrition_calculator,
+                prompt_tokens.record("nutrition_metrics", nutrition_calc_prompt)
+            )
+            return metrics_from_run(nutrition_calc_result, NutritionMetrics)  # Typed from the tool outputs
         
         # ===================================================================
         # PHASE 2A: Create Exercise Plan (using calculated metrics)
         # ===================================================================
-        exercise_prompt = f"""
-{user_prompt}
-
-CALCULATED FITNESS METRICS:
-{fitness_metrics}
-
-Using the calculated BMI and exercise recommendations above, create a detailed weekly exercise plan.
-Focus on the user's goal: {user_data['goal']}
-Consider medical conditions: {user_data['medical_condition']}
-
-Provide a complete exercise plan with weekly schedule, warm-up/cool-down routines, and safety precautions.
-"""
-        
-        exercise_result = await Runner.run(
-            self.exercise_planner,
-            exercise_prompt
-        )
-        exercise_plan: ExercisePlan = exercise_result.final_output
+        def exercise_prompt(fitness_metrics: Union[FitnessMetrics, str]) -> str:
+            return prompt_tokens.record("exercise_plan", f"""
+USER: {profile_context(user_data, EXERCISE_PROFILE)}
+FITNESS METRICS: {compact_metrics(fitness_metrics)}
+
+Using these metrics, create a detailed weekly exercise plan for the goal, safe for the medical conditions,
+with weekly schedule, warm-up/cool-down routines and safety precautions.
+""")
+        
+        async def run_exercise_planner(deps: dict) -> ExercisePlan:
+            if self.per_day_generation:
+                return await self.day_planner.exercise_plan(exercise_prompt(deps["fitness_metrics"]))
+            exercise_result = await Runner.run(
+                self.exercise_planner,
+                exercise_prompt(deps["fitness_metrics"])
+            )
+            return exercise_result.final_output
         
         # ===================================================================
         # PHASE 2B: Create Diet Plan (using calculated metrics)
         # ===================================================================
-        diet_prompt = f"""
-{user_prompt}
-
-CALCULATED NUTRITION METRICS:
-{nutrition_metrics}
-
-Using the calculated TDEE and nutrition recommendations above, create a detailed 7-day diet plan.
-Diet preference: {user_data['diet_preference']}
-Goal: {user_data['goal']}
-Medical conditions: {user_data['medical_condition']}
-
-Provide a complete diet plan with meal timing, hydration, and supplement recommendations.
-"""
-        
-        diet_result = await Runner.run(
-            self.diet_planner,
-            diet_prompt
-        )
-        diet_plan: DietPlan = diet_result.final_output
+        def diet_prompt(nutrition_metrics: Union[NutritionMetrics, str]) -> str:
+            return prompt_tokens.record("diet_plan", f"""
+USER: {profile_context(user_data, DIET_PROFILE)}
+NUTRITION TARGETS: {compact_metrics(nutrition_metrics)}
+
+Using these targets, create a detailed 7-day diet plan for the diet preference and goal, safe for the
+medical conditions, with meal timing, hydration and supplement recommendations.
+""")
+        
+        async def run_diet_planner(deps: dict) -> DietPlan:
+            nutrition_metrics = deps["nutrition_metrics"]
+            if self.meal_optimizer is not None and isinstance(nutrition_metrics, NutritionMetrics):
+                week = await asyncio.to_thread(self.meal_optimizer.plan_week,
+                                               macro_target_vector(nutrition_metrics.macro_targets),
+                                               user_data['diet_preference'])
+                return await self.day_planner.diet_plan_for_meals(diet_prompt(nutrition_metrics),
+                                                                  [day.to_meal_day() for day in week],
+                                                                  format_macro_target(nutrition_metrics))
+            if self.per_day_generation:
+                return await self.day_planner.diet_plan(diet_prompt(nutrition_metrics),
+                                                        format_macro_target(nutrition_metrics))
+            diet_result = await Runner.run(
+                self.diet_planner,
+                diet_prompt(deps["nutrition_metrics"])
+            )
+            return diet_result.final_output
         
         # ===================================================================
         # PHASE 3: Create Comprehensive Report (synthesize both plans)
         # ===================================================================
-        synthesis_prompt = f"""
+        def synthesis_prompt(exercise_plan: ExercisePlan, diet_plan: DietPlan) -> str:
+            return prompt_tokens.record("comprehensive_report", f"""
 Create a comprehensive fitness report integrating the following plans:
 
-USER PROFILE:
-{user_prompt}
+USER: {profile_context(user_data, SYNTHESIS_PROFILE)}
 
 EXERCISE PLAN SUMMARY:
 - Goal: {exercise_plan.fitness_goal}
@@ -541,20 +546,31 @@ DIET PLAN SUMMARY:
 - Macros: {diet_plan.macronutrient_split}
 
 Create an integrated report that shows how these plans work together to achieve the user's goals.
-"""
+""")
         
-        synthesis_result = await Runner.run(
-            self.synthesis_agent,
-            synthesis_prompt
-        )
-        comprehensive_report: ComprehensiveReport = synthesis_result.final_output
+        async def run_synthesis(deps: dict) -> ComprehensiveReport:
+            synthesis_result = await Runner.run(
+                self.synthesis_agent,
+                synthesis_prompt(deps["exercise_plan"], deps["diet_plan"])
+            )
+            return synthesis_result.final_output
         
-        return exercise_plan, diet_plan, comprehensive_report
+        # ===================================================================
+        # Run the phases: independent branches concurrently, joined for synthesis
+        # ===================================================================
+        graph = PhaseGraph()
+        graph.add("fitness_metrics", run_fitness_calculator)
+        graph.add("nutrition_metrics", run_nutrition_calculator)
+        graph.add("exercise_plan", run_exercise_planner, depends_on=["fitness_metrics"])
+        graph.add("diet_plan", run_diet_planner, depends_on=["nutrition_metrics"])
+        graph.add("comprehensive_report", run_synthesis, depends_on=["exercise_plan", "diet_plan"])
+        return graph
 
 # ============================================================================
 # STEP 5: Streamlit UI
 # ============================================================================
 
+@st.cache_data(show_spinner=False, max_entries=256)
 def format_exercise_plan(plan: ExercisePlan) -> str:
     """Format exercise plan as readable text"""
     output = f"# Exercise Plan for {plan.user_name}\n\n"
@@ -578,6 +594,7 @@ def format_exercise_plan(plan: ExercisePlan) -> str:
     
     return output
 
+@st.cache_data(show_spinner=False, max_entries=256)
 def format_diet_plan(plan: DietPlan) -> str:
     """Format diet plan as readable text"""
     output = f"# Diet Plan for {plan.user_name}\n\n"
@@ -604,6 +621,7 @@ def format_diet_plan(plan: DietPlan) -> str:
     
     return output
 
+@st.cache_data(show_spinner=False, max_entries=256)
 def format_comprehensive_report(report: ComprehensiveReport) -> str:
     """Format comprehensive report as readable text"""
     output = "# Comprehensive Fitness Report\n\n"
@@ -633,6 +651,48 @@ def format_comprehensive_report(report: ComprehensiveReport) -> str:
     
     return output
 
+# Display name per phase, and formatter / download label / file suffix per plan tab
+PHASE_LABELS = {
+    "fitness_metrics": "fitness metrics",
+    "nutrition_metrics": "nutrition metrics",
+    "exercise_plan": "exercise plan",
+    "diet_plan": "diet plan",
+    "comprehensive_report": "comprehensive report",
+}
+PLAN_TAB_CONTENT = {
+    "exercise_plan": (format_exercise_plan, "📥 Download Exercise Plan", "exercise_plan"),
+    "diet_plan": (format_diet_plan, "📥 Download Diet Plan", "diet_plan"),
+    "comprehensive_report": (format_comprehensive_report, "📥 Download Complete Report", "fitness_report"),
+}
+
+def render_plan_tab(placeholder, phase: str, plan, name: str):
+    """Replace a tab's placeholder with the formatted plan and its download button"""
+    formatter, label, suffix = PLAN_TAB_CONTENT[phase]
+    text = formatter(plan)
+    with placeholder.container():
+        st.markdown(text)
+        st.download_button(
+            label=label,
+            data=text,
+            file_name=f"{name}_{suffix}.md",
+            mime="text/markdown"
+        )
+
+@st.cache_resource
+def get_template_cache() -> PlanTemplateCache:
+    """Plan templates shared by all sessions on this server"""
+    return PlanTemplateCache(PLAN_TEMPLATE_CACHE_PATH)
+
+@st.cache_resource
+def get_plan_store() -> PlanStore:
+    """Generated plans shared by all sessions on this server"""
+    return PlanStore(PLAN_STORE_PATH)
+
+@st.cache_resource
+def get_meal_optimizer() -> MealOptimizer:
+    """Meal optimizer shared by all sessions, so its candidate tables are built once"""
+    return MealOptimizer()
+
 def main():
     st.set_page_config(page_title="Fitness & Diet Planner", page_icon="💪", layout="wide")
     
@@ -660,29 +720,66 @@ def main():
                                         help="Enter any medical conditions like Diabetes, High BP, etc.")
         
         st.markdown("---")
+        use_local_calculators = st.checkbox(
+            "Calculate metrics locally", value=True,
+            help="Compute BMI, TDEE and macro targets in-process instead of with the calculator agents (faster, exact numbers)"
+        )
+        use_templates = st.checkbox(
+            "Reuse plan templates for similar profiles", value=False,
+            help="Generate one plan per goal / diet / gender / age band / BMI band and personalize it (name, exact targets, medical notes)"
+        )
+        per_day_generation = st.checkbox(
+            "Generate plans day by day", value=False,
+            help="Outline each weekly plan once, then generate the days concurrently (faster; a failed day is retried on its own)"
+        )
+        use_food_database = st.checkbox(
+            "Select meals from the food database", value=False,
+            help="Pick each day's meals from a local food table to hit the calorie and macro targets (needs local calculators); the AI only writes the guidelines"
+        )
+        reuse_saved_plans = st.checkbox(
+            "Reuse saved plans", value=True,
+            help="Show the saved plan when the same profile was generated before with the same options (within a week) instead of generating it again"
+        )
         generate_button = st.button("🚀 Generate My Plan", type="primary", use_container_width=True)
+        st.caption(f"⚙️ Event loop: {get_background_loop().summary()}")
+    
+    # Collect user data
+    user_data = {
+        'name': name,
+        'gender': gender,
+        'age': age,
+        'weight': weight,
+        'height': height,
+        'body_fat': body_fat,
+        'muscle_strength': muscle_strength,
+        'diet_preference': diet_preference,
+        'goal': goal,
+        'medical_condition': medical_condition
+    }
+    
+    # Options that change the generated plan; a saved plan is only reused under the same ones
+    generation_options = {
+        'local_calculators': use_local_calculators,
+        'templates': use_templates,
+        'per_day_generation': per_day_generation,
+        'food_database': use_food_database and use_local_calculators,
+    }
+    
+    # A saved plan is shown on Generate (if reuse is on) and on any later rerun of the
+    # same profile and options, e.g. after clicking a download button
+    plan_store = get_plan_store()
+    plan_key = plan_store.key(user_data, generation_options)
+    stored = None
+    if (generate_button and reuse_saved_plans) or (not generate_button and st.session_state.get('plan_key') == plan_key):
+        stored = plan_store.get_by_key(plan_key)
     
     # Main content area
-    if generate_button:
+    if generate_button or stored is not None:
         # Validate API key
-        if not os.getenv("OPENAI_API_KEY"):
+        if stored is None and not os.getenv("OPENAI_API_KEY"):
             st.error("⚠️ OpenAI API key not found! Please set OPENAI_API_KEY environment variable.")
             st.stop()
         
-        # Collect user data
-        user_data = {
-            'name': name,
-            'gender': gender,
-            'age': age,
-            'weight': weight,
-            'height': height,
-            'body_fat': body_fat,
-            'muscle_strength': muscle_strength,
-            'diet_preference': diet_preference,
-            'goal': goal,
-            'medical_condition': medical_condition
-        }
-        
         # Display user profile
         st.header("👤 Your Profile Summary")
         col1, col2, col3, col4 = st.columns(4)
@@ -707,75 +804,67 @@ def main():
         progress_bar = st.progress(0)
         status_text = st.empty()
         
+        # Plan tabs are filled in as soon as their phase finishes
+        st.header("📊 Your Personalized Fitness Plan")
+        tab1, tab2, tab3 = st.tabs(["🏋️ Exercise Plan", "🥗 Diet Plan", "📋 Comprehensive Report"])
+        tab_placeholders = {}
+        for tab, phase in zip((tab1, tab2, tab3), PLAN_PHASES):
+            with tab:
+                tab_placeholders[phase] = st.empty()
+                tab_placeholders[phase].info(f"⏳ Waiting for the {PHASE_LABELS[phase]}...")
+        
+        if stored is not None:
+            progress_bar.empty()
+            for phase, plan in zip(PLAN_PHASES, stored.plans):
+                render_plan_tab(tab_placeholders[phase], phase, plan, name)
+            st.caption(f"💾 Loaded saved plan from {stored.age_seconds / 3600:.1f} h ago ({plan_store.summary()})")
+            st.session_state['plan_key'] = plan_key
+            return
+        
         try:
             # Initialize system
             status_text.text("🔧 Initializing AI Agent System...")
-            progress_bar.progress(10)
-            system = FitnessPlanningSystem(llm=llm)
-            
-            # Run async agent workflow
-            status_text.text("🤖 Running Multi-Agent Fitness Planning System...")
-            progress_bar.progress(20)
-            
-            # Create and run event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            status_text.text("💪 Exercise Agent: Creating workout plan...")
-            progress_bar.progress(30)
-            
-            # Run the async function
-            exercise_plan, diet_plan, comprehensive_report = loop.run_until_complete(
-                system.create_fitness_plan(user_data)
+            system = FitnessPlanningSystem(
+                llm=llm,
+                use_local_calculators=use_local_calculators,
+                per_day_generation=per_day_generation,
+                meal_optimizer=get_meal_optimizer() if use_food_database else None,
+                template_cache=get_template_cache() if use_templates else None
             )
             
-            progress_bar.progress(100)
-            status_text.text("✅ Complete!")
+            # Run on the shared background event loop; events are rendered here as they arrive
+            running, finished, plans, run = [], 0, {}, PlanRun()
+            for event in get_background_loop().iterate(system.stream_fitness_plan(user_data, run)):
+                if event.status == "started":
+                    running.append(event.phase)
+                else:
+                    if event.phase in running:
+                        running.remove(event.phase)
+                    finished += 1
+                    progress_bar.progress(min(finished / len(PHASE_LABELS), 1.0))
+                    if event.phase in PLAN_PHASES:
+                        plans[event.phase] = event.result
+                        render_plan_tab(tab_placeholders[event.phase], event.phase, event.result, name)
+                if running:
+                    status_text.text("🤖 Running: " + ", ".join(PHASE_LABELS[phase] for phase in running) + "...")
             
-            import time
-            time.sleep(0.5)
             progress_bar.empty()
             status_text.empty()
             
-            # Display results in tabs
-            st.header("📊 Your Personalized Fitness Plan")
-            
-            tab1, tab2, tab3 = st.tabs(["🏋️ Exercise Plan", "🥗 Diet Plan", "📋 Comprehensive Report"])
-            
-            with tab1:
-                exercise_text = format_exercise_plan(exercise_plan)
-                st.markdown(exercise_text)
-                
-                st.download_button(
-                    label="📥 Download Exercise Plan",
-                    data=exercise_text,
-                    file_name=f"{name}_exercise_plan.md",
-                    mime="text/markdown"
-                )
-            
-            with tab2:
-                diet_text = format_diet_plan(diet_plan)
-                st.markdown(diet_text)
-                
-                st.download_button(
-                    label="📥 Download Diet Plan",
-                    data=diet_text,
-                    file_name=f"{name}_diet_plan.md",
-                    mime="text/markdown"
-                )
+            st.success("🎉 Your personalized fitness plan is ready!")
             
-            with tab3:
-                report_text = format_comprehensive_report(comprehensive_report)
-                st.markdown(report_text)
-                
-                st.download_button(
-                    label="📥 Download Complete Report",
-                    data=report_text,
-                    file_name=f"{name}_fitness_report.md",
-                    mime="text/markdown"
-                )
+            # Save the plan, so reruns and repeat requests for this profile and options re-render it
+            plan_store.put(user_data, tuple(plans[phase] for phase in PLAN_PHASES), generation_options)
+            st.session_state['plan_key'] = plan_key
             
-            st.success("🎉 Your personalized fitness plan is ready!")
+            if run.served_from_template:
+                st.caption(f"♻️ Personalized from a cached plan template ({system.template_cache.summary()})")
+            else:
+                with st.expander("⏱️ Phase Timings"):
+                    st.text(run.graph.summary())
+                    st.caption(f"Prompt tokens per phase: {run.prompt_tokens.summary()}")
+                    if per_day_generation:
+                        st.caption(f"Day-by-day generation: {system.day_planner.retries} day retries")
             
         except Exception as e:
             st.error(f"❌ An error occurred: {str(e)}")
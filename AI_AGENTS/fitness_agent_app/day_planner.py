@@ -0,0 +1,163 @@
+"""
+Day-by-day generation of the weekly exercise and diet plans.
+
+Producing a whole DietPlan (seven MealDays) in one structured-output call is the
+slowest call of the pipeline, and a single malformed day fails validation of the
+entire plan. Here one call produces the plan-level fields (an outline with the weekly
+split or menu themes), then every day is generated concurrently under the same
+targets and the plan is assembled locally:
+
+    outline ──> Monday ───┐
+            ──> Tuesday ──┼──> ExercisePlan / DietPlan
+            ──> ...      ─┘
+
+A day that fails validation is retried on its own, with the error fed back, and the
+other days are kept.
+"""
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+from agents import Agent, ModelBehaviorError, Runner
+from pydantic import ValidationError
+
+from fitness_models import (DietPlan, DietPlanOutline, ExerciseDayOutline, ExercisePlan, ExercisePlanOutline,
+                            MealDay, MealDayOutline)
+
+WEEK_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+MAX_DAY_RETRIES = 2
+DEFAULT_FOCUS = "Full body"
+DEFAULT_THEME = "Balanced home cooking"
+
+
+def _feedback_prompt(prompt: str, agent: Agent, error: Exception) -> str:
+    """The original prompt plus the validation error of the previous attempt"""
+    return (f"{prompt}\n\nYour previous response failed validation:\n{error}\n\n"
+            f"Return a corrected {agent.output_type.__name__} that matches the schema exactly.")
+
+
+def _outline_lines(entries: Iterable[Tuple[str, str]]) -> str:
+    return "\n".join(f"- {day}: {label}" for day, label in entries)
+
+
+class DayByDayPlanner:
+    """
+    Generates an ExercisePlan / DietPlan as an outline plus concurrently generated days.
+
+    Args:
+        exercise_outliner: Agent with output_type=ExercisePlanOutline
+        exercise_day_planner: Agent with output_type=ExerciseDay
+        diet_outliner: Agent with output_type=DietPlanOutline
+        meal_day_planner: Agent with output_type=MealDay
+        max_retries: Extra attempts for a day (or outline) that fails validation
+        max_concurrency: Calls in flight at once, across both plans
+    """
+
+    def __init__(self, exercise_outliner: Agent, exercise_day_planner: Agent, diet_outliner: Agent,
+                 meal_day_planner: Agent, max_retries: int = MAX_DAY_RETRIES, max_concurrency: int = 7):
+        self.exercise_outliner = exercise_outliner
+        self.exercise_day_planner = exercise_day_planner
+        self.diet_outliner = diet_outliner
+        self.meal_day_planner = meal_day_planner
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.retries = 0  # validation retries used so far
+        self._semaphore = None
+
+    async def _run(self, agent: Agent, prompt: str):
+        """Run one structured-output call, retrying it alone when its output fails validation"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        error = None
+        for _ in range(self.max_retries + 1):
+            if error is not None:
+                self.retries += 1
+            try:
+                async with self._semaphore:
+                    result = await Runner.run(agent, prompt if error is None else _feedback_prompt(prompt, agent, error))
+                return result.final_output
+            except (ModelBehaviorError, ValidationError) as e:
+                error = e
+        raise error
+
+    # ------------------------------------------------------------------
+    # Exercise plan
+    # ------------------------------------------------------------------
+
+    async def exercise_plan(self, prompt: str) -> ExercisePlan:
+        """Outline the week, then generate every day of the split concurrently"""
+        outline: ExercisePlanOutline = await self._run(self.exercise_outliner, f"""{prompt}
+First outline the weekly exercise plan: the training split (one entry per day of the week,
+rest days included, each with its focus), warm-up and cool-down routines, progressive
+overload strategy and safety precautions. The daily routines are planned separately.
+""")
+        split = outline.weekly_split or [ExerciseDayOutline(day=day, focus=DEFAULT_FOCUS) for day in WEEK_DAYS]
+        days = await asyncio.gather(*(
+            self._run(self.exercise_day_planner, f"""{prompt}
+WEEKLY SPLIT:
+{_outline_lines((slot.day, slot.focus) for slot in split)}
+
+Plan the routine for {slot.day} ({slot.focus}) only: exercises with sets and reps,
+duration and notes. On rest days, list light recovery activities.
+""")
+            for slot in split
+        ))
+        for slot, day in zip(split, days):
+            day.day, day.focus = slot.day, slot.focus
+        return ExercisePlan(**outline.model_dump(exclude={"weekly_split"}), weekly_schedule=list(days))
+
+    # ------------------------------------------------------------------
+    # Diet plan
+    # ------------------------------------------------------------------
+
+    async def diet_plan(self, prompt: str, macro_target: Optional[str] = None) -> DietPlan:
+        """
+        Outline the week, then generate the meals of all seven days concurrently.
+
+        Every day is planned for the same `macro_target` (default: the outline's
+        calorie target and macronutrient split).
+        """
+        outline: DietPlanOutline = await self._run(self.diet_outliner, f"""{prompt}
+First outline the weekly diet plan: daily calorie target, macronutrient split, a short
+theme for each day of the week's menu (so the days vary), meal timing guidelines,
+hydration and supplement recommendations. The daily meals are planned separately.
+""")
+        themes = [entry.theme for entry in outline.weekly_menu]
+        menu = [MealDayOutline(day=day, theme=themes[i] if i < len(themes) else DEFAULT_THEME)
+                for i, day in enumerate(WEEK_DAYS)]
+        target = macro_target or f"{outline.daily_calorie_target}; {outline.macronutrient_split}"
+        days = await asyncio.gather(*(
+            self._run(self.meal_day_planner, f"""{prompt}
+DAILY TARGET (the same for every day of the week):
+{target}
+
+WEEKLY MENU THEMES:
+{_outline_lines((entry.day, entry.theme) for entry in menu)}
+
+Plan the meals for {entry.day} ({entry.theme}) only: breakfast, mid-morning snack, lunch,
+evening snack and dinner with specific foods and portions, plus the day's total calories
+and protein, carbs and fats in grams. The day's totals must match the daily target.
+""")
+            for entry in menu
+        ))
+        for entry, day in zip(menu, days):
+            day.day = entry.day
+        return DietPlan(**outline.model_dump(exclude={"weekly_menu"}), weekly_meals=list(days))
+
+    async def diet_plan_for_meals(self, prompt: str, meals: List[MealDay], macro_target: str) -> DietPlan:
+        """
+        Write the plan-level fields around meals selected elsewhere (e.g. by the meal
+        optimizer): a single outline call and no per-day calls; the meals are kept as-is.
+        """
+        menu = "\n".join(f"- {day.day}: breakfast {day.breakfast}; lunch {day.lunch}; dinner {day.dinner}"
+                         for day in meals)
+        outline: DietPlanOutline = await self._run(self.diet_outliner, f"""{prompt}
+DAILY TARGET: {macro_target}
+
+The meals of every day are already selected from a food database to hit this target:
+{menu}
+
+Do not change the meals. Outline the weekly diet plan around them: daily calorie target,
+macronutrient split, a short theme for each day's menu, meal timing guidelines,
+hydration and supplement recommendations.
+""")
+        return DietPlan(**outline.model_dump(exclude={"weekly_menu"}), weekly_meals=meals)
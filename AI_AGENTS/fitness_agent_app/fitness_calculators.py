@@ -0,0 +1,244 @@
+"""
+Deterministic fitness and nutrition calculators.
+
+Plain Python functions, so they can be exposed to the calculator agents as tools
+(`function_tool(calculate_bmi)`) or called directly in-process with the user's
+profile via `compute_fitness_metrics` / `compute_nutrition_metrics`, which return
+typed metric objects for the planners.
+"""
+from typing import Union
+
+from pydantic import BaseModel
+
+# ============================================================================
+# Calculators
+# ============================================================================
+
+def calculate_bmi(weight_kg: Union[str, float], height_cm: Union[str, float]) -> dict:
+    """
+    Calculate Body Mass Index (BMI)
+
+    Args:
+        weight_kg: Weight in kilograms
+        height_cm: Height in centimeters
+    """
+    # Convert to float in case strings are passed
+    weight_kg = float(weight_kg)
+    height_cm = float(height_cm)
+
+    height_m = height_cm / 100
+    bmi = weight_kg / (height_m ** 2)
+
+    if bmi < 18.5:
+        category = "Underweight"
+    elif 18.5 <= bmi < 25:
+        category = "Normal weight"
+    elif 25 <= bmi < 30:
+        category = "Overweight"
+    else:
+        category = "Obese"
+
+    return {
+        "bmi": round(bmi, 2),
+        "category": category,
+        "recommendation": f"Your BMI is {round(bmi, 2)} ({category})"
+    }
+
+def calculate_tdee(weight_kg: Union[str, float], height_cm: Union[str, float], age: Union[str, int], gender: str, activity_level: str = "moderate") -> dict:
+    """
+    Calculate Total Daily Energy Expenditure (TDEE)
+
+    Args:
+        weight_kg: Weight in kilograms
+        height_cm: Height in centimeters
+        age: Age in years
+        gender: Male or Female
+        activity_level: sedentary, light, moderate, active, very_active
+    """
+    # Convert to correct types in case strings are passed
+    weight_kg = float(weight_kg)
+    height_cm = float(height_cm)
+    age = int(age)
+
+    # Calculate BMR using Mifflin-St Jeor Equation
+    if gender.lower() == "male":
+        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
+    else:
+        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
+
+    # Activity multipliers
+    activity_multipliers = {
+        "sedentary": 1.2,
+        "light": 1.375,
+        "moderate": 1.55,
+        "active": 1.725,
+        "very_active": 1.9
+    }
+
+    multiplier = activity_multipliers.get(activity_level.lower(), 1.55)
+    tdee = bmr * multiplier
+
+    return {
+        "bmr": round(bmr, 0),
+        "tdee": round(tdee, 0),
+        "maintenance_calories": round(tdee, 0),
+        "weight_loss_calories": round(tdee * 0.85, 0),
+        "muscle_gain_calories": round(tdee * 1.15, 0)
+    }
+
+def get_exercise_recommendations(goal: str, fitness_level: str, body_fat: Union[str, float]) -> dict:
+    """
+    Get exercise type recommendations based on goals
+
+    Args:
+        goal: Fitness goal (muscle gain, fat loss, general fitness)
+        fitness_level: beginner, intermediate, advanced
+        body_fat: Body fat percentage
+    """
+    # Convert to float in case string is passed
+    body_fat = float(body_fat)
+
+    recommendations = {
+        "muscle_gain": {
+            "workout_split": "Push/Pull/Legs or Upper/Lower",
+            "frequency": "4-6 days per week",
+            "rep_range": "8-12 reps for hypertrophy",
+            "cardio": "2-3 sessions per week (low intensity)",
+            "rest": "48 hours between same muscle groups"
+        },
+        "fat_loss": {
+            "workout_split": "Full body or Upper/Lower",
+            "frequency": "4-5 days per week",
+            "rep_range": "12-15 reps with shorter rest",
+            "cardio": "4-5 sessions per week (mix HIIT and steady state)",
+            "rest": "Active recovery recommended"
+        },
+        "general_fitness": {
+            "workout_split": "Full body workouts",
+            "frequency": "3-4 days per week",
+            "rep_range": "10-15 reps",
+            "cardio": "3 sessions per week",
+            "rest": "At least 1 full rest day per week"
+        }
+    }
+
+    goal_key = "muscle_gain" if "muscle" in goal.lower() else \
+               "fat_loss" if "fat" in goal.lower() or "loss" in goal.lower() else \
+               "general_fitness"
+
+    return recommendations.get(goal_key, recommendations["general_fitness"])
+
+def get_nutrition_recommendations(goal: str, tdee: Union[str, float], weight_kg: Union[str, float], diet_preference: str) -> dict:
+    """
+    Get nutrition recommendations based on goals
+
+    Args:
+        goal: Fitness goal
+        tdee: Total Daily Energy Expenditure
+        weight_kg: Body weight in kg
+        diet_preference: Vegetarian or Non-Vegetarian
+    """
+    # Convert to float in case strings are passed
+    tdee = float(tdee)
+    weight_kg = float(weight_kg)
+
+    if "muscle" in goal.lower():
+        calorie_target = tdee * 1.15
+        protein_per_kg = 2.0
+        carbs_percent = 0.40
+        fats_percent = 0.25
+    elif "fat" in goal.lower() or "loss" in goal.lower():
+        calorie_target = tdee * 0.85
+        protein_per_kg = 2.2
+        carbs_percent = 0.35
+        fats_percent = 0.30
+    else:
+        calorie_target = tdee
+        protein_per_kg = 1.6
+        carbs_percent = 0.40
+        fats_percent = 0.30
+
+    protein_grams = weight_kg * protein_per_kg
+    protein_calories = protein_grams * 4
+
+    remaining_calories = calorie_target - protein_calories
+    carbs_calories = remaining_calories * carbs_percent / (carbs_percent + fats_percent)
+    fats_calories = remaining_calories * fats_percent / (carbs_percent + fats_percent)
+
+    carbs_grams = carbs_calories / 4
+    fats_grams = fats_calories / 9
+
+    return {
+        "daily_calories": round(calorie_target, 0),
+        "protein_grams": round(protein_grams, 0),
+        "carbs_grams": round(carbs_grams, 0),
+        "fats_grams": round(fats_grams, 0),
+        "protein_percent": round((protein_calories / calorie_target) * 100, 0),
+        "carbs_percent": round((carbs_calories / calorie_target) * 100, 0),
+        "fats_percent": round((fats_calories / calorie_target) * 100, 0),
+        "diet_preference": diet_preference
+    }
+
+# ============================================================================
+# Typed metrics for the planners
+# ============================================================================
+
+class BMIResult(BaseModel):
+    bmi: float
+    category: str
+    recommendation: str
+
+class ExerciseRecommendations(BaseModel):
+    workout_split: str
+    frequency: str
+    rep_range: str
+    cardio: str
+    rest: str
+
+class FitnessMetrics(BaseModel):
+    """Output of the fitness calculators (phase 1a)"""
+    bmi: BMIResult
+    exercise_recommendations: ExerciseRecommendations
+
+class EnergyExpenditure(BaseModel):
+    bmr: float
+    tdee: float
+    maintenance_calories: float
+    weight_loss_calories: float
+    muscle_gain_calories: float
+
+class MacroTargets(BaseModel):
+    daily_calories: float
+    protein_grams: float
+    carbs_grams: float
+    fats_grams: float
+    protein_percent: float
+    carbs_percent: float
+    fats_percent: float
+    diet_preference: str
+
+class NutritionMetrics(BaseModel):
+    """Output of the nutrition calculators (phase 1b)"""
+    energy: EnergyExpenditure
+    macro_targets: MacroTargets
+
+def compute_fitness_metrics(user_data: dict, fitness_level: str = "intermediate") -> FitnessMetrics:
+    """Run the fitness calculators directly on the user's profile"""
+    return FitnessMetrics(
+        bmi=BMIResult(**calculate_bmi(user_data['weight'], user_data['height'])),
+        exercise_recommendations=ExerciseRecommendations(
+            **get_exercise_recommendations(user_data['goal'], fitness_level, user_data['body_fat'])
+        ),
+    )
+
+def compute_nutrition_metrics(user_data: dict, activity_level: str = "moderate") -> NutritionMetrics:
+    """Run the nutrition calculators directly on the user's profile"""
+    energy = EnergyExpenditure(**calculate_tdee(
+        user_data['weight'], user_data['height'], user_data['age'], user_data['gender'], activity_level
+    ))
+    return NutritionMetrics(
+        energy=energy,
+        macro_targets=MacroTargets(**get_nutrition_recommendations(
+            user_data['goal'], energy.tdee, user_data['weight'], user_data['diet_preference']
+        )),
+    )
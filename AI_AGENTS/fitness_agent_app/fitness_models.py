@@ -0,0 +1,110 @@
+"""Structured outputs of the fitness planning agents"""
+import json
+from typing import List, Tuple
+
+from pydantic import BaseModel
+
+
+class ExerciseDay(BaseModel):
+    """Single day exercise routine"""
+    day: str
+    focus: str
+    exercises: List[str]
+    sets_reps: List[str]
+    duration: str
+    notes: str
+
+class ExercisePlan(BaseModel):
+    """Complete weekly exercise plan"""
+    user_name: str
+    fitness_goal: str
+    weekly_schedule: List[ExerciseDay]
+    warm_up_routine: str
+    cool_down_routine: str
+    progressive_overload_strategy: str
+    safety_precautions: List[str]
+
+class MealDay(BaseModel):
+    """Single day meal plan"""
+    day: str
+    breakfast: str
+    mid_morning_snack: str
+    lunch: str
+    evening_snack: str
+    dinner: str
+    total_calories: str
+    protein_grams: str
+    carbs_grams: str
+    fats_grams: str
+
+class DietPlan(BaseModel):
+    """Complete weekly diet plan"""
+    user_name: str
+    diet_preference: str
+    daily_calorie_target: str
+    macronutrient_split: str
+    weekly_meals: List[MealDay]
+    meal_timing_guidelines: str
+    hydration_recommendations: str
+    supplement_suggestions: List[str]
+
+class ComprehensiveReport(BaseModel):
+    """Final integrated fitness report"""
+    executive_summary: str
+    user_profile_analysis: str
+    exercise_plan_overview: str
+    diet_plan_overview: str
+    integration_strategy: str
+    progress_tracking_methods: List[str]
+    weekly_milestones: List[str]
+    success_tips: List[str]
+    safety_reminders: List[str]
+    confidence_score: float
+
+# Outlines for day-by-day generation: the plan-level fields come from one call, and
+# each day is generated separately and assembled into an ExercisePlan / DietPlan
+
+class ExerciseDayOutline(BaseModel):
+    """Slot of the weekly training split"""
+    day: str
+    focus: str
+
+class ExercisePlanOutline(BaseModel):
+    """Exercise plan without the daily routines"""
+    user_name: str
+    fitness_goal: str
+    weekly_split: List[ExerciseDayOutline]
+    warm_up_routine: str
+    cool_down_routine: str
+    progressive_overload_strategy: str
+    safety_precautions: List[str]
+
+class MealDayOutline(BaseModel):
+    """Theme of one day of the weekly menu, so days generated separately stay varied"""
+    day: str
+    theme: str
+
+class DietPlanOutline(BaseModel):
+    """Diet plan without the daily meals"""
+    user_name: str
+    diet_preference: str
+    daily_calorie_target: str
+    macronutrient_split: str
+    weekly_menu: List[MealDayOutline]
+    meal_timing_guidelines: str
+    hydration_recommendations: str
+    supplement_suggestions: List[str]
+
+# A generated plan: (exercise_plan, diet_plan, comprehensive_report)
+PlanTriple = Tuple[ExercisePlan, DietPlan, ComprehensiveReport]
+
+def dump_plans(plans: PlanTriple) -> str:
+    """Serialize a plan triple to JSON (for the SQLite plan stores)"""
+    exercise_plan, diet_plan, report = plans
+    return json.dumps({"exercise_plan": exercise_plan.model_dump(), "diet_plan": diet_plan.model_dump(),
+                       "report": report.model_dump()})
+
+def load_plans(payload: str) -> PlanTriple:
+    data = json.loads(payload)
+    return (ExercisePlan.model_validate(data["exercise_plan"]), DietPlan.model_validate(data["diet_plan"]),
+            ComprehensiveReport.model_validate(data["report"]))
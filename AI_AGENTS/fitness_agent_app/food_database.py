@@ -0,0 +1,169 @@
+"""
+Local food-nutrient table with an in-memory index by diet type and meal slot.
+
+Nutrients are per standard portion (approximate values from common nutrition tables).
+Every food has a role in a meal (protein, carb, vegetable, fruit, fat, dairy), the meal
+slots it suits (breakfast, snack, main) and the least restrictive diet it needs:
+vegan foods suit every diet, vegetarian foods (dairy) suit vegetarian and
+non-vegetarian diets, and non-vegetarian foods (meat, fish, eggs) only non-vegetarian.
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+import numpy as np
+
+VEGAN = "vegan"
+VEGETARIAN = "vegetarian"
+NON_VEGETARIAN = "non_vegetarian"
+
+# Diets each food diet tag is allowed in
+ALLOWED_IN = {
+    VEGAN: (VEGAN, VEGETARIAN, NON_VEGETARIAN),
+    VEGETARIAN: (VEGETARIAN, NON_VEGETARIAN),
+    NON_VEGETARIAN: (NON_VEGETARIAN,),
+}
+
+BREAKFAST, SNACK, MAIN = "breakfast", "snack", "main"
+SLOT_TYPES = (BREAKFAST, SNACK, MAIN)
+
+# Order of the nutrient columns in FoodIndex matrices
+NUTRIENTS = ("calories", "protein", "carbs", "fats")
+
+
+@dataclass(frozen=True)
+class Food:
+    """One food and its nutrients per standard portion"""
+    name: str
+    role: str
+    slots: FrozenSet[str]
+    diet: str
+    quantity: float
+    unit: str
+    calories: float
+    protein: float
+    carbs: float
+    fats: float
+
+    @property
+    def nutrients(self) -> Tuple[float, float, float, float]:
+        return self.calories, self.protein, self.carbs, self.fats
+
+    def portion(self, multiplier: float = 1.0) -> str:
+        amount = self.quantity * multiplier
+        unit = self.unit[:-1] if amount == 1 and self.unit.endswith("s") else self.unit
+        return f"{self.name} ({amount:g} {unit})" if amount < 10 else f"{self.name} ({amount:.0f} {unit})"
+
+
+def _food(name, role, slots, diet, quantity, unit, calories, protein, carbs, fats) -> Food:
+    return Food(name, role, frozenset(slots.split()), diet, quantity, unit, calories, protein, carbs, fats)
+
+
+FOODS: List[Food] = [
+    # name, role, slots, diet, quantity, unit, kcal, protein g, carbs g, fats g
+    # Proteins
+    _food("Grilled chicken breast", "protein", "main", NON_VEGETARIAN, 100, "g", 165, 31, 0, 3.6),
+    _food("Baked salmon", "protein", "main", NON_VEGETARIAN, 100, "g", 208, 20, 0, 13),
+    _food("Grilled white fish", "protein", "main", NON_VEGETARIAN, 100, "g", 120, 24, 0, 2.5),
+    _food("Lean lamb, grilled", "protein", "main", NON_VEGETARIAN, 100, "g", 206, 28, 0, 10),
+    _food("Tuna in water", "protein", "main snack", NON_VEGETARIAN, 100, "g", 116, 26, 0, 1),
+    _food("Boiled eggs", "protein", "breakfast snack main", NON_VEGETARIAN, 2, "eggs", 155, 13, 1.1, 11),
+    _food("Egg whites", "protein", "breakfast", NON_VEGETARIAN, 4, "whites", 68, 14.4, 1, 0.2),
+    _food("Paneer", "protein", "main breakfast", VEGETARIAN, 100, "g", 265, 18, 3.6, 20),
+    _food("Low-fat paneer", "protein", "main breakfast", VEGETARIAN, 100, "g", 180, 25, 4, 7),
+    _food("Greek yogurt, low-fat", "protein", "breakfast snack", VEGETARIAN, 150, "g", 110, 15, 6, 3),
+    _food("Whey protein shake", "protein", "breakfast snack", VEGETARIAN, 1, "scoops", 120, 24, 3, 1.5),
+    _food("Firm tofu", "protein", "main breakfast", VEGAN, 150, "g", 216, 25.5, 4.5, 13.5),
+    _food("Tempeh", "protein", "main", VEGAN, 100, "g", 192, 20, 7.6, 11),
+    _food("Dal (cooked lentils)", "protein", "main", VEGAN, 200, "g", 230, 18, 40, 0.8),
+    _food("Chickpea curry (chana)", "protein", "main", VEGAN, 165, "g", 269, 14.5, 45, 4.2),
+    _food("Rajma (kidney beans)", "protein", "main", VEGAN, 175, "g", 225, 15, 40, 0.9),
+    _food("Soya chunks", "protein", "main", VEGAN, 50, "g dry", 172, 26, 16.5, 0.3),
+    _food("Pea protein shake", "protein", "breakfast snack", VEGAN, 1, "scoops", 115, 24, 1, 2),
+    _food("Moong sprouts chaat", "protein", "snack", VEGAN, 150, "g", 90, 7, 15, 0.5),
+    _food("Roasted chana", "protein", "snack", VEGAN, 30, "g", 110, 6.5, 17, 1.5),
+    # Carbs
+    _food("Brown rice", "carb", "main", VEGAN, 195, "g cooked", 216, 5, 45, 1.8),
+    _food("White rice", "carb", "main", VEGAN, 160, "g cooked", 205, 4.3, 45, 0.4),
+    _food("Whole wheat roti", "carb", "main breakfast", VEGAN, 2, "pieces", 220, 7, 36, 5),
+    _food("Jowar / bajra roti", "carb", "main", VEGAN, 2, "pieces", 230, 7, 44, 3),
+    _food("Quinoa", "carb", "main", VEGAN, 185, "g cooked", 222, 8, 39, 3.6),
+    _food("Whole wheat pasta", "carb", "main", VEGAN, 140, "g cooked", 174, 7.5, 37, 0.8),
+    _food("Baked sweet potato", "carb", "main", VEGAN, 150, "g", 135, 3, 31, 0.2),
+    _food("Boiled potatoes", "carb", "main", VEGAN, 150, "g", 130, 3, 30, 0.2),
+    _food("Rolled oats", "carb", "breakfast", VEGAN, 50, "g dry", 190, 6.6, 33.5, 3.4),
+    _food("Unsweetened muesli", "carb", "breakfast", VEGAN, 50, "g", 185, 5, 33, 3),
+    _food("Whole grain bread", "carb", "breakfast snack", VEGAN, 2, "slices", 160, 8, 28, 2),
+    _food("Vegetable poha", "carb", "breakfast", VEGAN, 150, "g", 195, 4, 38, 3),
+    _food("Idli", "carb", "breakfast", VEGAN, 3, "pieces", 175, 6, 36, 0.6),
+    _food("Plain dosa", "carb", "breakfast", VEGAN, 2, "pieces", 270, 6, 44, 7.4),
+    _food("Vegetable upma", "carb", "breakfast", VEGAN, 200, "g", 250, 6, 40, 7),
+    _food("Roasted makhana", "carb", "snack", VEGAN, 30, "g", 104, 2.9, 23, 0.1),
+    # Vegetables
+    _food("Mixed vegetable sabzi", "vegetable", "main", VEGAN, 150, "g", 120, 3, 14, 6),
+    _food("Sauteed spinach", "vegetable", "main", VEGAN, 150, "g", 70, 4.5, 6, 3.5),
+    _food("Steamed broccoli", "vegetable", "main", VEGAN, 150, "g", 52, 3.6, 10.5, 0.6),
+    _food("Green salad", "vegetable", "main", VEGAN, 150, "g", 35, 1.5, 7, 0.3),
+    _food("Bhindi (okra) stir-fry", "vegetable", "main", VEGAN, 150, "g", 110, 3, 11, 6.5),
+    _food("Stir-fried vegetables", "vegetable", "main", VEGAN, 150, "g", 90, 3, 12, 3.5),
+    _food("Cauliflower sabzi", "vegetable", "main", VEGAN, 150, "g", 95, 3, 9, 5.5),
+    _food("Steamed green beans", "vegetable", "main", VEGAN, 150, "g", 52, 2.7, 11, 0.4),
+    # Fruits
+    _food("Banana", "fruit", "breakfast snack", VEGAN, 1, "medium", 105, 1.3, 27, 0.4),
+    _food("Apple", "fruit", "breakfast snack", VEGAN, 1, "medium", 95, 0.5, 25, 0.3),
+    _food("Orange", "fruit", "breakfast snack", VEGAN, 1, "medium", 70, 1.4, 18, 0.2),
+    _food("Papaya", "fruit", "breakfast snack", VEGAN, 145, "g", 62, 0.7, 16, 0.4),
+    _food("Mixed berries", "fruit", "breakfast snack", VEGAN, 150, "g", 85, 1.1, 21, 0.5),
+    _food("Guava", "fruit", "snack", VEGAN, 1, "medium", 68, 2.6, 14, 1),
+    # Fats
+    _food("Almonds", "fat", "breakfast snack", VEGAN, 20, "g", 116, 4.2, 4.3, 10),
+    _food("Walnuts", "fat", "breakfast snack", VEGAN, 15, "g", 98, 2.3, 2, 9.8),
+    _food("Peanut butter", "fat", "breakfast snack", VEGAN, 16, "g", 94, 3.5, 3.2, 8),
+    _food("Chia and flax seeds", "fat", "breakfast snack", VEGAN, 15, "g", 80, 3, 5, 5.5),
+    _food("Hummus", "fat", "snack", VEGAN, 60, "g", 100, 4.8, 8.6, 5.8),
+    _food("Avocado", "fat", "breakfast snack", VEGAN, 100, "g", 160, 2, 8.5, 14.7),
+    # Dairy and alternatives
+    _food("Toned milk", "dairy", "breakfast snack", VEGETARIAN, 250, "ml", 145, 7.8, 11.8, 7.5),
+    _food("Plain curd", "dairy", "breakfast snack", VEGETARIAN, 200, "g", 122, 7, 9.4, 6.6),
+    _food("Buttermilk (chaas)", "dairy", "snack", VEGETARIAN, 250, "ml", 60, 3.5, 5, 2.5),
+    _food("Unsweetened soy milk", "dairy", "breakfast snack", VEGAN, 250, "ml", 100, 8, 4, 5),
+]
+
+
+def normalize_diet(diet_preference: str) -> str:
+    """Map the app's diet preference ("Vegetarian", "Non-Vegetarian", "Vegan") to a diet tag"""
+    diet = diet_preference.strip().lower()
+    if "non" in diet:
+        return NON_VEGETARIAN
+    if "vegan" in diet:
+        return VEGAN
+    if "veg" in diet:
+        return VEGETARIAN
+    return NON_VEGETARIAN
+
+
+class FoodIndex:
+    """
+    Foods indexed by (diet, meal slot, role), plus a nutrient matrix (one row per food,
+    columns in NUTRIENTS order) for vectorized scoring.
+    """
+
+    def __init__(self, foods: Iterable[Food] = FOODS):
+        self.foods: List[Food] = list(foods)
+        self.nutrients = np.array([food.nutrients for food in self.foods], dtype=float)
+        self._index: Dict[Tuple[str, str, str], List[int]] = {}
+        for i, food in enumerate(self.foods):
+            for diet in ALLOWED_IN[food.diet]:
+                for slot in food.slots:
+                    self._index.setdefault((diet, slot, food.role), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+    def lookup(self, diet_preference: str, slot: str, role: str) -> List[int]:
+        """Indices of the foods with this role that suit the diet and meal slot"""
+        return self._index.get((normalize_diet(diet_preference), slot, role), [])
+
+    def foods_for(self, diet_preference: str, slot: str) -> List[Food]:
+        diet = normalize_diet(diet_preference)
+        return [self.foods[i] for (d, s, _), indices in self._index.items() if d == diet and s == slot
+                for i in indices]
@@ -0,0 +1,330 @@
+"""
+Macro-targeting meal selector over the local food database.
+
+Fills the five MealDay slots of each day with foods from food_database.py so the
+day's totals hit the calorie and macro targets from get_nutrition_recommendations
+within tolerance. Each slot follows a meal template (e.g. lunch = protein + carb +
+vegetable) with a few portion sizes per food. All combinations are precomputed once
+per diet and slot type as a nutrient matrix, and a beam search over the slots keeps
+the partial days whose running totals stay closest to the targets. A food is used at
+most once a day, and foods already used earlier in the week are penalized so the
+days vary.
+
+A week takes milliseconds; the LLM only writes the plan around the selected meals.
+
+Usage:
+    python meal_optimizer.py --calories 2800 --protein 142 --carbs 354 --fats 89 --diet Vegetarian
+    python meal_optimizer.py --benchmark 200
+"""
+import argparse
+import itertools
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fitness_models import MealDay
+from food_database import BREAKFAST, MAIN, SNACK, Food, FoodIndex, normalize_diet
+
+WEEK_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# MealDay slots: share of the daily targets and meal template type
+MEAL_SLOTS = ("breakfast", "mid_morning_snack", "lunch", "evening_snack", "dinner")
+SLOT_SHARES = {"breakfast": 0.25, "mid_morning_snack": 0.10, "lunch": 0.30, "evening_snack": 0.10, "dinner": 0.25}
+SLOT_TYPES = {"breakfast": BREAKFAST, "mid_morning_snack": SNACK, "lunch": MAIN, "evening_snack": SNACK,
+              "dinner": MAIN}
+
+# One role is picked per template position; None makes the position optional
+MEAL_TEMPLATES = {
+    BREAKFAST: (("carb",), ("protein", "dairy"), ("fruit", "fat", None)),
+    SNACK: (("fruit", "fat", "dairy", "protein", "carb"), ("fruit", "fat", "dairy", "protein", None)),
+    MAIN: (("protein",), ("carb",), ("vegetable",)),
+}
+PORTION_STEPS = {"protein": (0.5, 1, 1.5, 2, 2.5, 3), "carb": (0.5, 1, 1.5, 2, 2.5, 3), "dairy": (1, 1.5, 2),
+                 "fat": (1, 2)}
+
+# Calories, protein, carbs, fats: relative tolerance per day and weight in the fit
+TOLERANCES = np.array([0.05, 0.10, 0.15, 0.15])
+WEIGHTS = np.array([1.0, 1.0, 0.5, 0.5])
+REPEAT_PENALTY = 1.0  # a food twice in one day
+
+
+def target_vector(calories: float, protein: float, carbs: float, fats: float) -> np.ndarray:
+    return np.array([calories, protein, carbs, fats], dtype=float)
+
+
+def macro_target_vector(macros) -> np.ndarray:
+    """Daily targets from a MacroTargets (or get_nutrition_recommendations dict)"""
+    get = macros.get if isinstance(macros, dict) else lambda name: getattr(macros, name)
+    return target_vector(get("daily_calories"), get("protein_grams"), get("carbs_grams"), get("fats_grams"))
+
+
+@dataclass
+class SlotCandidates:
+    """Every meal a slot type allows for one diet"""
+    items: List[Tuple[Tuple[int, float], ...]]  # (food index, portion multiplier) per food in the meal
+    nutrients: np.ndarray  # (meals, 4)
+    foods: np.ndarray  # (meals, foods) 1 where the meal uses the food
+
+    def closeness(self, expected: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """_error(self.nutrients, expected, target), expanded into two matrix-vector products"""
+        weights = WEIGHTS / target ** 2
+        return (self.nutrients ** 2) @ weights - self.nutrients @ (2 * expected * weights) + (expected ** 2) @ weights
+
+
+@dataclass
+class Shortlist:
+    """The meals of one slot that enter the beam search, with nutrients relative to the targets"""
+    candidates: SlotCandidates
+    indices: np.ndarray
+    nutrients: np.ndarray
+    foods: np.ndarray
+    scaled: np.ndarray
+
+
+@dataclass
+class PlannedMeal:
+    slot: str
+    items: Tuple[Tuple[Food, float], ...]
+    nutrients: np.ndarray
+
+    def describe(self) -> str:
+        foods = " + ".join(food.portion(multiplier) for food, multiplier in self.items)
+        return f"{foods} ({self.nutrients[0]:.0f} kcal, {self.nutrients[1]:.0f} g protein)"
+
+
+@dataclass
+class PlannedDay:
+    day: str
+    meals: List[PlannedMeal]
+    totals: np.ndarray
+    target: np.ndarray
+
+    @property
+    def deviation(self) -> np.ndarray:
+        """Relative deviation of calories, protein, carbs and fats from the targets"""
+        return (self.totals - self.target) / self.target
+
+    def within_tolerance(self, tolerances: np.ndarray = TOLERANCES) -> bool:
+        return bool(np.all(np.abs(self.deviation) <= tolerances))
+
+    def to_meal_day(self) -> MealDay:
+        calories, protein, carbs, fats = self.totals
+        return MealDay(
+            day=self.day,
+            **{meal.slot: meal.describe() for meal in self.meals},
+            total_calories=f"{calories:.0f} kcal",
+            protein_grams=f"{protein:.0f} g",
+            carbs_grams=f"{carbs:.0f} g",
+            fats_grams=f"{fats:.0f} g",
+        )
+
+
+def _error(totals: np.ndarray, expected: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Weighted squared deviation from `expected`, relative to the daily targets"""
+    return ((((totals - expected) / target) ** 2) * WEIGHTS).sum(axis=-1)
+
+
+class MealOptimizer:
+    """
+    Selects a week of meals that hits daily calorie and macro targets.
+
+    Args:
+        index: Food index (default: the built-in food table)
+        beam_width: Partial days kept after each slot
+        candidates_per_slot: Meals per slot considered in the beam, the closest to the slot's share
+        variety_penalty: Score penalty per earlier use of a food in the week
+    """
+
+    def __init__(self, index: Optional[FoodIndex] = None, beam_width: int = 32, candidates_per_slot: int = 300,
+                 variety_penalty: float = 0.002):
+        self.index = index or FoodIndex()
+        self.beam_width = beam_width
+        self.candidates_per_slot = candidates_per_slot
+        self.variety_penalty = variety_penalty
+        self._candidates: Dict[Tuple[str, str], SlotCandidates] = {}
+        self._candidates_lock = threading.Lock()  # the optimizer is shared by the app's sessions
+        self._positions = {food: i for i, food in enumerate(self.index.foods)}
+
+    def candidates(self, diet_preference: str, slot_type: str) -> SlotCandidates:
+        """All meals of a slot type for a diet, built once and cached (thread-safe)"""
+        key = (normalize_diet(diet_preference), slot_type)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            with self._candidates_lock:
+                candidates = self._candidates.get(key)
+                if candidates is None:
+                    candidates = self._candidates[key] = self._build_candidates(*key)
+        return candidates
+
+    def _build_candidates(self, diet: str, slot_type: str) -> SlotCandidates:
+        positions = []
+        for roles in MEAL_TEMPLATES[slot_type]:
+            options = [(i, multiplier) for role in roles if role
+                       for i in self.index.lookup(diet, slot_type, role)
+                       for multiplier in PORTION_STEPS.get(role, (1,))]
+            positions.append(options + ([None] if None in roles else []))
+        items = [tuple(item for item in combination if item is not None)
+                 for combination in itertools.product(*positions)]
+        roles = [role for position in MEAL_TEMPLATES[slot_type] for role in position if role]
+        if len(set(roles)) < len(roles):
+            # Positions sharing a role: drop meals with a food twice and reordered duplicates
+            unique = {}
+            for meal in items:
+                if len({i for i, _ in meal}) == len(meal):
+                    unique.setdefault(frozenset(meal), meal)
+            items = list(unique.values())
+        # (meals, positions) food indices and portion multipliers, padded with multiplier 0
+        width = len(MEAL_TEMPLATES[slot_type])
+        padded = [meal + ((0, 0.0),) * (width - len(meal)) for meal in items]
+        food_ids = np.array([[i for i, _ in meal] for meal in padded], dtype=int)
+        multipliers = np.array([[multiplier for _, multiplier in meal] for meal in padded])
+        nutrients = (self.index.nutrients[food_ids] * multipliers[:, :, None]).sum(axis=1)
+        foods = np.zeros((len(items), len(self.index)), dtype=np.float32)
+        rows = np.repeat(np.arange(len(items)), width).reshape(-1, width)
+        foods[rows[multipliers > 0], food_ids[multipliers > 0]] = 1
+        return SlotCandidates(items, nutrients, foods)
+
+    def shortlist(self, target: np.ndarray, diet_preference: str) -> Dict[str, Shortlist]:
+        """Per slot, the `candidates_per_slot` meals closest to the slot's share of the targets"""
+        shortlists = {}
+        for slot in MEAL_SLOTS:
+            candidates = self.candidates(diet_preference, SLOT_TYPES[slot])
+            closeness = candidates.closeness(target * SLOT_SHARES[slot], target)
+            count = min(self.candidates_per_slot, len(closeness))
+            indices = np.argpartition(closeness, count - 1)[:count]
+            nutrients = candidates.nutrients[indices]
+            shortlists[slot] = Shortlist(candidates, indices, nutrients, candidates.foods[indices],
+                                         nutrients / target)
+        return shortlists
+
+    def plan_day(self, day: str, target: np.ndarray, diet_preference: str,
+                 week_usage: Optional[np.ndarray] = None,
+                 shortlists: Optional[Dict[str, Shortlist]] = None) -> PlannedDay:
+        """
+        Beam search over the slots: after each slot keep the `beam_width` partial days
+        whose running totals are closest to the targets' share so far.
+        """
+        shortlists = shortlists or self.shortlist(target, diet_preference)
+        usage = week_usage if week_usage is not None else np.zeros(len(self.index))
+        totals = np.zeros((1, 4))
+        used = np.zeros((1, len(self.index)), dtype=np.float32)
+        penalty = np.zeros(1)
+        paths: List[List[int]] = [[]]
+        share_so_far = 0.0
+        for slot in MEAL_SLOTS:
+            shortlist = shortlists[slot]
+            share_so_far += SLOT_SHARES[slot]
+            # _error(totals + meal, expected, target) for every (partial day, meal) pair,
+            # expanded as |a|^2 + |c|^2 + 2 a.c so the pairwise term is one small matmul
+            offset = (totals - target * share_so_far) / target
+            error = (((offset ** 2) @ WEIGHTS)[:, None] + ((shortlist.scaled ** 2) @ WEIGHTS)[None, :]
+                     + 2 * (offset * WEIGHTS) @ shortlist.scaled.T)
+            repeats = (used @ shortlist.foods.T) > 0
+            variety = self.variety_penalty * (shortlist.foods @ usage)
+            step_penalty = penalty[:, None] + variety[None, :] + REPEAT_PENALTY * repeats
+            score = error + step_penalty
+            width = min(self.beam_width, score.size)
+            best = np.argpartition(score, width - 1, axis=None)[:width]
+            best = best[np.argsort(score.reshape(-1)[best])]
+            states, meals = np.unravel_index(best, score.shape)
+            totals = totals[states] + shortlist.nutrients[meals]
+            used = used[states] + shortlist.foods[meals]
+            penalty = step_penalty[states, meals]
+            paths = [paths[state] + [int(shortlist.indices[meal])] for state, meal in zip(states, meals)]
+
+        planned = []
+        for slot, meal in zip(MEAL_SLOTS, paths[0]):
+            candidates = shortlists[slot].candidates
+            items = tuple((self.index.foods[i], multiplier) for i, multiplier in candidates.items[meal])
+            planned.append(PlannedMeal(slot, items, candidates.nutrients[meal]))
+        return PlannedDay(day, planned, totals[0], target)
+
+    def plan_week(self, target: np.ndarray, diet_preference: str, days: Sequence[str] = WEEK_DAYS) -> List[PlannedDay]:
+        """Plan every day for the same targets, penalizing foods used on earlier days"""
+        shortlists = self.shortlist(target, diet_preference)
+        usage = np.zeros(len(self.index))
+        week = []
+        for day in days:
+            planned = self.plan_day(day, target, diet_preference, usage, shortlists)
+            for meal in planned.meals:
+                for food, _ in meal.items:
+                    usage[self._positions[food]] += 1
+            week.append(planned)
+        return week
+
+
+# ============================================================================
+# Benchmark / CLI
+# ============================================================================
+
+def run_benchmark(n: int, seed: int = 0) -> Dict[str, float]:
+    """Plan weeks for n random profiles; time per week and share of days within tolerance"""
+    from cohort_calculator import random_profiles, scalar_scores
+
+    profiles = random_profiles(n, seed)
+    diets = np.random.default_rng(seed).choice(["Vegetarian", "Non-Vegetarian", "Vegan"], n)
+    optimizer = MealOptimizer()
+
+    start = time.perf_counter()
+    for diet in ("Vegetarian", "Non-Vegetarian", "Vegan"):
+        for slot_type in MEAL_TEMPLATES:
+            optimizer.candidates(diet, slot_type)
+    build_seconds = time.perf_counter() - start
+
+    within = days = 0
+    start = time.perf_counter()
+    for i in range(n):
+        scores = scalar_scores({name: values[i].item() for name, values in profiles.items()})
+        target = target_vector(scores["daily_calories"], scores["protein_grams"], scores["carbs_grams"],
+                               scores["fats_grams"])
+        week = optimizer.plan_week(target, str(diets[i]))
+        within += sum(day.within_tolerance() for day in week)
+        days += len(week)
+    return {
+        "weeks": n,
+        "build_ms": build_seconds * 1000,
+        "ms_per_week": (time.perf_counter() - start) * 1000 / n,
+        "days_within_tolerance": within / days,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calories", type=float, default=2800)
+    parser.add_argument("--protein", type=float, default=142)
+    parser.add_argument("--carbs", type=float, default=354)
+    parser.add_argument("--fats", type=float, default=89)
+    parser.add_argument("--diet", default="Vegetarian", help="Vegetarian, Non-Vegetarian or Vegan")
+    parser.add_argument("--benchmark", type=int, metavar="PROFILES", help="Benchmark on this many random profiles")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        result = run_benchmark(args.benchmark)
+        print(f"{result['weeks']:,} weeks (candidate tables built in {result['build_ms']:.0f} ms)")
+        print(f"  {result['ms_per_week']:.1f} ms per week")
+        print(f"  days within tolerance: {result['days_within_tolerance']:.1%}")
+        return 0
+
+    target = target_vector(args.calories, args.protein, args.carbs, args.fats)
+    optimizer = MealOptimizer()
+    start = time.perf_counter()
+    optimizer.plan_week(target, args.diet)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    week = optimizer.plan_week(target, args.diet)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for day in week:
+        print(f"{day.day}: {day.totals[0]:.0f} kcal, P {day.totals[1]:.0f} g, C {day.totals[2]:.0f} g, "
+              f"F {day.totals[3]:.0f} g {'(within tolerance)' if day.within_tolerance() else '(OUT OF TOLERANCE)'}")
+        for meal in day.meals:
+            print(f"  {meal.slot}: {meal.describe()}")
+    print(f"Planned in {elapsed_ms:.1f} ms ({first_ms:.0f} ms on first use, which builds the candidate tables)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Compact hand-off between the fitness planning phases.
+
+Instead of the whole profile plus the calculator agents' prose in every later prompt,
+each phase gets only the profile fields it uses (one line) and the calculated metrics as
+one compact typed record:
+
+    fitness_metrics   ──> "BMI 24.71 (Normal weight); split: Push/Pull/Legs; ..."  ──> exercise_plan
+    nutrition_metrics ──> "2800 kcal/day: protein 142 g (20%), ...; TDEE 2435 kcal" ──> diet_plan
+
+In agent mode the typed records are rebuilt from the calculator tools' outputs, so the
+narration around them is dropped too. PromptTokens counts what every phase sends.
+"""
+import ast
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Type, Union
+
+from pydantic import BaseModel, ValidationError
+
+from fitness_calculators import FitnessMetrics, NutritionMetrics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import count_tokens
+
+# How each profile field is written into a prompt
+PROFILE_FIELDS = {
+    "name": "Name: {}",
+    "gender": "{}",
+    "age": "{} years",
+    "weight": "{} kg",
+    "height": "{} cm",
+    "body_fat": "{}% body fat",
+    "muscle_strength": "muscle strength {} N",
+    "diet_preference": "Diet: {}",
+    "goal": "Goal: {}",
+    "medical_condition": "Medical conditions: {}",
+}
+
+# Profile fields each phase uses (the metrics already carry BMI, TDEE and the targets)
+FITNESS_CALCULATOR_PROFILE = ("weight", "height", "body_fat", "goal")
+NUTRITION_CALCULATOR_PROFILE = ("gender", "age", "weight", "height", "diet_preference", "goal")
+EXERCISE_PROFILE = ("name", "gender", "age", "weight", "height", "body_fat", "muscle_strength", "goal",
+                    "medical_condition")
+DIET_PROFILE = ("name", "gender", "age", "weight", "diet_preference", "goal", "medical_condition")
+SYNTHESIS_PROFILE = ("name", "gender", "age", "goal", "medical_condition")
+
+
+def profile_context(user_data: dict, fields: Iterable[str]) -> str:
+    """The given profile fields on one line, skipping blank ones"""
+    parts = [PROFILE_FIELDS[field].format(" ".join(str(user_data[field]).split())) for field in fields
+             if str(user_data.get(field, "")).strip()]
+    return "; ".join(parts)
+
+
+def compact_metrics(metrics: Union[BaseModel, str]) -> str:
+    """Calculated metrics for a planner prompt, without the fields that repeat others"""
+    if isinstance(metrics, FitnessMetrics):
+        bmi, recommendations = metrics.bmi, metrics.exercise_recommendations
+        return (f"BMI {bmi.bmi:g} ({bmi.category}); split: {recommendations.workout_split}; "
+                f"frequency: {recommendations.frequency}; reps: {recommendations.rep_range}; "
+                f"cardio: {recommendations.cardio}; rest: {recommendations.rest}")
+    if isinstance(metrics, NutritionMetrics):
+        energy, macros = metrics.energy, metrics.macro_targets
+        return (f"{macros.daily_calories:.0f} kcal/day: protein {macros.protein_grams:.0f} g "
+                f"({macros.protein_percent:.0f}%), carbs {macros.carbs_grams:.0f} g ({macros.carbs_percent:.0f}%), "
+                f"fats {macros.fats_grams:.0f} g ({macros.fats_percent:.0f}%); "
+                f"TDEE {energy.tdee:.0f} kcal, BMR {energy.bmr:.0f} kcal")
+    if isinstance(metrics, BaseModel):
+        return metrics.model_dump_json()
+    return " ".join(str(metrics).split())
+
+
+def _tool_output(item: Any) -> Any:
+    """A tool call's return value, parsed back to a dict if it was stringified"""
+    if getattr(item, "type", None) != "tool_call_output_item":
+        return None
+    output = item.output
+    if isinstance(output, str):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                return parse(output)
+            except (ValueError, SyntaxError):
+                pass
+    return output
+
+
+def metrics_from_run(result: Any, metrics_type: Type[BaseModel]) -> Union[BaseModel, str]:
+    """
+    Rebuild typed metrics (FitnessMetrics / NutritionMetrics) from the tool outputs of a
+    calculator agent run; falls back to the agent's final output if a tool wasn't called.
+    """
+    outputs = [output for output in map(_tool_output, getattr(result, "new_items", [])) if isinstance(output, dict)]
+    parts = {}
+    for name, field in metrics_type.model_fields.items():
+        required = set(field.annotation.model_fields)
+        for output in outputs:
+            if required <= output.keys():
+                parts[name] = output  # the last call wins when a tool was called again
+    try:
+        return metrics_type.model_validate(parts)
+    except ValidationError:
+        return result.final_output
+
+
+class PromptTokens:
+    """Prompt tokens sent per phase of one plan (phase prompts only, not agent instructions)"""
+
+    def __init__(self):
+        self.by_phase: Dict[str, int] = {}
+
+    def record(self, phase: str, prompt: str) -> str:
+        """Count a prompt under its phase and return it unchanged"""
+        self.by_phase[phase] = self.by_phase.get(phase, 0) + count_tokens(prompt)
+        return prompt
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_phase.values())
+
+    def summary(self) -> str:
+        return ", ".join(f"{phase} {tokens:,}" for phase, tokens in self.by_phase.items()) + f" (total {self.total:,})"
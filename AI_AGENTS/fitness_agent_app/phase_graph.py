@@ -0,0 +1,159 @@
+"""
+Small dependency-graph executor for the planning phases.
+
+Each phase is an async function that receives the results of the phases it depends
+on. Phases start as soon as their dependencies have finished, so independent phases
+(e.g. the fitness and nutrition calculators) run concurrently:
+
+    fitness_metrics  ──> exercise_plan ──┐
+                                         ├──> report
+    nutrition_metrics ──> diet_plan ─────┘
+
+`stream()` yields a PhaseEvent whenever a phase starts or finishes (with its result),
+so callers can show each result as soon as it is ready.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Sequence
+
+PhaseFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class PhaseTiming:
+    """When a phase started and finished, in seconds since the graph started"""
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass
+class PhaseEvent:
+    """A phase started or finished; `elapsed` is seconds since the graph started"""
+    phase: str
+    status: Literal["started", "finished"]
+    elapsed: float
+    duration: Optional[float] = None  # finished events only
+    result: Any = None  # finished events only
+
+
+@dataclass
+class _Phase:
+    name: str
+    run: PhaseFunction
+    depends_on: List[str] = field(default_factory=list)
+
+
+class PhaseGraph:
+    """
+    Runs async phases in dependency order, concurrently where possible.
+
+    Example:
+        graph = PhaseGraph()
+        graph.add("metrics", compute_metrics)
+        graph.add("plan", lambda deps: make_plan(deps["metrics"]), depends_on=["metrics"])
+        results = await graph.run()
+    """
+
+    def __init__(self):
+        self._phases: Dict[str, _Phase] = {}
+        self.timings: List[PhaseTiming] = []
+        self.total_seconds = 0.0
+
+    def add(self, name: str, run: PhaseFunction, depends_on: Sequence[str] = ()) -> "PhaseGraph":
+        if name in self._phases:
+            raise ValueError(f"Phase '{name}' is already defined")
+        self._phases[name] = _Phase(name, run, list(depends_on))
+        return self
+
+    def _order(self) -> List[str]:
+        """Phase names in a valid execution order; raises ValueError on unknown or cyclic dependencies"""
+        order, state = [], {}  # state: 1 = visiting, 2 = done
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cyclic phase dependency: {' -> '.join(path + [name])}")
+            if name not in self._phases:
+                raise ValueError(f"Phase '{path[-1]}' depends on unknown phase '{name}'")
+            state[name] = 1
+            for dependency in self._phases[name].depends_on:
+                visit(dependency, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self._phases:
+            visit(name, [])
+        return order
+
+    def __len__(self) -> int:
+        return len(self._phases)
+
+    async def stream(self) -> AsyncIterator[PhaseEvent]:
+        """
+        Run every phase once, yielding an event when each phase starts and finishes.
+
+        If a phase fails, the phases still running are cancelled and the error is raised.
+        """
+        order = self._order()
+        start = time.perf_counter()
+        self.timings = []
+        tasks: Dict[str, asyncio.Task] = {}
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run_phase(phase: _Phase):
+            dependencies = {name: await tasks[name] for name in phase.depends_on}
+            started = time.perf_counter() - start
+            events.put_nowait(PhaseEvent(phase.name, "started", started))
+            result = await phase.run(dependencies)
+            finished = time.perf_counter() - start
+            self.timings.append(PhaseTiming(phase.name, started, finished))
+            events.put_nowait(PhaseEvent(phase.name, "finished", finished, finished - started, result))
+            return result
+
+        for name in order:
+            tasks[name] = asyncio.create_task(run_phase(self._phases[name]))
+        all_done = asyncio.ensure_future(asyncio.gather(*tasks.values()))
+        try:
+            while True:
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({next_event, all_done}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    yield next_event.result()
+                    continue
+                next_event.cancel()
+                all_done.result()  # raises the first phase error
+                while not events.empty():
+                    yield events.get_nowait()
+                break
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(all_done, *tasks.values(), return_exceptions=True)
+            self.total_seconds = time.perf_counter() - start
+            self.timings.sort(key=lambda timing: timing.started)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every phase once and return their results by phase name.
+
+        If a phase fails, the phases still running are cancelled and the error is raised.
+        """
+        results = {}
+        async for event in self.stream():
+            if event.status == "finished":
+                results[event.phase] = event.result
+        return results
+
+    def summary(self) -> str:
+        """Per-phase timings plus how much faster the run was than running them one by one"""
+        lines = [f"{t.name}: {t.duration:.1f}s (started at {t.started:.1f}s)" for t in self.timings]
+        serial = sum(t.duration for t in self.timings)
+        lines.append(f"Total: {self.total_seconds:.1f}s (sequential would take ~{serial:.1f}s)")
+        return "\n".join(lines)
@@ -0,0 +1,258 @@
+"""
+Profile-bucketed plan template cache.
+
+Users with similar profiles (same goal, diet preference, gender, age band and BMI
+band) get nearly identical plans, so the full multi-agent run happens once per
+profile bucket. Its plans are stored as a template in SQLite and every other user in
+the bucket only gets cheap, deterministic personalization:
+
+- name
+- exact daily calorie and macro targets (from the local calculators); the meals and
+  their per-day totals stay the template's
+- medical-condition notes
+
+Templates are also keyed by the generation mode (e.g. day-by-day or food-database
+generation), expire after `max_age_seconds`, and the least recently used ones are
+evicted beyond `max_entries`.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from fitness_calculators import compute_fitness_metrics, compute_nutrition_metrics
+from fitness_models import ComprehensiveReport, DietPlan, ExercisePlan, PlanTriple, dump_plans, load_plans
+
+# Name and medical condition of the profile a template is generated for
+TEMPLATE_USER_NAME = "Member"
+NO_MEDICAL_CONDITION = "None"
+
+
+# ============================================================================
+# Profile buckets
+# ============================================================================
+
+def _goal_category(goal: str) -> str:
+    """Same keyword rules as the calculators: muscle gain, fat loss or general fitness"""
+    goal = goal.lower()
+    if "muscle" in goal:
+        return "muscle_gain"
+    if "fat" in goal or "loss" in goal:
+        return "fat_loss"
+    return "general_fitness"
+
+
+def _band(value: float, edges: Sequence[float]) -> int:
+    """Index of the band `value` falls in, given ascending band edges"""
+    return sum(value >= edge for edge in edges)
+
+
+def has_medical_condition(user_data: dict) -> bool:
+    condition = str(user_data.get('medical_condition') or "").strip().lower()
+    return condition not in ("", "none", "no", "n/a", "-")
+
+
+@dataclass(frozen=True)
+class ProfileBucket:
+    """
+    Which profile attributes make two users share a plan template.
+
+    Args:
+        fields: Attributes in the key; any of goal, diet_preference, gender, age_band,
+                bmi_band, medical_condition
+        age_band_years: Width of the age bands
+        bmi_edges: BMI band edges (default: the BMI category thresholds)
+    """
+    fields: Tuple[str, ...] = ("goal", "diet_preference", "gender", "age_band", "bmi_band")
+    age_band_years: int = 10
+    bmi_edges: Tuple[float, ...] = (18.5, 25.0, 30.0)
+
+    def key(self, user_data: dict) -> str:
+        height_m = float(user_data['height']) / 100
+        bmi = float(user_data['weight']) / (height_m ** 2)
+        age_start = int(user_data['age']) // self.age_band_years * self.age_band_years
+        values = {
+            "goal": _goal_category(user_data['goal']),
+            "diet_preference": str(user_data['diet_preference']).strip().lower(),
+            "gender": str(user_data['gender']).strip().lower(),
+            "age_band": f"{age_start}-{age_start + self.age_band_years - 1}",
+            "bmi_band": str(_band(bmi, self.bmi_edges)),
+            "medical_condition": str(user_data.get('medical_condition') or "").strip().lower(),
+        }
+        return "|".join(f"{name}={values[name]}" for name in self.fields)
+
+    def template_profile(self, user_data: dict) -> dict:
+        """The profile a bucket's template is generated for: anonymous, no medical notes unless keyed on them"""
+        profile = dict(user_data, name=TEMPLATE_USER_NAME)
+        if "medical_condition" not in self.fields:
+            profile['medical_condition'] = NO_MEDICAL_CONDITION
+        return profile
+
+
+# ============================================================================
+# Personalization
+# ============================================================================
+
+def _medical_note(user_data: dict, bucket: ProfileBucket) -> Optional[str]:
+    """Note for users whose medical condition the template was not generated for"""
+    if not has_medical_condition(user_data) or "medical_condition" in bucket.fields:
+        return None
+    return (f"Medical conditions ({user_data['medical_condition']}): review this plan with your doctor "
+            f"before starting and adapt exercises, intensity and foods as advised.")
+
+
+def personalize_exercise_plan(plan: ExercisePlan, user_data: dict, bucket: ProfileBucket) -> ExercisePlan:
+    plan = plan.model_copy(deep=True)
+    plan.user_name = user_data['name']
+    note = _medical_note(user_data, bucket)
+    if note:
+        plan.safety_precautions.insert(0, note)
+    return plan
+
+
+def personalize_diet_plan(plan: DietPlan, user_data: dict, bucket: ProfileBucket) -> DietPlan:
+    """Restate the daily targets; each day keeps the totals of its (unchanged) meals"""
+    plan = plan.model_copy(deep=True)
+    macros = compute_nutrition_metrics(user_data).macro_targets
+    plan.user_name = user_data['name']
+    plan.daily_calorie_target = f"{macros.daily_calories:.0f} kcal"
+    plan.macronutrient_split = (f"Protein {macros.protein_grams:.0f} g ({macros.protein_percent:.0f}%), "
+                                f"Carbs {macros.carbs_grams:.0f} g ({macros.carbs_percent:.0f}%), "
+                                f"Fats {macros.fats_grams:.0f} g ({macros.fats_percent:.0f}%)")
+    note = _medical_note(user_data, bucket)
+    if note:
+        plan.meal_timing_guidelines = f"{plan.meal_timing_guidelines}\n\n{note}"
+    return plan
+
+
+def personalize_report(report: ComprehensiveReport, user_data: dict, bucket: ProfileBucket) -> ComprehensiveReport:
+    report = report.model_copy(deep=True)
+    fitness = compute_fitness_metrics(user_data)
+    nutrition = compute_nutrition_metrics(user_data)
+    report.user_profile_analysis = (
+        f"{user_data['name']}: BMI {fitness.bmi.bmi} ({fitness.bmi.category}), "
+        f"TDEE {nutrition.energy.tdee:.0f} kcal, daily target {nutrition.macro_targets.daily_calories:.0f} kcal. "
+        f"{report.user_profile_analysis}"
+    )
+    note = _medical_note(user_data, bucket)
+    if note:
+        report.safety_reminders.insert(0, note)
+    return report
+
+
+# Personalization per plan phase, in (exercise_plan, diet_plan, comprehensive_report) order
+PERSONALIZERS = {
+    "exercise_plan": personalize_exercise_plan,
+    "diet_plan": personalize_diet_plan,
+    "comprehensive_report": personalize_report,
+}
+
+
+def personalize(plans: PlanTriple, user_data: dict, bucket: ProfileBucket) -> PlanTriple:
+    """Apply one user's name, exact targets and medical notes to a bucket template"""
+    return tuple(personalizer(plan, user_data, bucket) for plan, personalizer in zip(plans, PERSONALIZERS.values()))
+
+
+# ============================================================================
+# Persistent template store
+# ============================================================================
+
+class PlanTemplateCache:
+    """
+    SQLite-backed plan templates keyed by profile bucket and generation mode.
+
+    Args:
+        path: SQLite database file (":memory:" for a per-process cache)
+        bucket: How profiles are grouped into buckets
+        max_entries: Templates kept; the least recently used are evicted beyond this
+        max_age_seconds: Templates older than this are regenerated
+    """
+
+    def __init__(self, path: str, bucket: ProfileBucket = ProfileBucket(), max_entries: int = 500,
+                 max_age_seconds: float = 30 * 24 * 3600):
+        self.path = path
+        self.bucket = bucket
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._generation_locks = weakref.WeakKeyDictionary()  # event loop -> {template key: asyncio.Lock}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS plan_templates ("
+            " bucket TEXT PRIMARY KEY, plans TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used_at REAL NOT NULL, uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+
+    def key(self, user_data: dict, mode: str = "") -> str:
+        """Template key: the user's profile bucket plus the generation mode"""
+        return f"{self.bucket.key(user_data)}|mode={mode}" if mode else self.bucket.key(user_data)
+
+    def generation_lock(self, user_data: dict, mode: str = "") -> asyncio.Lock:
+        """
+        The lock held while a template is generated, shared by every system using this
+        cache, so concurrent users of one bucket and mode wait for a single generation.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            locks = self._generation_locks.setdefault(loop, {})
+            return locks.setdefault(self.key(user_data, mode), asyncio.Lock())
+
+    def get(self, user_data: dict, mode: str = "") -> Optional[PlanTriple]:
+        """The template for this user's bucket and generation mode, or None if there is no fresh one"""
+        key = self.key(user_data, mode)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT plans, created_at FROM plan_templates WHERE bucket = ?",
+                                   (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE plan_templates SET last_used_at = ?, uses = uses + 1 WHERE bucket = ?",
+                             (now, key))
+            self._db.commit()
+            self.hits += 1
+        return load_plans(row[0])
+
+    def put(self, user_data: dict, plans: PlanTriple, mode: str = ""):
+        """Store the template for this user's bucket and mode; evict expired / least recently used templates"""
+        payload = dump_plans(plans)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO plan_templates (bucket, plans, created_at, last_used_at, uses)"
+                " VALUES (?, ?, ?, ?, 0)",
+                (self.key(user_data, mode), payload, now, now),
+            )
+            self._db.execute("DELETE FROM plan_templates WHERE created_at < ?", (now - self.max_age_seconds,))
+            self._db.execute(
+                "DELETE FROM plan_templates WHERE bucket NOT IN"
+                " (SELECT bucket FROM plan_templates ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM plan_templates").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM plan_templates")
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return f"{len(self)} templates, {self.hits} hits / {self.misses} misses ({self.hit_rate:.0%})"
@@ -0,0 +1,137 @@
+"""
+Persistent store of generated fitness plans.
+
+Every generated (exercise_plan, diet_plan, comprehensive_report) is saved to SQLite,
+keyed by a hash of the normalized profile and the generation options it was made with, so revisiting, downloading again or a
+browser refresh re-renders the saved plan instead of paying for a new LLM run.
+
+Plans expire after `max_age_seconds`, and the least recently used ones are evicted
+beyond `max_entries`.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fitness_models import PlanTriple, dump_plans, load_plans
+
+
+def normalize_profile(user_data: dict) -> dict:
+    """Profile values as compared for reuse: trimmed, case- and whitespace-insensitive text, rounded numbers"""
+    normalized = {}
+    for name, value in user_data.items():
+        if isinstance(value, bool) or value is None:
+            normalized[name] = value
+        elif isinstance(value, (int, float)):
+            normalized[name] = round(float(value), 1)
+        else:
+            normalized[name] = " ".join(str(value).split()).lower()
+    return normalized
+
+
+def profile_key(user_data: dict, options: Optional[dict] = None) -> str:
+    """SHA-256 of the normalized profile and generation options (e.g. day-by-day, food database)"""
+    payload = json.dumps([normalize_profile(user_data), normalize_profile(options or {})], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoredPlan:
+    key: str
+    plans: PlanTriple
+    created_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+
+class PlanStore:
+    """
+    SQLite-backed generated plans keyed by profile and generation options hash.
+
+    Args:
+        path: SQLite database file (":memory:" for a per-process store)
+        max_entries: Plans kept; the least recently used are evicted beyond this
+        max_age_seconds: Plans older than this are no longer returned
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, max_age_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            " profile_key TEXT PRIMARY KEY, plans TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    key = staticmethod(profile_key)
+
+    def get_by_key(self, key: str) -> Optional[StoredPlan]:
+        """The saved plan for a profile key, or None if there is no fresh one"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT plans, created_at FROM plans WHERE profile_key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE plans SET last_used_at = ? WHERE profile_key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+        return StoredPlan(key, load_plans(row[0]), row[1])
+
+    def get(self, user_data: dict, options: Optional[dict] = None) -> Optional[StoredPlan]:
+        """The saved plan for this profile and options, or None if there is no fresh one"""
+        return self.get_by_key(self.key(user_data, options))
+
+    def put(self, user_data: dict, plans: PlanTriple, options: Optional[dict] = None) -> str:
+        """Save the plan for this profile and options, evicting expired / least recently used plans; returns its key"""
+        key = self.key(user_data, options)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO plans (profile_key, plans, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, dump_plans(plans), now, now),
+            )
+            self._db.execute("DELETE FROM plans WHERE created_at < ?", (now - self.max_age_seconds,))
+            self._db.execute(
+                "DELETE FROM plans WHERE profile_key NOT IN"
+                " (SELECT profile_key FROM plans ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+        return key
+
+    def delete(self, user_data: dict, options: Optional[dict] = None):
+        with self._lock:
+            self._db.execute("DELETE FROM plans WHERE profile_key = ?", (self.key(user_data, options),))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM plans")
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return f"{len(self)} saved plans, {self.hits} hits / {self.misses} misses ({self.hit_rate:.0%})"
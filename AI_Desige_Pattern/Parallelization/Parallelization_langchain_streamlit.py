@@ -1,5 +1,5 @@
 import os
-import asyncio
+import sys
 from typing import Optional
 import streamlit as st
 from langchain_groq import ChatGroq
@@ -8,26 +8,31 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import Runnable, RunnableParallel, RunnablePassthrough
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import get_background_loop
 load_dotenv(override=True)
 
 # --- Configuration ---
 # Ensure your API key environment variable is set (e.g., OPENAI_API_KEY)
-try:
-#    llm: Optional[ChatOpenAI] = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-    
-    llm: Optional[ChatGroq] = ChatGroq(
-    model="qwen/qwen3-32b",
-    temperature=0.7,
-    max_tokens=None,
-    reasoning_format="parsed",
-    timeout=None,
-    max_retries=2,
-    # other params...
-)
-  
-except Exception as e:
-   print(f"Error initializing language model: {e}")
-   llm = None
+# The model is cached per server process so its HTTP connections stay warm across reruns
+@st.cache_resource
+def get_llm() -> Optional[ChatGroq]:
+    try:
+        # return ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+        return ChatGroq(
+            model="qwen/qwen3-32b",
+            temperature=0.7,
+            max_tokens=None,
+            reasoning_format="parsed",
+            timeout=None,
+            max_retries=2,
+            # other params...
+        )
+    except Exception as e:
+        print(f"Error initializing language model: {e}")
+        return None
+
+llm = get_llm()
 
 # --- Define Independent Chains ---
 # These three chains represent distinct tasks that can be executed in parallel.
@@ -143,6 +148,7 @@ def main():
         else:
             st.error("❌ LLM not initialized")
             st.write("Please check your API key configuration")
+        st.caption(f"⚙️ Event loop: {get_background_loop().summary()}")
     
     # Main interface
     st.header("📝 Topic Input")
@@ -159,9 +165,9 @@ def main():
             return
         
         with st.spinner("Running parallel analysis..."):
-            # Run the async function
+            # Run the async function on the shared background event loop
             try:
-                results = asyncio.run(run_parallel_analysis(topic))
+                results = get_background_loop().run(run_parallel_analysis(topic))
             except Exception as e:
                 st.error(f"Error running analysis: {e}")
                 return
@@ -0,0 +1,168 @@
+"""
+Market research for a whole product portfolio in one run.
+
+    python batch_research.py products.csv -o reports.jsonl --concurrency 4 --rpm 30
+
+Products come from a CSV file (header: product_name, product_category, target_market,
+region) or a JSON list of objects with the same keys; region defaults to North America.
+
+All products run at once, each through its own MarketResearchPlanningSystem, and every
+LLM call (planner, executor agent, synthesizer) takes a slot from one shared CallLimiter,
+so the portfolio stays within the provider's concurrency and rate limits. Waiting calls
+of later stages go first, so products finish one after another instead of all at the
+end. Each FinalReport is appended to the output JSONL file as soon as it is ready,
+together with the product's timings; a failed product is recorded with its error and
+doesn't stop the others.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from openai_agent_planning import MarketResearchPlanningSystem, ResearchRun, ResearchTimings, llm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import CallLimiter, get_tool_cache
+
+# ============================================================================
+# STEP 1: Load product definitions
+# ============================================================================
+
+class Product(BaseModel):
+    """One product to research"""
+    product_name: str
+    product_category: str
+    target_market: str
+    region: str = "North America"
+
+def load_products(path: str) -> List[Product]:
+    """Products from a .csv or .json file; raises ValueError naming the first invalid entry"""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("products", [])
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    products = []
+    for number, row in enumerate(rows, start=1):
+        row = {key.strip(): value.strip() if isinstance(value, str) else value
+               for key, value in row.items() if key and value not in (None, "")}
+        try:
+            products.append(Product(**row))
+        except ValidationError as e:
+            raise ValueError(f"{path}: product {number} is invalid: {e}") from e
+    return products
+
+# ============================================================================
+# STEP 2: Run one product, streaming its result to disk
+# ============================================================================
+
+@dataclass
+class ProductRun:
+    """Outcome of one product's research"""
+    product: Product
+    timings: ResearchTimings = field(default_factory=ResearchTimings)
+    report: Optional[BaseModel] = None
+    context_tokens: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_record(self) -> dict:
+        timings = asdict(self.timings)
+        timings["synthesis"] = self.timings.synthesis
+        return {
+            **self.product.model_dump(),
+            "ok": self.ok,
+            "error": self.error,
+            "timings": timings,
+            "context_tokens": self.context_tokens,
+            "report": self.report.model_dump() if self.report is not None else None,
+        }
+
+async def research_product(product: Product, limiter: CallLimiter, max_concurrency: int = 4) -> ProductRun:
+    """One product through the planning workflow; errors are recorded, not raised"""
+    system = MarketResearchPlanningSystem(llm=llm, max_concurrency=max_concurrency, llm_limiter=limiter)
+    run, research = ProductRun(product), ResearchRun()
+    try:
+        async for event in system.stream_research(product.product_name, product.product_category,
+                                                  product.target_market, product.region, research):
+            if event.kind == "report_ready":
+                run.report = event.data
+        run.context_tokens = research.context.tokens if research.context else None
+    except Exception as e:
+        run.error = f"{type(e).__name__}: {e}"
+    run.timings = research.timings
+    return run
+
+# ============================================================================
+# STEP 3: Run the portfolio under one shared limiter
+# ============================================================================
+
+async def run_batch(products: List[Product], output_path: str, max_concurrency: int = 4,
+                    requests_per_minute: Optional[float] = None) -> List[ProductRun]:
+    """
+    Research every product concurrently, appending each product's record to
+    output_path (JSONL) as soon as it finishes. Returns the runs in finishing order.
+    """
+    limiter = CallLimiter(max_concurrency=max_concurrency, requests_per_minute=requests_per_minute)
+    start = time.perf_counter()
+    runs = []
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out:
+        tasks = [asyncio.ensure_future(research_product(product, limiter, max_concurrency))
+                 for product in products]
+        try:
+            for next_run in asyncio.as_completed(tasks):
+                run = await next_run
+                runs.append(run)
+                out.write(json.dumps(run.to_record(), default=str) + "\n")
+                out.flush()
+                status = f"{run.timings.total:.2f}s" if run.ok else run.error
+                print(f"  {'✓' if run.ok else '✗'} [{len(runs)}/{len(products)}] "
+                      f"{run.product.product_name}: {status} (at {time.perf_counter() - start:.2f}s)")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    wall = time.perf_counter() - start
+    finished = [run.timings.total for run in runs if run.ok]
+    print("-" * 80)
+    print(f"{len(finished)}/{len(runs)} reports in {wall:.2f}s -> {output_path}")
+    if finished:
+        print(f"  slowest product {max(finished):.2f}s, sequential would take ~{sum(finished):.2f}s")
+    print(f"  LLM calls: {limiter.summary()}")
+    print(f"  Tool cache: {get_tool_cache().summary()}")
+    return runs
+
+# ============================================================================
+# STEP 4: Command line
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Market research for every product in a CSV/JSON file")
+    parser.add_argument("products", help="CSV or JSON file of product definitions")
+    parser.add_argument("-o", "--output", default="reports.jsonl", help="JSONL file the reports are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight at once")
+    parser.add_argument("--rpm", type=float, default=None, help="LLM calls started per minute (default: no limit)")
+    args = parser.parse_args()
+
+    products = load_products(args.products)
+    print("=" * 80)
+    print(f"BATCH MARKET RESEARCH: {len(products)} products")
+    print("=" * 80)
+    asyncio.run(run_batch(products, args.output, args.concurrency, args.rpm))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Research dataset lookup benchmark.
+
+Generates synthetic market sizes, competitors and regulations tables at realistic volumes,
+writes them as CSV (or Parquet), loads them into a MarketDataset (research_data.py) and
+reports:
+
+- load time and rows
+- per-call latency (p50 / p95 / max) of market(), competitors() and regulations() for
+  exact category names, aliases, free-text descriptions ("AI-powered ... app for small
+  teams") and misspellings, on the first call per query (cold) and repeated (warm)
+- the same free-text lookups against the raw rows without indexes (fuzzy match over
+  every category name, then a scan of every row), for comparison
+
+Usage:
+    python benchmark_research_data.py --categories 2000 --regions 8 --competitors 20
+    python benchmark_research_data.py --categories 500 2000 10000 --format parquet --output results.json
+    python benchmark_research_data.py --max-warm-p95-us 100
+"""
+import argparse
+import csv
+import difflib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List
+
+from research_data import MarketDataset, normalize
+
+WORDS = ["Fitness", "Nutrition", "Sleep", "Meditation", "Budgeting", "Payroll", "Invoicing", "Tax", "Insurance",
+         "Lending", "Telehealth", "Dental", "Pharmacy", "Pet Care", "Childcare", "Tutoring", "Language",
+         "Recruiting", "Onboarding", "Scheduling", "Inventory", "Logistics", "Fleet", "Parking", "Charging",
+         "Solar", "Heating", "Security", "Backup", "Analytics", "Marketing", "Email", "Chat", "Video", "Podcast",
+         "Music", "Gaming", "Travel", "Hotel", "Restaurant", "Grocery", "Meal Kit", "Fashion", "Beauty", "Furniture",
+         "Gardening", "Real Estate", "Construction", "Legal", "Accounting", "Event", "Ticketing", "Donation",
+         "Volunteer", "Wedding", "Dating", "Carpool", "Bike Sharing", "Laundry", "Cleaning"]
+KINDS = ["Apps", "Software", "Devices", "Services", "Platforms", "Marketplaces"]
+REGIONS = ["North America", "Europe", "Asia Pacific", "Latin America", "Middle East", "Africa", "Oceania",
+           "South Asia", "Nordics", "DACH", "Benelux", "Iberia"]
+RISKS = ["Low", "Medium", "High"]
+
+
+# ============================================================================
+# Synthetic datasets
+# ============================================================================
+
+def generate_tables(num_categories: int, num_regions: int, competitors_per_category: int,
+                    regulations_per_category: int, seed: int = 0) -> Dict[str, List[Dict[str, str]]]:
+    rng = random.Random(seed)
+    regions = REGIONS[:num_regions]
+    combos = [(a, b, kind) for a in WORDS for b in WORDS if a != b for kind in KINDS]
+    rng.shuffle(combos)
+    if num_categories > len(combos):
+        raise ValueError(f"At most {len(combos)} synthetic categories")
+
+    markets, competitors, regulations = [], [], []
+    for a, b, kind in combos[:num_categories]:
+        category = f"{a} {b} {kind}"
+        aliases = f"{a} {b};{a} and {b} {kind}"
+        for region in ["Global", *regions]:
+            markets.append({"category": category, "aliases": aliases, "region": region,
+                            "market_size_usd_bn": f"{rng.uniform(0.1, 80):.1f}", "cagr_pct": f"{rng.uniform(2, 30):.1f}",
+                            "key_trends": ";".join(f"{a} trend {i}" for i in range(4)),
+                            "target_demographics": ";".join(f"{b} segment {i}" for i in range(3))})
+        for i in range(competitors_per_category):
+            competitors.append({"category": category, "region": rng.choice(["Global", *regions]),
+                                "competitor": f"{a}{b}Co {i}".replace(" ", ""),
+                                "market_share_pct": f"{rng.uniform(0.5, 30):.1f}", "positioning": f"{kind} vendor",
+                                "strengths": ";".join(rng.sample(["Brand", "Price", "UX", "Distribution",
+                                                                  "Integrations"], 2)),
+                                "weaknesses": ";".join(rng.sample(["Support", "Pricing", "Mobile", "Onboarding",
+                                                                   "Reliability"], 2))})
+        for i in range(regulations_per_category):
+            regulations.append({"category": category, "region": rng.choice(regions),
+                                "regulation": f"{a} {b} rule {i}", "requirements": "Audit;Disclosure;Reporting",
+                                "risk_level": rng.choice(RISKS), "setup_cost_usd_k": str(rng.randint(10, 300)),
+                                "annual_cost_usd_k": str(rng.randint(5, 90))})
+    for region in regions:  # region-wide rules, as for privacy law
+        for i in range(5):
+            regulations.append({"category": "*", "region": region, "regulation": f"{region} privacy rule {i}",
+                                "requirements": "Consent;Deletion", "risk_level": "Medium",
+                                "setup_cost_usd_k": "40", "annual_cost_usd_k": "15"})
+    return {"market_sizes": markets, "competitors": competitors, "regulations": regulations}
+
+
+def write_tables(tables: Dict[str, List[Dict[str, str]]], directory: str, file_format: str = "csv"):
+    for name, rows in tables.items():
+        path = os.path.join(directory, f"{name}.{file_format}")
+        if file_format == "parquet":
+            import pandas as pd
+
+            pd.DataFrame(rows).to_parquet(path, index=False)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+def queries(tables: Dict[str, List[Dict[str, str]]], count: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Category queries of each kind, drawn from the generated categories"""
+    rng = random.Random(seed + 1)
+    rows = rng.sample(tables["market_sizes"], min(count, len(tables["market_sizes"])))
+    kinds: Dict[str, List[str]] = {"exact": [], "alias": [], "free text": [], "misspelled": []}
+    for row in rows:
+        a_b = row["aliases"].split(";")[0]
+        kind = row["category"].rsplit(" ", 1)[1]
+        kinds["exact"].append(row["category"])
+        kinds["alias"].append(row["aliases"].split(";")[1])
+        kinds["free text"].append(f"AI-powered {a_b.lower()} {kind[:-1].lower()} for small teams")
+        position = rng.randrange(1, len(row["category"]) - 1)
+        kinds["misspelled"].append(row["category"][:position] + row["category"][position + 1:])
+    return kinds
+
+
+# ============================================================================
+# Unindexed baseline: fuzzy match over every name, then scan every row
+# ============================================================================
+
+def scan_market(rows: List[Dict[str, str]], query: str, region: str) -> Dict[str, str]:
+    names = {normalize(row["category"]): row["category"] for row in rows}
+    close = difflib.get_close_matches(normalize(query), list(names), n=1, cutoff=0)
+    category = names[close[0]] if close else None
+    for row in rows:
+        if row["category"] == category and row["region"] == region:
+            return row
+    return {}
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+@dataclass
+class LatencyStats:
+    operation: str
+    queries: str
+    calls: int
+    misses: int  # queries no category matched (LookupError)
+    p50_us: float
+    p95_us: float
+    max_us: float
+
+
+def measure(operation: str, query_kind: str, call: Callable[[str], object], inputs: List[str]) -> LatencyStats:
+    timings, misses = [], 0
+    for query in inputs:
+        start = time.perf_counter()
+        try:
+            call(query)
+        except LookupError:
+            misses += 1
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return LatencyStats(operation, query_kind, len(timings), misses, timings[len(timings) // 2],
+                        timings[min(len(timings) - 1, int(len(timings) * 0.95))], timings[-1])
+
+
+@dataclass
+class BenchmarkResult:
+    categories: int
+    rows: int
+    load_seconds: float
+    latencies: List[LatencyStats] = field(default_factory=list)
+
+
+def run_benchmark(num_categories: int, num_regions: int, competitors_per_category: int,
+                  regulations_per_category: int, calls: int, file_format: str = "csv",
+                  seed: int = 0) -> BenchmarkResult:
+    tables = generate_tables(num_categories, num_regions, competitors_per_category, regulations_per_category, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_tables(tables, tmp, file_format)
+        start = time.perf_counter()
+        data = MarketDataset.load(tmp)
+        load_seconds = time.perf_counter() - start
+
+    result = BenchmarkResult(num_categories, data.rows, load_seconds)
+    region = REGIONS[0]
+    lookups = {
+        "market": lambda query: data.market(query, region),
+        "competitors": lambda query: data.competitors(query, region),
+        "regulations": lambda query: data.regulations(query, region),
+    }
+    for query_kind, inputs in queries(tables, calls, seed).items():
+        data.resolve_category.cache_clear()
+        for operation, call in lookups.items():
+            # The first operation resolves every query (cold); the others reuse the memoized names (warm)
+            label = f"{operation} ({'cold' if operation == 'market' else 'warm'})"
+            result.latencies.append(measure(label, query_kind, call, inputs))
+
+    baseline_inputs = queries(tables, min(calls, 50), seed)["free text"]
+    result.latencies.append(measure("market (no index)", "free text",
+                                    lambda query: scan_market(tables["market_sizes"], query, region),
+                                    baseline_inputs))
+    return result
+
+
+def print_report(results: List[BenchmarkResult]):
+    for r in results:
+        print(f"\n{r.categories:,} categories, {r.rows:,} rows, loaded in {r.load_seconds:.2f}s")
+        print(f"{'operation':<22} {'queries':<11} {'calls':>6} {'misses':>7} {'p50 us':>9} {'p95 us':>9} "
+              f"{'max us':>10}")
+        print("-" * 80)
+        for s in r.latencies:
+            print(f"{s.operation:<22} {s.queries:<11} {s.calls:>6} {s.misses:>7} {s.p50_us:>9.1f} {s.p95_us:>9.1f} "
+                  f"{s.max_us:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, nargs="+", default=[500, 2000], help="Synthetic category counts")
+    parser.add_argument("--regions", type=int, default=8, help=f"Regions per category (at most {len(REGIONS)})")
+    parser.add_argument("--competitors", type=int, default=20, help="Competitor rows per category")
+    parser.add_argument("--regulations", type=int, default=6, help="Regulation rows per category")
+    parser.add_argument("--calls", type=int, default=1000, help="Lookups per operation and query kind")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--max-warm-p95-us", type=float, help="Fail if a warm lookup's p95 exceeds this (us)")
+    args = parser.parse_args(argv)
+
+    results = [run_benchmark(n, args.regions, args.competitors, args.regulations, args.calls, args.format, args.seed)
+               for n in args.categories]
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+    failures = [f"{r.categories} categories: {s.operation} / {s.queries} p95 {s.p95_us:.1f}us > {args.max_warm_p95_us}us"
+                for r in results for s in r.latencies
+                if args.max_warm_p95_us is not None and "warm" in s.operation and s.p95_us > args.max_warm_p95_us]
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,22 @@
 import asyncio
 import json
 import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
-from typing import List, Dict
+from typing import Any, AsyncIterator, List, Dict, Literal, Optional
 from pydantic import BaseModel
 from openai import AsyncOpenAI
 from agents import Agent, Runner, function_tool,OpenAIChatCompletionsModel
+from research_context import ContextEncoder, EncodedContext
+from research_data import common_weaknesses, get_market_data, highest_risk
+from research_executor import PlanExecution, ResearchPlanExecutor, ToolRegistry
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import CallLimiter, cached_tool, get_tool_cache
 
 
 
@@ -75,10 +85,19 @@ class FinalReport(BaseModel):
     confidence_score: float
 
 # ============================================================================
-# STEP 2: Define research tools (simulated APIs - replace with real data)
+# STEP 2: Define research tools (local datasets - replace with licensed data)
 # ============================================================================
 
-@function_tool
+# Plain functions: the plan executor calls them directly (research_executor.py),
+# and the optional executor agent gets them as function tools. Market sizes,
+# competitors and regulations come from the local datasets in data/, loaded once
+# and indexed in memory (research_data.py). Customer research still stands in for
+# a paid API, so its results are cached per arguments (agent_runtime/tool_cache.py).
+HOUR = 3600
+TOOL_CACHE_TTL = {
+    "customers": 24 * HOUR,
+}
+
 def analyze_market_size(product_category: str, region: str) -> MarketInsight:
     """
     Analyze total addressable market size and growth trends
@@ -87,24 +106,15 @@ def analyze_market_size(product_category: str, region: str) -> MarketInsight:
         product_category: The product category to research
         region: Geographic region for analysis
     """
-    # In production: integrate with market research APIs like Statista, IBISWorld
+    market = get_market_data().market(product_category, region)
+    where = f"in {market.region}" if market.region.lower() != "global" else f"globally (no {region} data)"
     return MarketInsight(
-        market_size=f"${2.5}B USD in {region}",
-        growth_rate="18% CAGR",
-        key_trends=[
-            "Increasing demand for sustainable solutions",
-            "Mobile-first user preferences",
-            "AI-powered personalization trending",
-            "Subscription-based models growing"
-        ],
-        target_demographics=[
-            "Millennials (25-40 years)",
-            "Tech-savvy professionals",
-            "Urban population"
-        ]
+        market_size=f"${market.market_size_usd_bn:g}B USD {where} ({market.category})",
+        growth_rate=f"{market.cagr_pct:g}% CAGR",
+        key_trends=market.key_trends,
+        target_demographics=market.target_demographics
     )
 
-@function_tool
 def research_competitors(product_category: str) -> CompetitorInsight:
     """
     Identify and analyze key competitors in the space
@@ -112,33 +122,20 @@ def research_competitors(product_category: str) -> CompetitorInsight:
     Args:
         product_category: The product category to research
     """
-    # In production: integrate with Crunchbase, SimilarWeb, SEMrush APIs
+    competitors = get_market_data().competitors(product_category, limit=5)
+    gaps = common_weaknesses(competitors)
     return CompetitorInsight(
         main_competitors=[
-            "CompetitorA - Market leader with 35% share",
-            "CompetitorB - Fast-growing startup with strong UX",
-            "CompetitorC - Enterprise-focused solution"
-        ],
-        competitor_strengths=[
-            "Established brand recognition",
-            "Large existing customer base",
-            "Extensive distribution networks"
-        ],
-        market_gaps=[
-            "Lack of personalization features",
-            "Poor mobile experience",
-            "Limited integration capabilities",
-            "High pricing for SMBs"
+            f"{c.competitor} - {c.positioning} ({c.market_share_pct:g}% share, {c.region})" for c in competitors
         ],
+        competitor_strengths=list(dict.fromkeys(strength for c in competitors for strength in c.strengths[:2])),
+        market_gaps=[gap for gap, _ in gaps],
         differentiation_opportunities=[
-            "AI-powered recommendations",
-            "Superior mobile experience",
-            "Flexible pricing tiers",
-            "API-first architecture"
+            f"Compete on '{gap}' (weak at {', '.join(names)})" for gap, names in gaps
         ]
     )
 
-@function_tool
+@cached_tool(ttl=TOOL_CACHE_TTL["customers"])
 def gather_customer_insights(target_segment: str) -> CustomerInsight:
     """
     Gather insights about customer needs and pain points
@@ -170,7 +167,6 @@ def gather_customer_insights(target_segment: str) -> CustomerInsight:
         ]
     )
 
-@function_tool
 def assess_regulatory_environment(product_category: str, region: str) -> RegulatoryInsight:
     """
     Assess regulatory requirements and compliance needs
@@ -179,24 +175,26 @@ def assess_regulatory_environment(product_category: str, region: str) -> Regulat
         product_category: The product category
         region: Geographic region for regulatory analysis
     """
-    # In production: integrate with legal databases, compliance platforms
+    regulations = get_market_data().regulations(product_category, region)
+    setup = sum(r.setup_cost_usd_k for r in regulations)
+    annual = sum(r.annual_cost_usd_k for r in regulations)
     return RegulatoryInsight(
-        relevant_regulations=[
-            "GDPR for EU data protection",
-            "CCPA for California privacy",
-            "Industry-specific compliance standards"
-        ],
-        compliance_requirements=[
-            "Data encryption at rest and in transit",
-            "User consent management",
-            "Right to data deletion",
-            "Regular security audits",
-            "Privacy policy disclosure"
-        ],
-        risk_level="Medium",
-        estimated_compliance_cost="$150K-$250K initial setup + $50K annual"
+        relevant_regulations=[r.regulation for r in regulations],
+        compliance_requirements=list(dict.fromkeys(req for r in regulations for req in r.requirements)),
+        risk_level=highest_risk(regulations),
+        estimated_compliance_cost=f"${setup:,.0f}K initial setup + ${annual:,.0f}K annual"
     )
 
+# Tools the plan's subtasks can name, with the phrasings planners use for them
+research_tools = ToolRegistry()
+research_tools.register(analyze_market_size, aliases=["market size", "market trends", "market sizing"])
+research_tools.register(research_competitors, aliases=["competitor analysis", "competitive landscape",
+                                                       "competitive intelligence"])
+research_tools.register(gather_customer_insights, aliases=["customer research", "customer needs",
+                                                           "user research"])
+research_tools.register(assess_regulatory_environment, aliases=["regulatory assessment", "compliance",
+                                                                "regulations"])
+
 # ============================================================================
 # STEP 3: Create Planning Agent (Phase 1 - Plan Generation)
 # ============================================================================
@@ -247,12 +245,7 @@ Available tools:
 - assess_regulatory_environment: For compliance requirements
 
 Execute each task methodically and ensure comprehensive data collection.""",
-    tools=[
-        analyze_market_size,
-        research_competitors,
-        gather_customer_insights,
-        assess_regulatory_environment
-    ],
+    tools=[function_tool(research_tools.function(name)) for name in research_tools.names],
     model=llm_q
 )
 
@@ -290,37 +283,159 @@ Be analytical, data-driven, and provide actionable strategic insights.""",
 # STEP 6: Orchestrate Planning Pattern Workflow
 # ============================================================================
 
+@dataclass
+class ResearchEvent:
+    """
+    One step of a research run; `elapsed` is seconds since the run started.
+
+    kind / data:
+        plan_created       ResearchPlan
+        subtask_finished   SubtaskResult (plan executor only)
+        execution_finished PlanExecution, or the execution agent's findings text
+        synthesis_delta    str, the next chunk of the report's JSON
+        report_ready       FinalReport
+    """
+    kind: Literal["plan_created", "subtask_finished", "execution_finished", "synthesis_delta", "report_ready"]
+    elapsed: float
+    data: Any = None
+
+@dataclass
+class ResearchTimings:
+    """When each kind of content first became available, in seconds since the run started"""
+    plan: Optional[float] = None
+    first_subtask: Optional[float] = None
+    execution: Optional[float] = None
+    first_report_token: Optional[float] = None
+    total: Optional[float] = None
+
+    @property
+    def time_to_first_content(self) -> Optional[float]:
+        """Seconds until a front end had something to show (the plan)"""
+        return self.plan
+
+    def record(self, event: ResearchEvent):
+        if event.kind == "plan_created":
+            self.plan = event.elapsed
+        elif event.kind == "subtask_finished" and self.first_subtask is None:
+            self.first_subtask = event.elapsed
+        elif event.kind == "execution_finished":
+            self.execution = event.elapsed
+        elif event.kind == "synthesis_delta" and self.first_report_token is None:
+            self.first_report_token = event.elapsed
+        elif event.kind == "report_ready":
+            self.total = event.elapsed
+
+    @property
+    def synthesis(self) -> Optional[float]:
+        """Seconds the synthesis took, from the end of execution to the finished report"""
+        if self.total is None or self.execution is None:
+            return None
+        return self.total - self.execution
+
+    def summary(self) -> str:
+        labels = [("time to first content", self.time_to_first_content), ("first subtask", self.first_subtask),
+                  ("execution", self.execution), ("first report token", self.first_report_token),
+                  ("synthesis", self.synthesis), ("total", self.total)]
+        return ", ".join(f"{label} {seconds:.2f}s" for label, seconds in labels if seconds is not None)
+
+@dataclass
+class ResearchRun:
+    """One research run's results, filled in by stream_research as they become available"""
+    timings: ResearchTimings = field(default_factory=ResearchTimings)
+    execution: Optional[PlanExecution] = None  # plan executor only
+    context: Optional[EncodedContext] = None  # plan and findings as sent to the synthesizer
+    report: Optional[FinalReport] = None
+
+# LLM call priorities under a shared CallLimiter (lower goes first): with many products
+# in flight, products that are further along finish before new ones are planned
+SYNTHESIS_PRIORITY, EXECUTION_PRIORITY, PLANNING_PRIORITY = range(3)
+
+_PARTIAL_STRING_FIELD = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+def partial_report_fields(report_json: str) -> Dict[str, str]:
+    """
+    String fields of a FinalReport whose JSON is still streaming: finished fields in
+    full, the field being written so far, so front ends can render the report early.
+    """
+    fields = {}
+    for name, value in _PARTIAL_STRING_FIELD.findall(report_json):
+        if (len(value) - len(value.rstrip("\\"))) % 2:  # cut after the backslash of an escape
+            value = value[:-1]
+        try:
+            fields[name] = json.loads('"' + value + '"')
+        except ValueError:  # cut inside an escape sequence such as \u00e9
+            fields[name] = value
+    return fields
+
 class MarketResearchPlanningSystem:
     """
     Planning Pattern Implementation:
     Phase 1: Generate strategic research plan
     Phase 2: Execute plan using specialized tools
     Phase 3: Synthesize findings into actionable report
+    
+    Phase 2 maps every subtask to its registered tool and runs them all
+    concurrently (ResearchPlanExecutor), returning typed insights without any LLM
+    call. With use_llm_executor=True the executor agent calls the tools instead,
+    one LLM turn at a time.
+    
+    `stream_research` yields a ResearchEvent as each piece of content is ready (plan,
+    every finished subtask, report tokens), so any front end can render progressively;
+    `run_research` is the command-line front end.
+    
+    The synthesis prompt gets the plan and findings as compact, deduplicated lines
+    within context_token_budget tokens (ContextEncoder); a ResearchRun's `context`
+    reports the tokens saved against pretty-printed JSON.
+    
+    Every LLM call takes a slot from `llm_limiter` (unlimited by default); systems
+    sharing one CallLimiter share its concurrency and rate limit (batch_research.py).
     """
     
-    def __init__(self,llm=llm):
+    def __init__(self,llm=llm, use_llm_executor: bool = False, max_concurrency: int = 4,
+                 context_token_budget: Optional[int] = 1200, llm_limiter: Optional[CallLimiter] = None):
         self.llm_ = llm
+        self.use_llm_executor = use_llm_executor
         self.planner = create_planning_agent(self.llm_)
         self.executor = create_execution_agent(self.llm_)
+        self.plan_executor = ResearchPlanExecutor(research_tools, max_concurrency=max_concurrency)
         self.synthesizer = create_synthesis_agent(self.llm_)
-
-
-    async def run_research(self, product_name: str, product_category: str,
-                          target_market: str, region: str = "North America") -> FinalReport:
+        self.context_encoder = ContextEncoder(context_token_budget)
+        self.llm_limiter = llm_limiter or CallLimiter()
+
+    async def execute_plan(self, research_plan: ResearchPlan, product_name: str, product_category: str,
+                           target_market: str, region: str) -> PlanExecution:
+        """Run the plan's subtasks on the registered tools, arguments filled from the research context"""
+        context = self.research_context(product_name, product_category, target_market, region)
+        return await self.plan_executor.execute(research_plan.subtasks, context)
+
+    @staticmethod
+    def research_context(product_name: str, product_category: str, target_market: str, region: str) -> dict:
+        """Values the research tools' parameters are filled from, by name"""
+        return {
+            "product_name": product_name,
+            "product_category": product_category,
+            "target_segment": target_market,
+            "region": region,
+        }
+
+    async def stream_research(self, product_name: str, product_category: str, target_market: str,
+                              region: str = "North America",
+                              run: Optional[ResearchRun] = None) -> AsyncIterator[ResearchEvent]:
         """
-        Execute complete planning pattern workflow
+        Run the planning pattern workflow, yielding a ResearchEvent as soon as each piece
+        of content is ready. Pass a ResearchRun to get the run's timings, execution and
+        synthesis context (also after a failure); concurrent runs each fill their own.
         """
-        print("=" * 80)
-        print(f"MARKET RESEARCH PLANNING SYSTEM")
-        print(f"Product: {product_name}")
-        print(f"Category: {product_category}")
-        print(f"Target: {target_market}")
-        print("=" * 80)
+        start = time.perf_counter()
+        run = run if run is not None else ResearchRun()
+        timings = run.timings
+
+        def event(kind: str, data: Any = None) -> ResearchEvent:
+            research_event = ResearchEvent(kind, time.perf_counter() - start, data)
+            timings.record(research_event)
+            return research_event
         
         # PHASE 1: PLAN GENERATION
-        print("\n📋 PHASE 1: Generating Research Plan...")
-        print("-" * 80)
-        
         planning_input = f"""Create a comprehensive market research plan for:
 
 Product Name: {product_name}
@@ -331,39 +446,25 @@ Region: {region}
 Generate a detailed research plan with 4 key subtasks covering market analysis, 
 competitor research, customer insights, and regulatory assessment."""
 
-        plan_result = await Runner.run(
-            self.planner,
-            planning_input
-        )
+        async with self.llm_limiter.slot(PLANNING_PRIORITY):
+            plan_result = await Runner.run(
+                self.planner,
+                planning_input
+            )
         
         research_plan: ResearchPlan = plan_result.final_output
-        
-        print(f"\n✓ Research Plan Created:")
-        print(f"  Goal: {research_plan.research_goal}")
-        print(f"  Duration: {research_plan.estimated_duration}")
-        print(f"\n  Subtasks:")
-        for subtask in research_plan.subtasks:
-            print(f"    {subtask.step}. {subtask.task_name}")
-            print(f"       Tool: {subtask.tool_name}")
-            print(f"       Why: {subtask.rationale}\n")
+        yield event("plan_created", research_plan)
         
         # PHASE 2: PLAN EXECUTION
-        print("\n🔍 PHASE 2: Executing Research Plan...")
-        print("-" * 80)
-        
-        execution_input = f"""Execute the following market research plan:
+        if self.use_llm_executor:
+            execution_input = f"""Execute the following market research plan:
 
 Product: {product_name}
 Category: {product_category}
 Region: {region}
 
 Research Tasks:
-{json.dumps([{
-    'step': st.step,
-    'task': st.task_name,
-    'tool': st.tool_name,
-    'description': st.description
-} for st in research_plan.subtasks], indent=2)}
+{chr(10).join(self.context_encoder.task_lines(research_plan))}
 
 Execute each research task using the appropriate tools. 
 Use '{product_category}' as the product_category parameter.
@@ -372,40 +473,94 @@ Use '{region}' as the region parameter.
 
 Provide comprehensive findings from all research areas."""
 
-        execution_result = await Runner.run(
-            self.executor,
-            execution_input
-        )
-        
-        research_findings = execution_result.final_output
-        
-        print(f"\n✓ Research Execution Complete")
-        # print(f"  Total turns: {len(execution_result.trace)}")
-        # print(f"  Tools used: {sum(1 for turn in execution_result.trace if hasattr(turn, 'tool_calls') and turn.tool_calls)}")
+            async with self.llm_limiter.slot(EXECUTION_PRIORITY):
+                execution_result = await Runner.run(
+                    self.executor,
+                    execution_input
+                )
+            
+            research_findings = execution_result.final_output
+            yield event("execution_finished", research_findings)
+        else:
+            context = self.research_context(product_name, product_category, target_market, region)
+            execution_start = time.perf_counter()
+            results = []
+            async for result in self.plan_executor.stream(research_plan.subtasks, context):
+                results.append(result)
+                yield event("subtask_finished", result)
+            results.sort(key=lambda result: result.step)
+            run.execution = research_findings = PlanExecution(results, time.perf_counter() - execution_start)
+            yield event("execution_finished", run.execution)
         
         # PHASE 3: SYNTHESIS
-        print("\n📊 PHASE 3: Synthesizing Findings...")
-        print("-" * 80)
-        
+        # Plan and findings as compact lines under a token budget (research_context.py)
+        run.context = self.context_encoder.encode(research_plan, research_findings)
         synthesis_input = f"""Synthesize comprehensive market research findings for {product_name}.
 
-RESEARCH PLAN:
-{json.dumps({
-    'goal': research_plan.research_goal,
-    'subtasks': [st.dict() for st in research_plan.subtasks]
-}, indent=2)}
-
-RESEARCH FINDINGS:
-{research_findings}
+RESEARCH PLAN AND FINDINGS:
+{run.context.text}
 
 Create a comprehensive market research report with strategic recommendations."""
 
-        synthesis_result = await Runner.run(
-            self.synthesizer,
-            synthesis_input
-        )
+        async with self.llm_limiter.slot(SYNTHESIS_PRIORITY):
+            synthesis_result = Runner.run_streamed(
+                self.synthesizer,
+                synthesis_input
+            )
+            async for stream_event in synthesis_result.stream_events():
+                if stream_event.type == "raw_response_event" and \
+                        getattr(stream_event.data, "type", None) == "response.output_text.delta":
+                    yield event("synthesis_delta", stream_event.data.delta)
+        
+        run.report = synthesis_result.final_output
+        yield event("report_ready", run.report)
+
+    async def run_research(self, product_name: str, product_category: str,
+                          target_market: str, region: str = "North America") -> FinalReport:
+        """
+        Execute complete planning pattern workflow
+        """
+        print("=" * 80)
+        print(f"MARKET RESEARCH PLANNING SYSTEM")
+        print(f"Product: {product_name}")
+        print(f"Category: {product_category}")
+        print(f"Target: {target_market}")
+        print("=" * 80)
+        
+        print("\n📋 PHASE 1: Generating Research Plan...")
+        print("-" * 80)
         
-        final_report: FinalReport = synthesis_result.final_output
+        report_tokens, run = 0, ResearchRun()
+        async for event in self.stream_research(product_name, product_category, target_market, region, run):
+            if event.kind == "plan_created":
+                research_plan: ResearchPlan = event.data
+                print(f"\n✓ Research Plan Created:")
+                print(f"  Goal: {research_plan.research_goal}")
+                print(f"  Duration: {research_plan.estimated_duration}")
+                print(f"\n  Subtasks:")
+                for subtask in research_plan.subtasks:
+                    print(f"    {subtask.step}. {subtask.task_name}")
+                    print(f"       Tool: {subtask.tool_name}")
+                    print(f"       Why: {subtask.rationale}\n")
+                
+                print("\n🔍 PHASE 2: Executing Research Plan...")
+                print("-" * 80)
+            elif event.kind == "subtask_finished":
+                result = event.data
+                detail = f"{result.seconds:.2f}s" if result.ok else result.error
+                print(f"  {'✓' if result.ok else '✗'} {result.step}. {result.task_name} -> {result.tool_name}: {detail}")
+            elif event.kind == "execution_finished":
+                if isinstance(event.data, PlanExecution):
+                    print(f"  {event.data.summary()}")
+                print(f"\n✓ Research Execution Complete")
+                
+                print("\n📊 PHASE 3: Synthesizing Findings...")
+                print("-" * 80)
+            elif event.kind == "synthesis_delta":
+                report_tokens += 1
+                print(f"\r  Writing report... {report_tokens} chunks", end="", flush=True)
+            elif event.kind == "report_ready":
+                final_report: FinalReport = event.data
         
         # Print Report
         print("\n" + "=" * 80)
@@ -428,6 +583,9 @@ Create a comprehensive market research report with strategic recommendations."""
         print("-" * 80)
         print(final_report.launch_recommendation)
         print(f"\nConfidence Score: {final_report.confidence_score:.2f}/1.00")
+        print(f"⏱️ {run.timings.summary()}")
+        print(f"📝 Synthesis context: {run.context.summary()}")
+        print(f"🗄️ Tool cache: {get_tool_cache().summary()}")
         print("=" * 80)
         
         return final_report
@@ -1,8 +1,12 @@
+import argparse
+import asyncio
 import os
+import time
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, Process,LLM
 from langchain_groq import ChatGroq
-from typing import Optional
+from typing import Dict, List, Optional
 # from langchain_openai import ChatOpenAI
 
 # Load environment variables from .env file for security
@@ -32,47 +36,137 @@ llm = LLM(
 #    llm = None
 
 # 2. Define a clear and focused agent
-planner_writer_agent = Agent(
-   role='Article Planner and Writer',
-   goal='Plan and then write a concise, engaging summary on a specified topic.',
-   backstory=(
-       'You are an expert technical writer and content strategist. '
-       'Your strength lies in creating a clear, actionable plan before writing, '
-       'ensuring the final summary is both informative and easy to digest.'
-   ),
-   verbose=True,
-   allow_delegation=False,
-   llm=llm # Assign the specific LLM to the agent
-)
+def create_planner_writer_agent(llm=llm, verbose: bool = True) -> Agent:
+   return Agent(
+      role='Article Planner and Writer',
+      goal='Plan and then write a concise, engaging summary on a specified topic.',
+      backstory=(
+          'You are an expert technical writer and content strategist. '
+          'Your strength lies in creating a clear, actionable plan before writing, '
+          'ensuring the final summary is both informative and easy to digest.'
+      ),
+      verbose=verbose,
+      allow_delegation=False,
+      llm=llm # Assign the specific LLM to the agent
+   )
 
 # 3. Define a task with a more structured and specific expected output
-topic = "The importance of Reinforcement Learning in AI"
-high_level_task = Task(
-   description=(
-       f"1. Create a bullet-point plan for a summary on the topic: '{topic}'.\n"
-       f"2. Write the summary based on your plan, keeping it around 200 words."
-   ),
-   expected_output=(
-       "A final report containing two distinct sections:\n\n"
-       "### Plan\n"
-       "- A bulleted list outlining the main points of the summary.\n\n"
-       "### Summary\n"
-       "- A concise and well-structured summary of the topic."
-   ),
-   agent=planner_writer_agent,
-)
+def create_planning_task(topic: str, agent: Agent, words: int = 200) -> Task:
+   return Task(
+      description=(
+          f"1. Create a bullet-point plan for a summary on the topic: '{topic}'.\n"
+          f"2. Write the summary based on your plan, keeping it around {words} words."
+      ),
+      expected_output=(
+          "A final report containing two distinct sections:\n\n"
+          "### Plan\n"
+          "- A bulleted list outlining the main points of the summary.\n\n"
+          "### Summary\n"
+          "- A concise and well-structured summary of the topic."
+      ),
+      agent=agent,
+   )
 
 # Create the crew with a clear process
-crew = Crew(
-   agents=[planner_writer_agent],
-   tasks=[high_level_task],
-   process=Process.sequential,
-)
+def create_planning_crew(topic: str, llm=llm, words: int = 200, verbose: bool = True) -> Crew:
+   """A new crew (and agent) per topic, so crews can run concurrently without sharing state"""
+   planner_writer_agent = create_planner_writer_agent(llm, verbose)
+   return Crew(
+      agents=[planner_writer_agent],
+      tasks=[create_planning_task(topic, planner_writer_agent, words)],
+      process=Process.sequential,
+   )
+
+# 4. Run many topics concurrently
+@dataclass
+class TopicRun:
+   """One topic's result, latency and token usage"""
+   topic: str
+   result: Optional[str] = None
+   seconds: float = 0.0
+   usage: Dict[str, int] = field(default_factory=dict)  # prompt / completion / total tokens, requests
+   error: Optional[str] = None
+
+   @property
+   def ok(self) -> bool:
+      return self.error is None
+
+   @property
+   def total_tokens(self) -> int:
+      return self.usage.get("total_tokens", 0)
+
+def token_usage(crew: Crew, output=None) -> Dict[str, int]:
+   """Token usage of a finished crew run (CrewOutput.token_usage, else crew.usage_metrics)"""
+   usage = getattr(output, "token_usage", None) or getattr(crew, "usage_metrics", None)
+   if usage is None:
+      return {}
+   usage = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+   return {name: value for name, value in usage.items() if isinstance(value, int)}
+
+async def run_topic(topic: str, semaphore: asyncio.Semaphore, llm=llm, words: int = 200,
+                    verbose: bool = False) -> TopicRun:
+   """Kick off one topic's crew once a slot is free; errors are recorded, not raised"""
+   run = TopicRun(topic)
+   async with semaphore:
+      crew = create_planning_crew(topic, llm, words, verbose)
+      start = time.perf_counter()
+      try:
+         output = await crew.kickoff_async()
+         run.result = str(output)
+         run.usage = token_usage(crew, output)
+      except Exception as e:
+         run.error = f"{type(e).__name__}: {e}"
+      run.seconds = time.perf_counter() - start
+   return run
+
+async def run_topics(topics: List[str], max_concurrency: int = 3, llm=llm, words: int = 200,
+                     verbose: bool = False) -> List[TopicRun]:
+   """Every topic's crew, at most max_concurrency at once; results in topic order"""
+   semaphore = asyncio.Semaphore(max_concurrency)
+   tasks = [asyncio.ensure_future(run_topic(topic, semaphore, llm, words, verbose)) for topic in topics]
+   for next_run in asyncio.as_completed(tasks):
+      run = await next_run
+      detail = f"{run.seconds:.2f}s, {run.total_tokens:,} tokens" if run.ok else run.error
+      print(f"  {'✓' if run.ok else '✗'} {run.topic}: {detail}")
+   return [task.result() for task in tasks]
+
+def print_summary(runs: List[TopicRun], seconds: float):
+   print(f"\n{'TOPIC':<50} {'SECONDS':>8} {'PROMPT':>8} {'OUTPUT':>8} {'TOTAL':>8}")
+   for run in runs:
+      usage = run.usage
+      print(f"{run.topic[:50]:<50} {run.seconds:>8.2f} {usage.get('prompt_tokens', 0):>8,} "
+            f"{usage.get('completion_tokens', 0):>8,} {usage.get('total_tokens', 0):>8,}"
+            + ("" if run.ok else f"  ✗ {run.error}"))
+   finished = [run for run in runs if run.ok]
+   print(f"\n{len(finished)}/{len(runs)} topics in {seconds:.2f}s "
+         f"(sequential would take ~{sum(run.seconds for run in runs):.2f}s), "
+         f"{sum(run.total_tokens for run in runs):,} tokens")
+
+# 5. Command line
+def main():
+   parser = argparse.ArgumentParser(description="Plan and write a short summary for each topic with CrewAI")
+   parser.add_argument("topics", nargs="*", help="Topics to summarize")
+   parser.add_argument("-f", "--topics-file", help="File with one topic per line")
+   parser.add_argument("--concurrency", type=int, default=3, help="Crews running at once")
+   parser.add_argument("--words", type=int, default=200, help="Approximate summary length")
+   parser.add_argument("--verbose", action="store_true", help="Show the agent's intermediate steps")
+   args = parser.parse_args()
+
+   topics = list(args.topics)
+   if args.topics_file:
+      with open(args.topics_file, encoding="utf-8") as f:
+         topics += [line.strip() for line in f if line.strip()]
+   topics = topics or ["The importance of Reinforcement Learning in AI"]
 
-# Execute the task
-print("## Running the planning and writing task ##")
-result = crew.kickoff()
+   # Execute the tasks
+   print(f"## Running the planning and writing task for {len(topics)} topic(s) ##")
+   start = time.perf_counter()
+   runs = asyncio.run(run_topics(topics, args.concurrency, llm, args.words, args.verbose))
 
-print("\n\n---\n## Task Result ##\n---")
-print(result)
+   for run in runs:
+      print(f"\n\n---\n## Task Result: {run.topic} ##\n---")
+      print(run.result if run.ok else f"Failed: {run.error}")
+   print_summary(runs, time.perf_counter() - start)
 
+if __name__ == "__main__":
+   main()
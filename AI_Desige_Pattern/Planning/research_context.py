@@ -0,0 +1,181 @@
+"""
+Compact encoding of the research plan and findings for the execution and synthesis prompts.
+
+The prompts used to carry `json.dumps(..., indent=2)` of every subtask (product name,
+step numbers and rationales included) and of every finding: mostly whitespace, quotes
+and repetition. ContextEncoder writes the same information as short lines instead:
+
+    GOAL: Assess launch viability of FitGenius AI in North America
+    TASKS: 1 Market Size Analysis [analyze_market_size]; 2 Competitive Intelligence [...]
+    [analyze_market_size] market_size: $2.5B USD in North America | growth_rate: 18% CAGR
+    [analyze_market_size] key_trends: Increasing demand for ...; Mobile-first ...
+
+Findings shared by several subtasks, and list items already stated, appear once. If the
+context exceeds the token budget, the lowest-priority lines are dropped first
+(subtask list, then failed subtasks, then the last list items of the largest findings),
+so the goal and the headline figures of every tool always make it into the prompt.
+"""
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from research_executor import PlanExecution
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from agent_runtime import count_tokens
+
+# Section priorities: lower numbers are kept longest
+GOAL, FINDINGS, FINDING_DETAILS, ERRORS, TASKS = range(5)
+DEFAULT_TOKEN_BUDGET = 1200
+
+
+def _clean(text: Any) -> str:
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+@dataclass
+class _Line:
+    priority: int
+    text: str
+    group: str = ""  # lines of one finding are truncated from the end together
+
+
+@dataclass
+class EncodedContext:
+    """An encoded prompt context and what the encoding saved"""
+    text: str
+    tokens: int
+    baseline_tokens: int  # the same inputs as pretty-printed JSON
+    dropped_lines: int = 0
+
+    @property
+    def saved(self) -> float:
+        return 1 - self.tokens / self.baseline_tokens if self.baseline_tokens else 0.0
+
+    def summary(self) -> str:
+        dropped = f", {self.dropped_lines} lines over budget dropped" if self.dropped_lines else ""
+        return f"{self.baseline_tokens:,} -> {self.tokens:,} tokens ({self.saved:.0%} smaller{dropped})"
+
+
+class ContextEncoder:
+    """
+    Compact plan / findings context under a token budget.
+
+    Args:
+        token_budget: Most tokens the encoded context may use (None for no limit)
+    """
+
+    def __init__(self, token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self._seen = set()
+
+    # ------------------------------------------------------------------
+    # Plan
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def task_lines(plan: Any) -> List[str]:
+        """One line per subtask: step, name, tool and description"""
+        return [f"{subtask.step}. {_clean(subtask.task_name)} [{subtask.tool_name}]: {_clean(subtask.description)}"
+                for subtask in plan.subtasks]
+
+    def _plan_lines(self, plan: Any) -> List[_Line]:
+        tasks = "; ".join(f"{subtask.step} {_clean(subtask.task_name)} [{subtask.tool_name}]"
+                          for subtask in plan.subtasks)
+        return [_Line(GOAL, f"GOAL: {_clean(plan.research_goal)}"), _Line(TASKS, f"TASKS: {tasks}")]
+
+    # ------------------------------------------------------------------
+    # Findings
+    # ------------------------------------------------------------------
+
+    def _new(self, text: str) -> bool:
+        """False for a value already stated in this context (case-insensitive)"""
+        key = text.lower()
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def _insight_lines(self, tool: str, insight: Any) -> List[_Line]:
+        data = insight.model_dump() if isinstance(insight, BaseModel) else insight
+        if not isinstance(data, dict):
+            text = _clean(data)
+            return [_Line(FINDINGS, f"[{tool}] {text}", tool)] if text and self._new(text) else []
+        # Scalar fields on one headline line, then one line per list field
+        scalars = [f"{name}: {_clean(value)}" for name, value in data.items()
+                   if not isinstance(value, (list, dict)) and self._new(f"{name}: {_clean(value)}")]
+        lines = [_Line(FINDINGS, f"[{tool}] " + " | ".join(scalars), tool)] if scalars else []
+        for name, value in data.items():
+            if isinstance(value, dict):
+                value = [f"{key}: {item}" for key, item in value.items()]
+            if isinstance(value, list):
+                items = [_clean(item) for item in value]
+                items = [item for item in items if item and self._new(item)]
+                if items:
+                    lines.append(_Line(FINDING_DETAILS, f"[{tool}] {name}: " + "; ".join(items), tool))
+        return lines
+
+    def _text_lines(self, text: str) -> List[_Line]:
+        """Free-text findings (execution agent): one line per distinct sentence"""
+        sentences = re.split(r"(?<=[.!?])\s+|\n+", text)
+        return [_Line(FINDINGS if i < 3 else FINDING_DETAILS, _clean(sentence), "text")
+                for i, sentence in enumerate(sentence for sentence in sentences
+                                             if _clean(sentence) and self._new(_clean(sentence)))]
+
+    def _findings_lines(self, findings: Union[PlanExecution, str]) -> List[_Line]:
+        if not isinstance(findings, PlanExecution):
+            return self._text_lines(str(findings))
+        lines, encoded = [], set()
+        for result in findings.results:
+            if not result.ok:
+                lines.append(_Line(ERRORS, f"FAILED {result.step} {_clean(result.task_name)}: {result.error}"))
+            elif result.tool_name not in encoded:  # subtasks sharing a call share its insight
+                encoded.add(result.tool_name)
+                lines.extend(self._insight_lines(result.tool_name, result.insight))
+        return lines
+
+    # ------------------------------------------------------------------
+    # Budget
+    # ------------------------------------------------------------------
+
+    def _fit(self, lines: List[_Line]) -> int:
+        """Drop lines until the context fits the budget; returns how many were dropped"""
+        if self.token_budget is None:
+            return 0
+        tokens = sum(count_tokens(line.text) + 1 for line in lines)
+        dropped = 0
+        while tokens > self.token_budget and len(lines) > 1:
+            lowest = max(line.priority for line in lines)
+            if lowest <= FINDINGS:
+                break  # the goal and the headline findings are always kept
+            candidates = [line for line in lines if line.priority == lowest]
+            # From the group with the most lines, its last line
+            sizes: Dict[str, int] = {}
+            for line in candidates:
+                sizes[line.group] = sizes.get(line.group, 0) + 1
+            group = max(sizes, key=sizes.get)
+            victim = [line for line in candidates if line.group == group][-1]
+            lines.remove(victim)
+            tokens -= count_tokens(victim.text) + 1
+            dropped += 1
+        return dropped
+
+    def encode(self, plan: Any, findings: Union[PlanExecution, str]) -> EncodedContext:
+        """Plan and findings for the synthesis prompt"""
+        self._seen = set()
+        lines = self._plan_lines(plan) + self._findings_lines(findings)
+        dropped = self._fit(lines)
+        text = "\n".join(line.text for line in lines)
+        return EncodedContext(text, count_tokens(text), count_tokens(baseline_context(plan, findings)), dropped)
+
+
+def baseline_context(plan: Any, findings: Union[PlanExecution, str]) -> str:
+    """The previous pretty-printed JSON encoding of the same inputs (for comparison)"""
+    plan_json = json.dumps({"goal": plan.research_goal,
+                            "subtasks": [subtask.model_dump() for subtask in plan.subtasks]}, indent=2)
+    return f"{plan_json}\n{findings.to_prompt() if isinstance(findings, PlanExecution) else findings}"
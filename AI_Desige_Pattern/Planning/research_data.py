@@ -0,0 +1,351 @@
+"""
+Local market research datasets behind the research tools.
+
+Three tables, as CSV or Parquet files in one directory (default: data/ next to this file,
+or MARKET_DATA_DIR):
+
+    market_sizes   category, aliases, region, market_size_usd_bn, cagr_pct, key_trends,
+                   target_demographics
+    competitors    category, region, competitor, market_share_pct, positioning, strengths,
+                   weaknesses
+    regulations    category, region, regulation, requirements, risk_level,
+                   setup_cost_usd_k, annual_cost_usd_k
+
+List columns are ';'-separated in CSV (lists in Parquet). A regulation with category "*"
+applies to every category of its region, and "Global" rows answer for regions without
+their own rows.
+
+The tables are loaded once into dicts keyed by (category, region), so a lookup is a
+couple of hash probes. Planners and users describe categories freely ("AI-powered
+fitness and wellness app"), so category names are matched exactly, then by the keywords
+they share with a category's name or aliases (through a keyword -> categories index) and
+edit distance, then by edit distance alone; resolved names are memoized.
+"""
+import csv
+import difflib
+import functools
+import json
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+TABLES = ("market_sizes", "competitors", "regulations")
+GLOBAL = "global"
+ALL_CATEGORIES = "*"
+RISK_LEVELS = ["Low", "Medium", "High"]
+# Edit-distance similarity (difflib ratio) a misspelled category name needs
+MIN_NAME_SIMILARITY = 0.75
+
+# Words that don't tell categories apart
+STOP_WORDS = {"and", "for", "the", "of", "with", "to", "in", "a", "an", "app", "apps", "platform", "platforms",
+              "software", "solution", "solutions", "tool", "tools", "service", "services", "based", "powered", "ai"}
+
+REGION_ALIASES = {
+    "na": "north america", "us": "north america", "usa": "north america", "united states": "north america",
+    "canada": "north america", "eu": "europe", "european union": "europe", "uk": "europe",
+    "united kingdom": "europe", "apac": "asia pacific", "asia": "asia pacific", "worldwide": GLOBAL,
+}
+
+
+def normalize(name: Any) -> str:
+    """'Fitness & Wellness Apps ', 'fitness/wellness apps' -> 'fitness wellness apps'"""
+    return re.sub(r"[^a-z0-9]+", " ", str(name).lower()).strip()
+
+
+def keywords(name: str) -> Set[str]:
+    """Distinguishing words of a category name, cut to 5 letters ('planner', 'planning' -> 'plann')"""
+    words = (word[:-1] if len(word) > 3 and word.endswith("s") else word for word in normalize(name).split())
+    return {word[:5] for word in words if word not in STOP_WORDS}
+
+
+def _list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(";") if item.strip()]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _float(value: Any) -> float:
+    return float(value) if value not in (None, "") else 0.0
+
+
+@dataclass
+class MarketRecord:
+    category: str
+    region: str
+    market_size_usd_bn: float
+    cagr_pct: float
+    key_trends: List[str] = field(default_factory=list)
+    target_demographics: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CompetitorRecord:
+    category: str
+    region: str
+    competitor: str
+    market_share_pct: float
+    positioning: str = ""
+    strengths: List[str] = field(default_factory=list)
+    weaknesses: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RegulationRecord:
+    category: str
+    region: str
+    regulation: str
+    requirements: List[str] = field(default_factory=list)
+    risk_level: str = "Medium"
+    setup_cost_usd_k: float = 0.0
+    annual_cost_usd_k: float = 0.0
+
+
+def read_table(path: str) -> List[Dict[str, Any]]:
+    """Rows of a .csv, .json or .parquet table (Parquet needs pandas with pyarrow)"""
+    if path.lower().endswith(".parquet"):
+        import pandas as pd
+
+        return pd.read_parquet(path).to_dict("records")
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def find_table(directory: str, table: str) -> str:
+    for extension in (".parquet", ".csv", ".json"):
+        path = os.path.join(directory, table + extension)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {table}.parquet/.csv/.json in {directory}")
+
+
+class MarketDataset:
+    """
+    In-memory, indexed market sizes, competitors and regulations.
+
+    Example:
+        data = MarketDataset.load("data")
+        data.market("AI-powered fitness and wellness app", "North America")
+        # -> MarketRecord(category='Fitness & Wellness Apps', region='North America', ...)
+    """
+
+    def __init__(self, markets: Iterable[Dict[str, Any]], competitors: Iterable[Dict[str, Any]] = (),
+                 regulations: Iterable[Dict[str, Any]] = (), cache_size: int = 4096):
+        self._names: Dict[str, str] = {}  # normalized name or alias -> category
+        self._canonical: Set[str] = set()  # normalized category names (market_sizes rows)
+        self._keyword_index: Dict[str, List[int]] = {}  # keyword -> labels (names and aliases) having it
+        self._labels: List[Tuple[str, str, int]] = []  # label -> (category, normalized label, number of keywords)
+        self._regions: Dict[str, str] = {GLOBAL: "Global"}  # normalized -> display name
+        self._markets: Dict[Tuple[str, str], MarketRecord] = {}
+        self._competitors: Dict[str, Dict[str, List[CompetitorRecord]]] = {}  # category -> region -> records
+        self._regulations: Dict[Tuple[str, str], List[RegulationRecord]] = {}
+        self.rows = 0
+
+        for row in markets:
+            category = self._add_category(row["category"], _list(row.get("aliases")), canonical=True)
+            record = MarketRecord(category, row["region"], _float(row["market_size_usd_bn"]),
+                                  _float(row["cagr_pct"]), _list(row.get("key_trends")),
+                                  _list(row.get("target_demographics")))
+            self._markets[(category, self._add_region(record.region))] = record
+            self.rows += 1
+        for row in competitors:
+            category = self._add_category(row["category"])
+            record = CompetitorRecord(category, row["region"], row["competitor"], _float(row["market_share_pct"]),
+                                      row.get("positioning") or "", _list(row.get("strengths")),
+                                      _list(row.get("weaknesses")))
+            self._competitors.setdefault(category, {}).setdefault(self._add_region(record.region), []).append(record)
+            self.rows += 1
+        for row in regulations:
+            category = row["category"] if row["category"] == ALL_CATEGORIES else self._add_category(row["category"])
+            record = RegulationRecord(category, row["region"], row["regulation"], _list(row.get("requirements")),
+                                      row.get("risk_level") or "Medium", _float(row.get("setup_cost_usd_k")),
+                                      _float(row.get("annual_cost_usd_k")))
+            self._regulations.setdefault((category, self._add_region(record.region)), []).append(record)
+            self.rows += 1
+
+        self.resolve_category = functools.lru_cache(maxsize=cache_size)(self._resolve_category)
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_DATA_DIR) -> "MarketDataset":
+        """Load the three tables of a data directory (see the module docstring)"""
+        return cls(*(read_table(find_table(directory, table)) for table in TABLES))
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _add_category(self, category: str, aliases: Iterable[str] = (), canonical: bool = False) -> str:
+        """Register a category and its aliases; other tables' names resolve to a known category"""
+        key = normalize(category)
+        if canonical and key not in self._canonical:
+            self._canonical.add(key)
+            self._names.pop(key, None)  # a category's own name wins over another category's alias
+            category = category.strip()
+        else:
+            category = self._names.get(key, category.strip())
+        for label in (category, *aliases):
+            if normalize(label) and normalize(label) not in self._names:
+                self._names[normalize(label)] = category
+                label_keywords = keywords(label)
+                for keyword in label_keywords:
+                    self._keyword_index.setdefault(keyword, []).append(len(self._labels))
+                self._labels.append((category, normalize(label), len(label_keywords)))
+        return category
+
+    def _add_region(self, region: str) -> str:
+        key = REGION_ALIASES.get(normalize(region), normalize(region))
+        self._regions.setdefault(key, region.strip())
+        return key
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(set(self._names.values()))
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def _resolve_category(self, query: str) -> Optional[str]:
+        key = normalize(query)
+        if key in self._names:
+            return self._names[key]
+        # Categories by the share of their name's (or an alias') keywords found in the query; the
+        # best ones (at least half, at most one keyword in three behind) ranked by that share
+        # plus the edit-distance similarity of the names. A name counts only with all its
+        # keywords or at least two: one word shared with a longer name ("pet food" and
+        # "Vegan Foods") is not enough
+        matched = Counter(label for keyword in keywords(query) for label in self._keyword_index.get(keyword, ()))
+        coverage: Dict[str, float] = {}
+        partial: List[str] = []  # names sharing a single keyword with the query
+        for label, count in matched.items():
+            category, name, size = self._labels[label]
+            if count >= 2 or count == size:
+                coverage[category] = max(coverage.get(category, 0.0), count / size)
+            else:
+                partial.append(name)
+        matcher = difflib.SequenceMatcher(b=key)  # the query is indexed once for all candidates
+        if coverage and max(coverage.values()) >= 0.5:
+            threshold = max(0.5, max(coverage.values()) - 0.34)
+            best, best_score = None, 0.0
+            for category in sorted((c for c in coverage if coverage[c] >= threshold), key=coverage.get, reverse=True):
+                if coverage[category] + 1 <= best_score:
+                    break  # no later candidate can win, even with identical names
+                matcher.set_seq1(normalize(category))
+                if coverage[category] + matcher.quick_ratio() > best_score:  # quick_ratio bounds ratio
+                    score = coverage[category] + matcher.ratio()
+                    if score > best_score:
+                        best, best_score = category, score
+            return best
+        # Misspellings: edit distance to the names sharing a keyword ("fitnes payroll apps"), else
+        # to every name and alias
+        for names in (partial, self._names):
+            best, best_ratio = None, MIN_NAME_SIMILARITY
+            for name in names:
+                matcher.set_seq1(name)
+                if matcher.real_quick_ratio() >= best_ratio and matcher.quick_ratio() >= best_ratio:
+                    ratio = matcher.ratio()
+                    if ratio >= best_ratio:
+                        best, best_ratio = name, ratio
+            if best is not None:
+                return self._names[best]
+        return None
+
+    def category(self, query: str) -> str:
+        """The dataset category a free-text category refers to; raises LookupError if none does"""
+        category = self.resolve_category(query)
+        if category is None:
+            closest = dict.fromkeys(self._names[name] for name in
+                                    difflib.get_close_matches(normalize(query), list(self._names), n=10, cutoff=0))
+            raise LookupError(f"No market data for category '{query}' (closest: {', '.join(list(closest)[:3])})")
+        return category
+
+    def region(self, query: Optional[str]) -> str:
+        """Normalized region key: exact or alias, then edit distance, else global"""
+        if not query:
+            return GLOBAL
+        key = REGION_ALIASES.get(normalize(query), normalize(query))
+        if key in self._regions:
+            return key
+        close = difflib.get_close_matches(key, list(self._regions), n=1, cutoff=0.8)
+        return close[0] if close else GLOBAL
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def market(self, category: str, region: Optional[str] = None) -> MarketRecord:
+        """Market size and trends of a category in a region (or globally); raises LookupError"""
+        category = self.category(category)
+        for region_key in (self.region(region), GLOBAL):
+            record = self._markets.get((category, region_key))
+            if record is not None:
+                return record
+        raise LookupError(f"No market size data for '{category}' in {region or 'any region'}")
+
+    def competitors(self, category: str, region: Optional[str] = None, limit: Optional[int] = 5
+                    ) -> List[CompetitorRecord]:
+        """Competitors by market share: the region's and global ones, or of every region without one"""
+        category = self.category(category)
+        by_region = self._competitors.get(category, {})
+        if region is None:
+            records = [record for rows in by_region.values() for record in rows]
+        else:
+            records = [*by_region.get(self.region(region), []), *by_region.get(GLOBAL, [])]
+        best: Dict[str, CompetitorRecord] = {}
+        for record in records:  # one entry per competitor, its largest share
+            if record.competitor not in best or record.market_share_pct > best[record.competitor].market_share_pct:
+                best[record.competitor] = record
+        ranked = sorted(best.values(), key=lambda record: record.market_share_pct, reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def regulations(self, category: str, region: Optional[str] = None) -> List[RegulationRecord]:
+        """Regulations of the category and of all categories, in the region and globally"""
+        category = self.category(category)
+        region_keys = [self.region(region), GLOBAL] if region else [GLOBAL]
+        records, seen = [], set()
+        for region_key in dict.fromkeys(region_keys):
+            for name in (category, ALL_CATEGORIES):
+                for record in self._regulations.get((name, region_key), []):
+                    if record.regulation not in seen:
+                        seen.add(record.regulation)
+                        records.append(record)
+        return records
+
+    def summary(self) -> str:
+        competitors = sum(len(rows) for by_region in self._competitors.values() for rows in by_region.values())
+        regulations = sum(len(rows) for rows in self._regulations.values())
+        return (f"{len(self.categories)} categories, {len(self._regions)} regions, {self.rows:,} rows "
+                f"({len(self._markets):,} markets, {competitors:,} competitors, {regulations:,} regulations)")
+
+
+def common_weaknesses(competitors: List[CompetitorRecord], limit: int = 4) -> List[Tuple[str, List[str]]]:
+    """Weaknesses shared by the most competitors, with the competitors that have them"""
+    counts = Counter(weakness for record in competitors for weakness in dict.fromkeys(record.weaknesses))
+    return [(weakness, [record.competitor for record in competitors if weakness in record.weaknesses])
+            for weakness, _ in counts.most_common(limit)]
+
+
+def highest_risk(regulations: List[RegulationRecord]) -> str:
+    levels = [record.risk_level for record in regulations if record.risk_level in RISK_LEVELS]
+    return max(levels, key=RISK_LEVELS.index) if levels else "Low"
+
+
+_shared_data: Optional[MarketDataset] = None
+_shared_lock = threading.Lock()
+
+
+def get_market_data() -> MarketDataset:
+    """The process-wide dataset, loaded on first use from MARKET_DATA_DIR (default data/)"""
+    global _shared_data
+    with _shared_lock:
+        if _shared_data is None:
+            _shared_data = MarketDataset.load(os.getenv("MARKET_DATA_DIR", DEFAULT_DATA_DIR))
+        return _shared_data
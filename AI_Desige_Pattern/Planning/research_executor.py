@@ -0,0 +1,236 @@
+"""
+Parallel execution of ResearchPlan subtasks without an LLM executor loop.
+
+Every ResearchSubtask already names its tool, so instead of handing the whole plan to an
+executor agent (one LLM turn per tool call), the subtasks are mapped to registered tool
+functions, their arguments are filled from the research context by parameter name, and
+all of them run concurrently:
+
+    ResearchPlan ──> analyze_market_size ─────────┐
+                 ──> research_competitors ────────┼──> PlanExecution (typed insights)
+                 ──> gather_customer_insights ────┤
+                 ──> assess_regulatory_environment┘
+
+Planner-written tool names don't always match exactly ("Market Size Analysis",
+"functions.research_competitors()"), so names are matched exactly, then by edit
+distance, then by keywords shared with the tool's name and aliases.
+"""
+import asyncio
+import difflib
+import inspect
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Words too generic to tell the research tools apart (by their first 5 letters)
+GENERIC_STEMS = {"analy", "resea", "asses", "gathe", "get", "tool", "data", "study", "find", "run"}
+
+
+def _normalize(name: str) -> str:
+    """Lowercase snake_case, without a "functions." prefix or call parentheses"""
+    name = name.strip().lower().split(".")[-1]
+    return re.sub(r"[^a-z0-9]+", "_", name).strip("_")
+
+
+def _stems(text: str) -> set:
+    return {word[:5] for word in re.split(r"[^a-z0-9]+", text.lower()) if word} - GENERIC_STEMS
+
+
+@dataclass
+class _Tool:
+    name: str
+    function: Callable[..., Any]
+    stems: List[set] = field(default_factory=list)  # of the name and every alias
+
+
+class ToolRegistry:
+    """
+    Research tools by name; `register` works as a decorator too.
+
+    Example:
+        registry = ToolRegistry()
+        registry.register(analyze_market_size, aliases=["market size", "market trends"])
+        registry.resolve("Market Size Analysis")  # -> "analyze_market_size"
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, _Tool] = {}
+        self._names: Dict[str, str] = {}  # normalized name or alias -> tool name
+
+    def register(self, function: Optional[Callable] = None, *, name: Optional[str] = None,
+                 aliases: Iterable[str] = ()):
+        if function is None:
+            return lambda f: self.register(f, name=name, aliases=aliases)
+        name = name or function.__name__
+        tool = _Tool(name, function, [_stems(label) for label in (name, *aliases)])
+        self._tools[name] = tool
+        for label in (name, *aliases):
+            self._names[_normalize(label)] = name
+        return function
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def function(self, name: str) -> Callable[..., Any]:
+        return self._tools[name].function
+
+    def resolve(self, tool_name: str, task_name: str = "") -> Optional[str]:
+        """The registered tool a subtask's tool_name (and task name) refers to, or None"""
+        normalized = _normalize(tool_name)
+        if normalized in self._names:
+            return self._names[normalized]
+        close = difflib.get_close_matches(normalized, list(self._names), n=1, cutoff=0.8)
+        if close:
+            return self._names[close[0]]
+        # Keywords shared with the tool's name or one of its aliases; a tie matches nothing
+        wanted = _stems(f"{tool_name} {task_name}")
+        scores = sorted(
+            ((max(len(wanted & stems) / len(stems) for stems in tool.stems if stems), tool.name)
+             for tool in self._tools.values()),
+            reverse=True,
+        )
+        if not scores or scores[0][0] == 0 or (len(scores) > 1 and scores[1][0] == scores[0][0]):
+            return None
+        return scores[0][1]
+
+
+@dataclass
+class SubtaskResult:
+    """One executed subtask: its typed insight, or why it failed"""
+    step: int
+    task_name: str
+    tool_name: Optional[str]
+    insight: Any = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PlanExecution:
+    """Results of every subtask of a plan, in plan order"""
+    results: List[SubtaskResult]
+    seconds: float
+
+    @property
+    def insights(self) -> Dict[str, Any]:
+        """Typed insight per tool name (successful subtasks only)"""
+        return {result.tool_name: result.insight for result in self.results if result.ok}
+
+    @property
+    def failed(self) -> List[SubtaskResult]:
+        return [result for result in self.results if not result.ok]
+
+    def to_prompt(self) -> str:
+        """Findings for the synthesis prompt, as JSON"""
+        findings = []
+        for result in self.results:
+            entry = {"step": result.step, "task": result.task_name, "tool": result.tool_name}
+            if result.ok:
+                insight = result.insight
+                entry["findings"] = insight.model_dump() if isinstance(insight, BaseModel) else insight
+            else:
+                entry["error"] = result.error
+            findings.append(entry)
+        return json.dumps(findings, indent=2, default=str)
+
+    def summary(self) -> str:
+        serial = sum(result.seconds for result in self.results)
+        return (f"{len(self.results) - len(self.failed)}/{len(self.results)} subtasks in {self.seconds:.2f}s "
+                f"(sequential would take ~{serial:.2f}s)")
+
+
+class ResearchPlanExecutor:
+    """
+    Runs the subtasks of a ResearchPlan on registered tools, concurrently.
+
+    Args:
+        registry: Tools the subtasks can refer to
+        max_concurrency: Tool calls in flight at once
+        timeout: Seconds per tool call before its subtask fails
+    """
+
+    def __init__(self, registry: ToolRegistry, max_concurrency: int = 4, timeout: float = 30.0):
+        self.registry = registry
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    def arguments(self, tool_name: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill a tool's parameters from the research context by name; raises ValueError if one is missing"""
+        kwargs = {}
+        for parameter in inspect.signature(self.registry.function(tool_name)).parameters.values():
+            if parameter.name in context:
+                kwargs[parameter.name] = context[parameter.name]
+            elif parameter.default is inspect.Parameter.empty:
+                raise ValueError(f"No value for parameter '{parameter.name}' of {tool_name}")
+        return kwargs
+
+    async def _call(self, tool_name: str, kwargs: Dict[str, Any]) -> Any:
+        function = self.registry.function(tool_name)
+        if inspect.iscoroutinefunction(function):
+            return await asyncio.wait_for(function(**kwargs), self.timeout)
+        return await asyncio.wait_for(asyncio.to_thread(function, **kwargs), self.timeout)
+
+    async def stream(self, subtasks: Iterable[Any], context: Dict[str, Any]) -> AsyncIterator[SubtaskResult]:
+        """
+        Run every subtask (anything with step, task_name and tool_name), yielding each
+        result as soon as its subtask finishes.
+
+        Subtasks that map to the same tool with the same arguments share one call; a
+        subtask that fails (unknown tool, missing argument, error, timeout) is reported
+        in its result and doesn't stop the others.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        calls: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        async def limited(tool_name: str, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+            async with semaphore:
+                started = time.perf_counter()
+                insight = await self._call(tool_name, kwargs)
+                return insight, time.perf_counter() - started
+
+        async def run(subtask: Any) -> SubtaskResult:
+            tool_name = self.registry.resolve(subtask.tool_name, subtask.task_name)
+            result = SubtaskResult(subtask.step, subtask.task_name, tool_name)
+            try:
+                if tool_name is None:
+                    raise ValueError(f"No registered tool matches '{subtask.tool_name}'")
+                kwargs = self.arguments(tool_name, context)
+                key = (tool_name, json.dumps(kwargs, sort_keys=True, default=str))
+                if key not in calls:
+                    calls[key] = asyncio.ensure_future(limited(tool_name, kwargs))
+                result.insight, result.seconds = await calls[key]
+            except asyncio.TimeoutError:
+                result.error = f"{tool_name} timed out after {self.timeout:.0f}s"
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+            return result
+
+        tasks = [asyncio.ensure_future(run(subtask)) for subtask in subtasks]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in [*tasks, *calls.values()]:
+                task.cancel()
+
+    async def execute(self, subtasks: Iterable[Any], context: Dict[str, Any]) -> PlanExecution:
+        """Run every subtask (see `stream`) and collect the results in plan order"""
+        start = time.perf_counter()
+        results = [result async for result in self.stream(subtasks, context)]
+        results.sort(key=lambda result: result.step)
+        return PlanExecution(results, time.perf_counter() - start)
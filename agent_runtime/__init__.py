@@ -0,0 +1,8 @@
+"""Runtime helpers shared by the agent apps in this repository"""
+from agent_runtime.background_loop import BackgroundLoop, LoopLagStats, get_background_loop
+from agent_runtime.call_limiter import CallLimiter
+from agent_runtime.tokens import count_tokens
+from agent_runtime.tool_cache import ToolCache, cached_tool, get_tool_cache
+
+__all__ = ["BackgroundLoop", "LoopLagStats", "get_background_loop", "CallLimiter", "ToolCache", "cached_tool",
+           "get_tool_cache", "count_tokens"]
@@ -0,0 +1,187 @@
+"""
+Long-lived background event loop for running agent coroutines from Streamlit.
+
+Streamlit runs the app script synchronously on every interaction. Calling
+`asyncio.run()` / `asyncio.new_event_loop()` per click creates a fresh loop each time,
+so async HTTP clients (AsyncOpenAI, Groq, ...) lose their connection pools, and loops
+that are never closed leak sockets. Instead, one daemon thread per process runs a
+single event loop forever; the script thread submits coroutines to it and waits for
+their results, and cached clients keep their warm connections across runs.
+
+The loop also measures its own lag: how late a periodic wake-up fires. High lag means
+something is blocking the loop (e.g. synchronous work inside a coroutine).
+"""
+import asyncio
+import atexit
+import collections
+import concurrent.futures
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Deque, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopLagStats:
+    """Rolling window of event-loop lag samples, in seconds"""
+
+    def __init__(self, window: int = 600):
+        self.samples: Deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, lag: float):
+        with self._lock:
+            self.samples.append(max(lag, 0.0))
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self.samples)
+
+    @property
+    def mean(self) -> float:
+        samples = self._snapshot()
+        return sum(samples) / len(samples) if samples else 0.0
+
+    @property
+    def p95(self) -> float:
+        samples = self._snapshot()
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+
+    @property
+    def max(self) -> float:
+        samples = self._snapshot()
+        return samples[-1] if samples else 0.0
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever on a daemon thread.
+
+    Args:
+        name: Thread name
+        lag_interval: Seconds between lag measurements
+    """
+
+    def __init__(self, name: str = "agent-runtime-loop", lag_interval: float = 0.5):
+        self.name = name
+        self.lag_interval = lag_interval
+        self.lag = LoopLagStats()
+        self.submitted = 0
+        self.completed = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "BackgroundLoop":
+        with self._lock:
+            if not self.running:
+                started = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(started,), name=self.name, daemon=True)
+                self._thread.start()
+                started.wait()
+        return self
+
+    def _run(self, started: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.create_task(self._measure_lag())
+        self._loop.call_soon(started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    async def _measure_lag(self):
+        while True:
+            scheduled = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.lag.record(time.perf_counter() - scheduled)
+
+    def _count_completed(self, _future):
+        self.completed += 1
+
+    def submit(self, coroutine: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Schedule a coroutine on the loop; returns a thread-safe future for its result"""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        self.submitted += 1
+        future.add_done_callback(self._count_completed)
+        return future
+
+    def run(self, coroutine: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and block the calling thread until it finishes"""
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, generator: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Consume an async generator from a synchronous thread, one item at a time, so
+        each item can be rendered (e.g. with Streamlit) as soon as it is produced.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(generator, "aclose", None)
+            if aclose is not None and self.running:
+                self.run(aclose())
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the loop, cancelling pending tasks, and wait for the thread to exit"""
+        with self._lock:
+            if self.running:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        return {
+            "running": self.running,
+            "submitted": self.submitted,
+            "in_flight": self.submitted - self.completed,
+            "lag_mean_ms": self.lag.mean * 1000,
+            "lag_p95_ms": self.lag.p95 * 1000,
+            "lag_max_ms": self.lag.max * 1000,
+        }
+
+    def summary(self) -> str:
+        m = self.metrics()
+        return (f"{m['submitted']} runs ({m['in_flight']} in flight), loop lag mean {m['lag_mean_ms']:.1f} ms, "
+                f"p95 {m['lag_p95_ms']:.1f} ms, max {m['lag_max_ms']:.1f} ms")
+
+
+_shared_loop: Optional[BackgroundLoop] = None
+_shared_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """
+    The process-wide background loop, started on first use.
+
+    Streamlit re-executes app scripts on every interaction, but imported modules
+    stay loaded, so every run and session of every app in the process shares this loop.
+    """
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = BackgroundLoop().start()
+            atexit.register(_shared_loop.stop)
+        return _shared_loop
@@ -0,0 +1,111 @@
+"""
+Shared concurrency and rate limit for LLM calls, with priorities.
+
+Batch jobs run many pipelines at once against one provider quota. Every pipeline stage
+takes a slot before calling the model:
+
+    limiter = CallLimiter(max_concurrency=4, requests_per_minute=30)
+
+    async with limiter.slot(priority=0):   # lower numbers go first
+        result = await Runner.run(agent, prompt)
+
+At most `max_concurrency` calls are in flight and calls start at most
+`requests_per_minute` per minute (evenly spaced). Waiting calls are served by priority,
+then in arrival order, so late pipeline stages (e.g. synthesis) can go ahead of new work
+and finished results come out early instead of all at the end.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+
+class CallLimiter:
+    """
+    Priority-ordered concurrency limit plus request rate limit for async calls.
+
+    Args:
+        max_concurrency: Calls in flight at once (None for no limit)
+        requests_per_minute: Calls started per minute (None for no limit)
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, requests_per_minute: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.calls = 0
+        self.max_in_flight = 0
+        self.queued_seconds = 0.0  # waiting for a free slot
+        self.throttled_seconds = 0.0  # waiting for the rate limit
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._next_start = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self, priority: int = 0):
+        """Wait for a free slot (lower priority numbers first), then for the rate limit"""
+        queued = time.perf_counter()
+        if self.max_concurrency is not None and (self._in_flight >= self.max_concurrency or self._waiters):
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._order), future))
+            try:
+                await future  # the releasing call hands its slot over
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()
+                raise
+        else:
+            self._in_flight += 1
+        self.queued_seconds += time.perf_counter() - queued
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        self.calls += 1
+        try:
+            await self._throttle()
+        except asyncio.CancelledError:
+            self.release()  # the slot is ours by now; don't leak it
+            raise
+
+    async def _throttle(self):
+        if not self.requests_per_minute:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 60.0 / self.requests_per_minute
+        if start > now:
+            self.throttled_seconds += start - now
+            await asyncio.sleep(start - now)
+
+    def release(self):
+        """Free a slot, handing it to the highest-priority waiting call"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = 0) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def summary(self) -> str:
+        limits = [f"max {self.max_concurrency} in flight" if self.max_concurrency else "no concurrency limit",
+                  f"{self.requests_per_minute:g}/min" if self.requests_per_minute else "no rate limit"]
+        return (f"{self.calls} calls ({', '.join(limits)}), peak {self.max_in_flight} in flight, "
+                f"queued {self.queued_seconds:.1f}s, throttled {self.throttled_seconds:.1f}s")
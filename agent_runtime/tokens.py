@@ -0,0 +1,16 @@
+"""
+Prompt token counting shared by the apps' prompt-size reports.
+
+Uses tiktoken's o200k_base encoding when it is available; otherwise every app falls back
+to the same `len(text) // 4` estimate, so the token counts they report stay comparable.
+"""
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_ENCODING.encode(text))
+except Exception:  # tiktoken missing or its encoding could not be downloaded
+    def count_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
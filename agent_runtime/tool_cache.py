@@ -0,0 +1,210 @@
+"""
+Persistent TTL cache for agent tool results.
+
+Research tools are meant to be backed by paid APIs, and every run calls them again with
+the same arguments. `cached_tool` caches a tool function's results in SQLite, per tool
+and per call arguments, for `ttl` seconds:
+
+    @function_tool
+    @cached_tool(ttl=24 * 3600, max_entries=500)
+    def analyze_market_size(product_category: str, region: str) -> MarketInsight:
+        ...
+
+The decorator keeps the function's name, signature, annotations and docstring, so it
+goes under `@function_tool` (or is called directly). Both sync and async functions work.
+Results are stored as JSON; pydantic models are rebuilt from the return annotation.
+Results that can't be serialized are returned but not cached.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agent_runtime", "tool_cache.sqlite3")
+
+
+class ToolCache:
+    """
+    SQLite-backed tool results by (tool, arguments key), with per-entry expiry and
+    per-tool least-recently-used eviction.
+
+    Args:
+        path: SQLite database file (":memory:" for a per-process cache)
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            " tool TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_used_at REAL NOT NULL, PRIMARY KEY (tool, key))"
+        )
+        self._db.commit()
+
+    def _count(self, tool: str, outcome: str):
+        self._stats.setdefault(tool, {"hits": 0, "misses": 0})[outcome] += 1
+
+    def get(self, tool: str, key: str) -> Tuple[bool, Optional[str]]:
+        """(True, stored JSON) for a fresh entry, else (False, None)"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM tool_results WHERE tool = ? AND key = ?",
+                                   (tool, key)).fetchone()
+            if row is None or row[1] < now:
+                self._count(tool, "misses")
+                return False, None
+            self._db.execute("UPDATE tool_results SET last_used_at = ? WHERE tool = ? AND key = ?", (now, tool, key))
+            self._db.commit()
+            self._count(tool, "hits")
+        return True, row[0]
+
+    def put(self, tool: str, key: str, value: str, ttl: float, max_entries: int):
+        """Store a result and evict the tool's expired / least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_results (tool, key, value, expires_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (tool, key, value, now + ttl, now),
+            )
+            self._db.execute("DELETE FROM tool_results WHERE tool = ? AND expires_at < ?", (tool, now))
+            self._db.execute(
+                "DELETE FROM tool_results WHERE tool = ? AND key NOT IN"
+                " (SELECT key FROM tool_results WHERE tool = ? ORDER BY last_used_at DESC LIMIT ?)",
+                (tool, tool, max_entries),
+            )
+            self._db.commit()
+
+    def entries(self, tool: Optional[str] = None) -> int:
+        with self._lock:
+            if tool is None:
+                return self._db.execute("SELECT COUNT(*) FROM tool_results").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM tool_results WHERE tool = ?", (tool,)).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.entries()
+
+    def clear(self, tool: Optional[str] = None):
+        with self._lock:
+            if tool is None:
+                self._db.execute("DELETE FROM tool_results")
+            else:
+                self._db.execute("DELETE FROM tool_results WHERE tool = ?", (tool,))
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def stats(self, tool: Optional[str] = None) -> Dict[str, Any]:
+        """Hits, misses, hit rate and stored entries of one tool, or of all tools"""
+        with self._lock:
+            counts = [self._stats.get(tool, {})] if tool else list(self._stats.values())
+        hits = sum(c.get("hits", 0) for c in counts)
+        misses = sum(c.get("misses", 0) for c in counts)
+        return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": self.entries(tool)}
+
+    def summary(self) -> str:
+        s = self.stats()
+        return f"{s['entries']} cached results, {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%})"
+
+
+_shared_cache: Optional[ToolCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    """The process-wide tool cache, at AGENT_TOOL_CACHE_PATH (default ~/.cache/agent_runtime/)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ToolCache(os.getenv("AGENT_TOOL_CACHE_PATH", DEFAULT_CACHE_PATH))
+        return _shared_cache
+
+
+def _dump(value: Any) -> str:
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json()
+    return json.dumps(value, sort_keys=True)
+
+
+def _loader(function: Callable) -> Callable[[str], Any]:
+    """Rebuild a cached result: a pydantic model from the return annotation, else plain JSON"""
+    try:
+        return_type = typing.get_type_hints(function).get("return")
+    except Exception:  # unresolvable forward references
+        return_type = None
+    if hasattr(return_type, "model_validate_json"):
+        return return_type.model_validate_json
+    return json.loads
+
+
+def cached_tool(ttl: float = 3600, max_entries: int = 1000, name: Optional[str] = None,
+                cache: Optional[ToolCache] = None):
+    """
+    Cache a tool function's results per call arguments.
+
+    Args:
+        ttl: Seconds a result stays valid
+        max_entries: Results kept for this tool; the least recently used are evicted beyond this
+        name: Cache namespace (default: the function's qualified name)
+        cache: ToolCache to use (default: the process-wide get_tool_cache())
+
+    The wrapper has `cache_info()` (hits, misses, hit rate, entries) and `cache_clear()`.
+    """
+    def decorator(function: Callable) -> Callable:
+        tool = name or f"{function.__module__}.{function.__qualname__}"
+        signature = inspect.signature(function)
+        load = _loader(function)
+
+        def store() -> ToolCache:
+            return cache if cache is not None else get_tool_cache()
+
+        def key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            payload = json.dumps(bound.arguments, sort_keys=True, default=str)
+            return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+        def save(call_key: str, result: Any):
+            try:
+                store().put(tool, call_key, _dump(result), ttl, max_entries)
+            except (TypeError, ValueError):  # not JSON-serializable: returned, not cached
+                pass
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                call_key = key(args, kwargs)
+                found, value = store().get(tool, call_key)
+                if found:
+                    return load(value)
+                result = await function(*args, **kwargs)
+                save(call_key, result)
+                return result
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                call_key = key(args, kwargs)
+                found, value = store().get(tool, call_key)
+                if found:
+                    return load(value)
+                result = function(*args, **kwargs)
+                save(call_key, result)
+                return result
+
+        wrapper.cache_info = lambda: store().stats(tool)
+        wrapper.cache_clear = lambda: store().clear(tool)
+        return wrapper
+
+    return decorator